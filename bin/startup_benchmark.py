@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+"""Measure how long it takes to start Toolhub.
+
+Each target is started in a fresh Python interpreter several times and the
+fastest and median wall clock times are reported. The ``python`` target is
+the cost of starting the interpreter alone.
+
+Usage: bin/startup_benchmark.py [--runs N] [--importtime] [TARGET ...]
+"""
+import argparse
+import os
+import statistics
+import subprocess  # nosec: B404
+import sys
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = {
+    "python": ["-c", "pass"],
+    "setup": ["-c", "import django; django.setup()"],
+    "wsgi": ["-c", "import toolhub.wsgi"],
+    "check": ["manage.py", "check"],
+}
+
+
+def run(args, importtime=False):
+    """Run a Python command and return its duration and stderr."""
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    start = time.perf_counter()
+    proc = subprocess.run(  # nosec: B603
+        cmd + args,
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    return time.perf_counter() - start, proc.stderr
+
+
+def slowest_imports(stderr, count):
+    """Find the imports with the largest cumulative time."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        try:
+            cumulative = int(parts[1])
+        except (IndexError, ValueError):
+            # Header line
+            continue
+        imports.append((cumulative, parts[2].strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        metavar="TARGET",
+        default=list(TARGETS),
+        help="Targets to time: {}".format(", ".join(TARGETS)),
+    )
+    parser.add_argument(
+        "--runs", type=int, default=5, help="Times to start each target."
+    )
+    parser.add_argument(
+        "--importtime",
+        action="store_true",
+        help="Also list the slowest imports of each target.",
+    )
+    args = parser.parse_args()
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "toolhub.settings")
+
+    print("{:<8} {:>9} {:>9}".format("target", "min (s)", "median (s)"))
+    for target in args.targets:
+        times = [run(TARGETS[target])[0] for _ in range(args.runs)]
+        print(
+            "{:<8} {:>9.3f} {:>9.3f}".format(
+                target, min(times), statistics.median(times)
+            )
+        )
+        if args.importtime:
+            _, stderr = run(TARGETS[target], importtime=True)
+            for cumulative, module in slowest_imports(stderr, 10):
+                print("    {:>8.1f} ms  {}".format(cumulative / 1000, module))
+
+
+if __name__ == "__main__":
+    main()
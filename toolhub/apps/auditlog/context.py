@@ -34,6 +34,8 @@ def auditlog_context(user, comment=None):
     """Context manager for setting user and comment for LogEntry creation."""
     threadlocal.auditlog = {
         "dispatch_uid": ("auditlog_user", time.time()),
+        "user": user,
+        "comment": comment,
     }
     pre_save_callback = partial(
         _on_logentry_save,
@@ -64,6 +66,19 @@ def auditlog_context(user, comment=None):
             del threadlocal.auditlog
 
 
+def get_auditlog_context():
+    """Get the user and comment of the active auditlog_context.
+
+    :returns: (user, comment); (None, None) when no context is active
+    :rtype: tuple
+    """
+    auditlog = getattr(threadlocal, "auditlog", {})
+    user = auditlog.get("user")
+    if not isinstance(user, get_user_model()):
+        user = None
+    return user, auditlog.get("comment")
+
+
 def _on_logentry_save(
     user, comment, duid, sender, instance, **kwargs  # noqa: W0613
 ):
@@ -35,6 +35,24 @@ class LogEntryManager(models.Manager):
 
     def log_action(self, user, target, action, msg=None, params=None):
         """Log an action."""
+        entry = self._build_entry(user, target, action, msg, params)
+        entry.save(force_insert=True)
+        return entry
+
+    def bulk_log_action(self, user, targets, action, msg=None, params=None):
+        """Log the same action for many targets using a single query.
+
+        Unlike `log_action` this does not send pre_save/post_save signals for
+        the new LogEntry instances.
+        """
+        entries = [
+            self._build_entry(user, target, action, msg, params)
+            for target in targets
+        ]
+        return self.model.objects.bulk_create(entries)
+
+    def _build_entry(self, user, target, action, msg=None, params=None):
+        """Build an unsaved LogEntry."""
         kwargs = {
             "user": user,
             "content_type": LogEntryManager._get_content_type(target),
@@ -47,8 +65,7 @@ class LogEntryManager(models.Manager):
             kwargs["object_id"] = pk
         else:
             kwargs["object_pk"] = pk
-
-        return self.model.objects.create(**kwargs)
+        return self.model(**kwargs)
 
     def get_for_object(self, instance):
         """Get log entries for a model instance."""
@@ -26,6 +26,10 @@ from django.db.models.signals import pre_save
 from safedelete.models import SafeDeleteModel
 from safedelete.signals import post_softdelete
 
+from toolhub.signals import post_bulk_create
+from toolhub.signals import post_bulk_softdelete
+
+from .context import get_auditlog_context
 from .models import LogEntry
 
 
@@ -61,6 +65,35 @@ def log_create_callback(sender, instance, created, **kwargs):  # noqa: W0613
         )
 
 
+def log_bulk_create_callback(sender, instances, **kwargs):  # noqa: W0613
+    """Handle a bulk instance creation signal."""
+    _bulk_log_action(instances, LogEntry.CREATE)
+
+
+def log_bulk_delete_callback(sender, instances, **kwargs):  # noqa: W0613
+    """Handle a bulk instance soft deletion signal."""
+    _bulk_log_action(instances, LogEntry.DELETE)
+
+
+def _bulk_log_action(instances, action):
+    """Log the same action for many instances."""
+    targets = [
+        instance
+        for instance in instances
+        if not exclude_instance_from_auditlogging(instance)
+    ]
+    if targets:
+        # Bulk inserted LogEntry instances do not send the pre_save signal
+        # that auditlog_context relies on, so apply the context directly.
+        user, comment = get_auditlog_context()
+        LogEntry.objects.bulk_log_action(
+            user=user,
+            targets=targets,
+            action=action,
+            msg=comment,
+        )
+
+
 def log_update_callback(sender, instance, **kwargs):  # noqa: W0613
     """Handle an instance update signal."""
     if exclude_instance_from_auditlogging(instance):
@@ -152,6 +185,8 @@ class ModelRegistry:
             pre_save: log_update_callback,
             post_delete: log_delete_callback,
             post_softdelete: log_delete_callback,
+            post_bulk_create: log_bulk_create_callback,
+            post_bulk_softdelete: log_bulk_delete_callback,
         }
 
     def register(self, model=None):
@@ -15,9 +15,11 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import collections
+import contextlib
+import contextvars
 import io
 import logging
-import threading
 
 
 DEFAULT_FORMAT = "%(asctime)s %(name)s %(levelname)s: %(message)s"
@@ -63,28 +65,94 @@ class LogCaptureContext:
             self.stream.close()
 
 
-class CaptureCrawlLogs(LogCaptureContext):
-    """Collect logs and store in the given model."""
+class RingBuffer:
+    """Keep the most recent lines of text up to a maximum size.
 
-    def __init__(self, model, field="logs"):
-        """Setup context."""
-        self.model = model
-        self.field = field
-        thread_id = threading.get_ident()
-        filters = [
-            # Only collect records for toolhub classes
-            logging.Filter(name="toolhub"),
-            # Only collect records emitted by the same thread that called us
-            lambda r: r.thread == thread_id,
-        ]
-        super().__init__(
-            level=logging.INFO,
-            fmt=COMPACT_FORMAT,
-            filters=filters,
-        )
+    When older lines are discarded to make room, a marker noting how many
+    were dropped is added to the start of the value. A single line too
+    long to fit is kept with its start replaced by an ellipsis.
+    """
 
-    def __exit__(self, exc_type, exc_value, traceback):
-        """Exit context."""
-        setattr(self.model, self.field, self.stream.getvalue())
-        self.model.save()
-        super().__exit__(exc_type, exc_value, traceback)
+    ELLIPSIS = "..."
+
+    def __init__(self, max_size):
+        """Initialize instance.
+
+        :param max_size: Maximum number of characters to keep
+        """
+        self.max_size = max_size
+        self.lines = collections.deque()
+        self.size = 0
+        self.dropped = 0
+
+    def append(self, line):
+        """Add a line of text."""
+        # Leave room for the newline added by getvalue()
+        limit = max(self.max_size - 1, 0)
+        if len(line) > limit:
+            start = len(line) - max(limit - len(self.ELLIPSIS), 0)
+            line = (self.ELLIPSIS + line[start:])[:limit]
+        self.lines.append(line)
+        self.size += len(line) + 1
+        while self.size > self.max_size:
+            self.size -= len(self.lines.popleft()) + 1
+            self.dropped += 1
+
+    def getvalue(self):
+        """Get the buffered text."""
+        text = "".join(line + "\n" for line in self.lines)
+        if self.dropped:
+            text = "[{} earlier lines truncated]\n{}".format(
+                self.dropped, text
+            )
+        return text
+
+
+# Buffer that log records emitted in the current context are collected in
+_buffer = contextvars.ContextVar("crawler_log_buffer", default=None)
+
+
+class ContextBufferHandler(logging.Handler):
+    """Collect log records in the RingBuffer of the current context."""
+
+    def emit(self, record):
+        """Add a record to the current buffer."""
+        buffer = _buffer.get()
+        if buffer is None:
+            return
+        try:
+            buffer.append(self.format(record))
+        except Exception:  # noqa: B902
+            self.handleError(record)
+
+
+@contextlib.contextmanager
+def capture_context_logs(logger=None, level=logging.INFO, fmt=COMPACT_FORMAT):
+    """Collect toolhub logs in context buffers while the block runs.
+
+    Installs a single handler which sends each record to the buffer set by
+    `log_to_buffer` in the context that emitted the record. Records emitted
+    outside of `log_to_buffer` are ignored.
+    """
+    if logger is None:
+        logger = logging.getLogger()
+    handler = ContextBufferHandler(level)
+    handler.setFormatter(logging.Formatter(fmt))
+    # Only collect records for toolhub classes
+    handler.addFilter(logging.Filter(name="toolhub"))
+    logger.addHandler(handler)
+    try:
+        yield handler
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+@contextlib.contextmanager
+def log_to_buffer(buffer):
+    """Collect logs emitted in the current context in a buffer."""
+    token = _buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _buffer.reset(token)
@@ -15,11 +15,56 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import argparse
+import datetime
+
+from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.dateparse import parse_datetime
 
+from toolhub.apps.crawler.replay import Archive
+from toolhub.apps.crawler.replay import record_session
+from toolhub.apps.crawler.replay import replay_session
 from toolhub.apps.crawler.tasks import Crawler
 
 
+def shard_arg(value):
+    """Parse an "N/M" shard argument."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "expected N/M, got '{}'".format(value)
+        )
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(
+            "shard {} is not between 1 and {}".format(index, count)
+        )
+    return index, count
+
+
+def since_arg(value):
+    """Parse a date or datetime argument."""
+    try:
+        dt = parse_datetime(value)
+        if dt is None:
+            date = parse_date(value)
+            if date is not None:
+                dt = datetime.datetime.combine(date, datetime.time())
+    except ValueError:
+        dt = None
+    if dt is None:
+        raise argparse.ArgumentTypeError(
+            "expected a date or datetime, got '{}'".format(value)
+        )
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
 class Command(BaseCommand):
     """Run the crawler."""
 
@@ -34,11 +79,108 @@ class Command(BaseCommand):
             dest="print_report",
             help="Do not output run results to stdout.",
         )
+        parser.add_argument(
+            "-c",
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Maximum number of URLs to fetch in parallel.",
+        )
+        parser.add_argument(
+            "-p",
+            "--processes",
+            type=int,
+            default=None,
+            help="Number of worker processes to crawl with.",
+        )
+        parser.add_argument(
+            "--shard",
+            type=shard_arg,
+            default=None,
+            metavar="N/M",
+            help="Only crawl URLs in partition N of M (by URL id).",
+        )
+        parser.add_argument(
+            "--url",
+            action="append",
+            dest="urls",
+            metavar="URL",
+            default=None,
+            help="Only crawl this URL. May be given more than once.",
+        )
+        parser.add_argument(
+            "--created-by",
+            default=None,
+            metavar="USERNAME",
+            help="Only crawl URLs registered by this user.",
+        )
+        parser.add_argument(
+            "--since",
+            type=since_arg,
+            default=None,
+            metavar="DATETIME",
+            help="Only crawl URLs registered on or after this date.",
+        )
+        parser.add_argument(
+            "-f",
+            "--force",
+            action="store_true",
+            help="Crawl selected URLs even if they are not due yet.",
+        )
+        archive = parser.add_mutually_exclusive_group()
+        archive.add_argument(
+            "--record",
+            default=None,
+            metavar="PATH",
+            help="Save all fetched responses to an archive file.",
+        )
+        archive.add_argument(
+            "--replay",
+            default=None,
+            metavar="PATH",
+            help="Serve responses from an archive file instead of fetching.",
+        )
 
     def handle(self, *args, **options):
         """Execute the command."""
-        spider = Crawler()
-        run = spider.crawl()
+        created_by = None
+        if options["created_by"]:
+            try:
+                created_by = get_user_model().objects.get(
+                    username=options["created_by"]
+                )
+            except get_user_model().DoesNotExist:
+                raise CommandError(
+                    "Unknown user '{}'".format(options["created_by"])
+                )
+
+        spider = Crawler(
+            concurrency=options["concurrency"],
+            processes=options["processes"],
+        )
+        archive = None
+        if options["record"]:
+            if spider.processes > 1:
+                raise CommandError(
+                    "--record can not be used with multiple processes"
+                )
+            archive = Archive()
+            record_session(spider.session, archive)
+        if options["replay"]:
+            try:
+                replay_session(spider.session, Archive.load(options["replay"]))
+            except (OSError, ValueError) as e:
+                raise CommandError("Failed to load archive: {}".format(e))
+
+        run = spider.crawl(
+            shard=options["shard"],
+            urls=options["urls"],
+            created_by=created_by,
+            since=options["since"],
+            force=options["force"],
+        )
+        if archive is not None:
+            archive.save(options["record"])
         if options["print_report"]:
             self.stdout.write(repr(run))
             for url in run.urls.all():
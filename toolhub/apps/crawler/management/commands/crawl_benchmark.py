@@ -0,0 +1,236 @@
+# Copyright (c) 2020 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import json
+import random
+import resource
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import transaction
+from django.test.utils import override_settings
+
+from toolhub.apps.crawler.models import Url
+from toolhub.apps.crawler.replay import Archive
+from toolhub.apps.crawler.replay import ArchiveServer
+from toolhub.apps.crawler.replay import replay_session
+from toolhub.apps.crawler.tasks import Crawler
+
+
+class QueryCounter:
+    """Count the database queries executed on a connection."""
+
+    def __init__(self):
+        """Initialize instance."""
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Count a query."""
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    """Benchmark the crawler against a synthetic corpus."""
+
+    help = (  # noqa: A003
+        "Benchmark the crawler against a synthetic corpus of toolinfo "
+        "files. All database changes are rolled back when done, so the "
+        "crawl always runs in a single process and CRAWLER_PROCESSES is "
+        "ignored. Changes made to the search index with --search-index "
+        "are not rolled back."
+    )
+
+    def add_arguments(self, parser):
+        """Add CLI arguments."""
+        parser.add_argument(
+            "--urls",
+            type=int,
+            default=50,
+            help="Number of toolinfo urls to generate.",
+        )
+        parser.add_argument(
+            "--records",
+            type=int,
+            default=20,
+            help="Number of toolinfo records in each url.",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=3,
+            help="Number of crawler runs to time.",
+        )
+        parser.add_argument(
+            "--change-rate",
+            type=float,
+            default=0.1,
+            help="Fraction of records changed before each run after the first.",
+        )
+        parser.add_argument(
+            "--transport",
+            choices=["http", "archive"],
+            default="http",
+            help=(
+                "Serve the corpus from a local HTTP server, or directly from "
+                "an in-memory archive without any network I/O."
+            ),
+        )
+        parser.add_argument(
+            "-c",
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Maximum number of URLs to fetch in parallel.",
+        )
+        parser.add_argument(
+            "--search-index",
+            action="store_true",
+            help=(
+                "Update the search index while crawling. The benchmark "
+                "tools are written to the configured Elasticsearch index "
+                "and cached search responses are invalidated. These "
+                "changes are NOT rolled back, so only use this with a "
+                "disposable search index."
+            ),
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed used to pick changed records.",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        if options["search_index"]:
+            self.stderr.write(
+                self.style.WARNING(
+                    "Writing benchmark tools to the search index. "
+                    "These changes will not be rolled back."
+                )
+            )
+        with override_settings(
+            ELASTICSEARCH_DSL_AUTOSYNC=options["search_index"]
+        ):
+            with transaction.atomic():
+                if options["transport"] == "http":
+                    with ArchiveServer(Archive()) as server:
+                        self.benchmark(server.archive, server, options)
+                else:
+                    self.benchmark(Archive(), None, options)
+                transaction.set_rollback(True)
+
+    def benchmark(self, archive, server, options):
+        """Crawl a synthetic corpus repeatedly and report on each run."""
+        rng = random.Random(options["seed"])
+        nurls = options["urls"]
+        nrecords = options["records"]
+        prefix = "bench-{}".format(uuid.uuid4().hex[:8])
+        user = get_user_model().objects.create(username=prefix)
+
+        sources = [
+            "http://crawler-benchmark.invalid/{}/{}.json".format(prefix, i)
+            for i in range(nurls)
+        ]
+        for source in sources:
+            url = server.url_for(source) if server else source
+            Url.objects.create(url=url, created_by=user)
+        revisions = [[0] * nrecords for _ in sources]
+
+        self.stdout.write(
+            "{:>4} {:>9} {:>8} {:>8} {:>10} {:>8} {:>8} {:>9}".format(
+                "run",
+                "changed",
+                "seconds",
+                "urls/s",
+                "records/s",
+                "queries",
+                "q/record",
+                "rss (MB)",
+            )
+        )
+        for run_number in range(1, options["runs"] + 1):
+            changed = 0
+            if run_number > 1:
+                for revs in revisions:
+                    for j in range(nrecords):
+                        if rng.random() < options["change_rate"]:
+                            revs[j] += 1
+                            changed += 1
+            else:
+                changed = nurls * nrecords
+            for i, source in enumerate(sources):
+                records = [
+                    self.make_toolinfo(prefix, i, j, rev)
+                    for j, rev in enumerate(revisions[i])
+                ]
+                archive.add(
+                    source,
+                    200,
+                    body=json.dumps(records).encode("utf-8"),
+                    headers={"Content-Type": "application/json"},
+                )
+
+            # Worker processes can not share the transaction that is
+            # rolled back at the end, so always crawl in this process.
+            crawler = Crawler(concurrency=options["concurrency"], processes=1)
+            if server is None:
+                replay_session(crawler.session, archive)
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                crawler.crawl(created_by=user, force=True)
+                elapsed = time.perf_counter() - start
+
+            total = nurls * nrecords
+            # ru_maxrss is reported in kilobytes on Linux
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            self.stdout.write(
+                "{:>4} {:>9} {:>8.2f} {:>8.1f} {:>10.1f} {:>8} {:>8.2f} "
+                "{:>9.1f}".format(
+                    run_number,
+                    changed,
+                    elapsed,
+                    nurls / elapsed,
+                    total / elapsed,
+                    counter.count,
+                    counter.count / max(1, total),
+                    rss,
+                )
+            )
+
+    def make_toolinfo(self, prefix, url, record, revision):
+        """Generate a synthetic toolinfo record."""
+        name = "{}-{}-{}".format(prefix, url, record)
+        return {
+            "name": name,
+            "title": "Benchmark tool {} {}".format(url, record),
+            "description": "Synthetic tool {} at revision {}.".format(
+                name, revision
+            ),
+            "url": "https://example.org/{}".format(name),
+            "author": "Crawler benchmark",
+            "keywords": ["benchmark", "synthetic"],
+            "license": "GPL-3.0-or-later",
+            "repository": "https://example.org/{}.git".format(name),
+            "$schema": "/toolinfo/1.2.0-draft02",
+            "$language": "en",
+        }
@@ -0,0 +1,191 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import contextlib
+import logging
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from prometheus_client import CollectorRegistry
+from prometheus_client import Counter
+from prometheus_client import Histogram
+from prometheus_client import push_to_gateway
+from prometheus_client import write_to_textfile
+
+
+logger = logging.getLogger(__name__)
+
+# Phases of crawling a url, in the order they happen:
+# - connect: DNS lookup, connecting and waiting for response headers,
+#   including any retries
+# - download: reading the response body
+# - parse: decoding JSON records from the response body
+# - validate: checking records and looking for duplicates
+# - upsert: creating, updating, and carrying forward tools
+# - delete: deleting tools which are no longer listed
+PHASES = ("connect", "download", "parse", "validate", "upsert", "delete")
+
+# The crawler runs as a short lived cron job, so its metrics are kept in
+# their own registry which is exported at the end of each run rather than
+# being scraped from the web application's /metrics endpoint.
+registry = CollectorRegistry()
+
+PHASE_SECONDS = Histogram(
+    "toolhub_crawler_phase_seconds",
+    "Time spent crawling a url, by phase and host",
+    ["phase", "host"],
+    registry=registry,
+    buckets=(0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+RECORDS = Counter(
+    "toolhub_crawler_records",
+    "Toolinfo records processed by the crawler, by result",
+    ["result"],
+    registry=registry,
+)
+RECORD_RESULTS = (
+    "seen",
+    "created",
+    "updated",
+    "unchanged",
+    "rejected",
+    "duplicate",
+)
+for result in RECORD_RESULTS:
+    # Export zero counts rather than leaving the series out
+    RECORDS.labels(result)
+VALIDATED = Counter(
+    "toolhub_crawler_validated_records",
+    "Toolinfo records validated by the crawler, by schema version",
+    ["version"],
+    registry=registry,
+)
+VALIDATE_SECONDS = Counter(
+    "toolhub_crawler_validate_seconds",
+    "Time spent validating toolinfo records, by schema version",
+    ["version"],
+    registry=registry,
+)
+# Counters that can be carried across processes by counter_values()
+COUNTERS = {
+    "toolhub_crawler_records": RECORDS,
+    "toolhub_crawler_validated_records": VALIDATED,
+    "toolhub_crawler_validate_seconds": VALIDATE_SECONDS,
+}
+
+
+def count_records(result, count=1):
+    """Count toolinfo records with a given result."""
+    if count:
+        RECORDS.labels(result).inc(count)
+
+
+def count_validation(version, seconds):
+    """Count a toolinfo record validated against a schema version."""
+    VALIDATED.labels(version).inc()
+    VALIDATE_SECONDS.labels(version).inc(seconds)
+
+
+def counter_values():
+    """Get the current value of each labelled counter.
+
+    :returns: Map of (counter name, sorted label items) to value
+    :rtype: dict
+    """
+    values = {}
+    for metric in registry.collect():
+        if metric.name not in COUNTERS:
+            continue
+        for sample in metric.samples:
+            if sample.name == metric.name + "_total":
+                key = (metric.name, tuple(sorted(sample.labels.items())))
+                values[key] = sample.value
+    return values
+
+
+def add_counter_values(values):
+    """Add counts collected by counter_values() in another process."""
+    for (name, labels), value in values.items():
+        if value:
+            COUNTERS[name].labels(**dict(labels)).inc(value)
+
+
+def add_time(run_url, phase, seconds):
+    """Add to the time in milliseconds that a RunUrl spent in a phase."""
+    timings = run_url.timings
+    timings[phase] = timings.get(phase, 0) + seconds * 1000
+
+
+@contextlib.contextmanager
+def timed(run_url, phase):
+    """Time a block of code as part of a RunUrl phase."""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        add_time(run_url, phase, time.monotonic() - start)
+
+
+class Stopwatch:
+    """Measure the time spent waiting on an iterator."""
+
+    def __init__(self):
+        """Initialize instance."""
+        self.seconds = 0.0
+
+    def wrap(self, iterable):
+        """Yield the items of an iterable, timing each step."""
+        it = iter(iterable)
+        while True:
+            start = time.monotonic()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self.seconds += time.monotonic() - start
+            yield item
+
+
+def observe_url(run_url):
+    """Record the phase timings of a crawled url.
+
+    Rounds the timings held by the RunUrl to whole milliseconds.
+    """
+    host = urlsplit(run_url.url.url).hostname or ""
+    timings = {}
+    for phase in PHASES:
+        if phase in run_url.timings:
+            ms = run_url.timings[phase]
+            PHASE_SECONDS.labels(phase, host).observe(ms / 1000)
+            timings[phase] = int(round(ms))
+    run_url.timings = timings
+
+
+def export():
+    """Export crawler metrics to the configured destinations."""
+    path = settings.CRAWLER_METRICS_TEXTFILE
+    gateway = settings.CRAWLER_METRICS_PUSHGATEWAY
+    try:
+        if path:
+            write_to_textfile(path, registry)
+        if gateway:
+            push_to_gateway(gateway, job="toolhub_crawler", registry=registry)
+    except OSError:
+        logger.exception("Failed to export crawler metrics")
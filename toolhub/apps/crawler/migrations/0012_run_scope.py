@@ -0,0 +1,18 @@
+# Generated by Django 2.2.24 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crawler', '0011_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='run',
+            name='scope',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
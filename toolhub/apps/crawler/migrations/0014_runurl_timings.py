@@ -0,0 +1,19 @@
+# Generated by Django 2.2.24 on 2026-10-18 19:06
+
+from django.db import migrations
+import toolhub.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crawler', '0013_url_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='runurl',
+            name='timings',
+            field=toolhub.fields.JSONSchemaField(blank=True, default=dict),
+        ),
+    ]
@@ -22,6 +22,9 @@ from django_prometheus.models import ExportModelOperationsMixin
 
 from toolhub.apps.auditlog.signals import registry
 from toolhub.apps.toolinfo.models import Tool
+from toolhub.fields import JSONSchemaField
+
+from .schema import TIMINGS
 
 
 @registry.register()
@@ -39,6 +42,26 @@ class Url(ExportModelOperationsMixin("url"), models.Model):
     created_date = models.DateTimeField(
         auto_now_add=True, blank=True, editable=False, db_index=True
     )
+    etag = models.CharField(
+        blank=True, max_length=255, null=True, editable=False
+    )
+    last_modified = models.CharField(
+        blank=True, max_length=64, null=True, editable=False
+    )
+    content_hash = models.CharField(
+        blank=True, max_length=64, null=True, editable=False
+    )
+    # Crawl schedule. A null next_crawl means the url is due now.
+    next_crawl = models.DateTimeField(
+        blank=True, null=True, editable=False, db_index=True
+    )
+    crawl_interval = models.PositiveIntegerField(
+        blank=True, null=True, editable=False
+    )
+    consecutive_failures = models.PositiveIntegerField(
+        default=0, editable=False
+    )
+    last_changed = models.DateTimeField(blank=True, null=True, editable=False)
 
     def __str__(self):
         return self.url
@@ -57,6 +80,9 @@ class Run(ExportModelOperationsMixin("run"), models.Model):
     new_tools = models.PositiveIntegerField(blank=True, default=0)
     updated_tools = models.PositiveIntegerField(blank=True, default=0)
     total_tools = models.PositiveIntegerField(blank=True, default=0)
+    unchanged_urls = models.PositiveIntegerField(blank=True, default=0)
+    # Description of the urls crawled in a partial run. Null for full runs.
+    scope = models.TextField(blank=True, null=True)
 
     def __str__(self):
         return "id={}; start={:%Y-%m-%d %H:%M}".format(
@@ -88,6 +114,14 @@ class RunUrl(ExportModelOperationsMixin("runurl"), models.Model):
         related_name="crawer_runs",
     )
     logs = models.TextField(blank=True)
+    etag = models.CharField(blank=True, max_length=255, null=True)
+    last_modified = models.CharField(blank=True, max_length=64, null=True)
+    content_hash = models.CharField(blank=True, max_length=64, null=True)
+    timings = JSONSchemaField(
+        blank=True,
+        default=dict,
+        schema=TIMINGS,
+    )
 
     def __str__(self):
         return "id={}; run: {}; url: {}; status_code: {}; valid: {}".format(
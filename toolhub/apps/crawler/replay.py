@@ -0,0 +1,258 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import base64
+import http.server
+import io
+import json
+import threading
+from urllib.parse import urlsplit
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+# Headers describing how a body was transferred. Archived bodies are stored
+# decoded, so these no longer apply when the response is replayed.
+TRANSFER_HEADERS = {
+    "connection",
+    "content-encoding",
+    "content-length",
+    "keep-alive",
+    "transfer-encoding",
+}
+
+
+class Archive:
+    """HTTP responses keyed by request URL.
+
+    Archives are stored on disk as JSON lines. Each line holds the url,
+    status, reason, headers, and base64 encoded body of one response.
+    """
+
+    def __init__(self):
+        """Initialize instance."""
+        self.entries = {}
+        # Incremented each time an entry is added or replaced
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, url, status, body=b"", headers=None, reason=None):
+        """Add or replace the response for a url."""
+        headers = {
+            k: v
+            for k, v in (headers or {}).items()
+            if k.lower() not in TRANSFER_HEADERS
+        }
+        entry = {
+            "url": url,
+            "status": status,
+            "reason": reason or http.HTTPStatus(status).phrase,
+            "headers": headers,
+            "body": body,
+        }
+        with self._lock:
+            self.entries[url] = entry
+            self.version += 1
+
+    def add_response(self, r, *args, **kwargs):  # noqa: W0613
+        """Add a requests.Response.
+
+        The signature allows use as a requests response hook. Reading the
+        body here means that it is held in memory rather than streamed.
+        """
+        self.add(
+            r.request.url,
+            r.status_code,
+            body=r.content,
+            headers=r.headers,
+            reason=r.reason,
+        )
+        return r
+
+    def get(self, url):
+        """Get the entry for a url or None."""
+        return self.entries.get(url)
+
+    def snapshot(self):
+        """Get the current version and a list of all entries."""
+        with self._lock:
+            return self.version, list(self.entries.values())
+
+    @classmethod
+    def load(cls, path):
+        """Load an archive from a file."""
+        archive = cls()
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                archive.add(
+                    entry["url"],
+                    entry["status"],
+                    body=base64.b64decode(entry["body"]),
+                    headers=entry["headers"],
+                    reason=entry["reason"],
+                )
+        return archive
+
+    def save(self, path):
+        """Save the archive to a file."""
+        with open(path, "w", encoding="utf-8") as f:
+            for entry in self.entries.values():
+                data = dict(entry)
+                data["body"] = base64.b64encode(entry["body"]).decode("ascii")
+                f.write(json.dumps(data, sort_keys=True))
+                f.write("\n")
+
+
+def record_session(session, archive):
+    """Add each response received by a requests.Session to an archive."""
+    session.hooks["response"].append(archive.add_response)
+    return session
+
+
+class ArchiveAdapter(BaseAdapter):
+    """A requests transport adapter which replays archived responses.
+
+    Urls which are not in the archive get an empty 404 response. Request
+    headers, including conditional request headers, are ignored.
+    """
+
+    def __init__(self, archive):
+        """Initialize instance."""
+        super().__init__()
+        self.archive = archive
+
+    def send(self, request, **kwargs):  # noqa: W0613
+        """Build a response for a request."""
+        entry = self.archive.get(request.url) or {
+            "status": 404,
+            "reason": "Not Found",
+            "headers": {},
+            "body": b"",
+        }
+        r = Response()
+        r.status_code = entry["status"]
+        r.reason = entry["reason"]
+        r.headers = CaseInsensitiveDict(entry["headers"])
+        r.encoding = get_encoding_from_headers(r.headers)
+        r.raw = io.BytesIO(entry["body"])
+        r.url = request.url
+        r.request = request
+        r.connection = self
+        return r
+
+    def close(self):
+        """Clean up adapter specific items."""
+
+
+def replay_session(session, archive):
+    """Serve all requests made by a requests.Session from an archive."""
+    adapter = ArchiveAdapter(archive)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class ArchiveRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serve archived responses by path."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # noqa: N802
+        """Handle a GET request."""
+        entry = self.server.by_path().get(self.path)
+        if entry is None:
+            self.send_error(404)
+            return
+        body = entry["body"]
+        self.send_response(entry["status"], entry["reason"])
+        for key, value in entry["headers"].items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Do not log requests."""
+
+
+class ArchiveServer(http.server.ThreadingHTTPServer):
+    """A local HTTP server which stands in for the hosts in an archive.
+
+    Entries are served by the path and query of their url, ignoring the
+    host. Use `url_for` to find the local url for an archived url. Entries
+    can be added or replaced while the server is running.
+
+    .. code-block:: python
+
+        with ArchiveServer(archive) as server:
+            requests.get(server.url_for("https://example.org/toolinfo.json"))
+    """
+
+    daemon_threads = True
+
+    def __init__(self, archive, host="127.0.0.1", port=0):
+        """Initialize instance."""
+        super().__init__((host, port), ArchiveRequestHandler)
+        self.archive = archive
+        self._index = (None, {})
+        self._thread = None
+
+    @staticmethod
+    def path_for(url):
+        """Get the request path used for a url."""
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path = "{}?{}".format(path, parts.query)
+        return path
+
+    def url_for(self, url):
+        """Get the local url serving an archived url."""
+        host, port = self.server_address[:2]
+        return "http://{}:{}{}".format(host, port, self.path_for(url))
+
+    def by_path(self):
+        """Map request paths to archive entries."""
+        version, index = self._index
+        if version != self.archive.version:
+            version, entries = self.archive.snapshot()
+            index = {self.path_for(entry["url"]): entry for entry in entries}
+            self._index = (version, index)
+        return index
+
+    def __enter__(self):
+        self._thread = threading.Thread(
+            target=self.serve_forever,
+            name="archive-server",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self._thread.join()
+        self.server_close()
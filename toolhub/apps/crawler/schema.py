@@ -0,0 +1,51 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+from django.utils.translation import gettext_lazy as _
+
+
+TIMINGS = {
+    "description": _("Milliseconds spent in each phase of crawling a url"),
+    "type": "object",
+    "properties": {
+        "connect": {
+            "description": _("Connecting and waiting for response headers"),
+            "type": "integer",
+        },
+        "download": {
+            "description": _("Reading the response body"),
+            "type": "integer",
+        },
+        "parse": {
+            "description": _("Decoding JSON from the response body"),
+            "type": "integer",
+        },
+        "validate": {
+            "description": _("Checking toolinfo records"),
+            "type": "integer",
+        },
+        "upsert": {
+            "description": _("Creating and updating tools"),
+            "type": "integer",
+        },
+        "delete": {
+            "description": _("Deleting tools no longer listed"),
+            "type": "integer",
+        },
+    },
+    "additionalProperties": False,
+}
@@ -38,7 +38,16 @@ class UrlSerializer(ModelSerializer):
         """Configure serializer."""
 
         model = Url
-        fields = ["id", "url", "created_by", "created_date"]
+        fields = [
+            "id",
+            "url",
+            "created_by",
+            "created_date",
+            "next_crawl",
+            "crawl_interval",
+            "consecutive_failures",
+            "last_changed",
+        ]
 
 
 @doc(_("""A URL to crawl"""))
@@ -69,6 +78,7 @@ class RunUrlSerializer(ModelSerializer):
             "status_code",
             "redirected",
             "elapsed_ms",
+            "timings",
             "schema",
             "valid",
             "logs",
@@ -93,5 +103,7 @@ class RunSerializer(ModelSerializer):
             "new_tools",
             "updated_tools",
             "total_tools",
+            "unchanged_urls",
+            "scope",
         ]
         read_only_fields = fields
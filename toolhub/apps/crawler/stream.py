@@ -0,0 +1,167 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import codecs
+import json
+
+
+class LimitExceeded(Exception):
+    """A streamed document exceeded a configured limit."""
+
+
+def limit_bytes(chunks, max_bytes):
+    """Pass through chunks of bytes until more than max_bytes have been seen.
+
+    :raises LimitExceeded: if the limit is exceeded
+    """
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+        if total > max_bytes:
+            raise LimitExceeded(
+                "Response is larger than {} bytes".format(max_bytes)
+            )
+        yield chunk
+
+
+class JSONRecordStream:
+    """Incrementally decode the records in a JSON document.
+
+    Iterating over an instance yields each member of a top level array as
+    soon as it has been read from the underlying stream of bytes. Any other
+    top level value is yielded as a single record. Invalid input raises
+    a ValueError, possibly after some records have been yielded.
+
+    When `multiple` is true the document may hold a sequence of whitespace
+    separated top level values, as in newline delimited JSON (NDJSON).
+    """
+
+    WHITESPACE = " \t\n\r"
+    DELIMITERS = WHITESPACE + ",]}"
+
+    def __init__(self, chunks, multiple=False):
+        """Initialize instance.
+
+        :param chunks: Iterable of UTF-8 encoded bytes
+        :param multiple: Allow more than one top level value
+        """
+        self.multiple = multiple
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self):
+        yield from self._top_level()
+        while self.multiple and self._peek() != "":
+            yield from self._top_level()
+        if self._peek() != "":
+            raise self._error("Extra data")
+
+    def _top_level(self):
+        """Yield the records of the next top level value."""
+        if self._peek() != "[":
+            yield self._decode_value()
+        else:
+            self._pos += 1
+            if self._peek() == "]":
+                self._pos += 1
+            else:
+                while True:
+                    yield self._decode_value()
+                    delim = self._peek()
+                    self._pos += 1
+                    if delim == "]":
+                        break
+                    if delim != ",":
+                        raise self._error("Expecting ',' delimiter")
+
+    def _error(self, msg):
+        """Build an error for the current position."""
+        return json.JSONDecodeError(msg, self._buf, self._pos)
+
+    def _read(self):
+        """Read more input into the buffer.
+
+        Reads at least as much text as is currently pending so that
+        repeatedly retrying to decode a large value stays cheap.
+
+        :returns: False if there was no more input to read
+        """
+        if self._eof:
+            return False
+        pos = self._pos
+        pending = len(self._buf) - pos
+        parts = [self._buf[pos:]]
+        read = 0
+        while read <= pending:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                parts.append(self._text.decode(b"", final=True))
+                self._eof = True
+                break
+            text = self._text.decode(chunk)
+            parts.append(text)
+            read += len(text)
+        self._buf = "".join(parts)
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Skip whitespace and return the next character, or "" at EOF."""
+        while True:
+            while (
+                self._pos < len(self._buf)
+                and self._buf[self._pos] in self.WHITESPACE
+            ):
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._read():
+                return ""
+
+    def _decode_value(self):
+        """Decode the next complete JSON value."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._read():
+                    continue
+                raise
+            if self._maybe_truncated(value, end) and self._read():
+                continue
+            self._pos = end
+            return value
+
+    def _maybe_truncated(self, value, end):
+        """Could more input extend a value decoded from the buffer?
+
+        Numbers are the only values without a closing character, so one
+        that is not followed by a delimiter may have been split across
+        chunks. For example "12." and "5" decode to 12 if the first chunk
+        is decoded alone.
+        """
+        if end == len(self._buf):
+            return True
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            return False
+        return self._buf[end] not in self.DELIMITERS
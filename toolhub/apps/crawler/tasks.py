@@ -15,64 +15,414 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import datetime
+import hashlib
+import itertools
 import json
 import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 
-from django.core.exceptions import ValidationError
+from django.conf import settings
 from django.db import Error
+from django.db import connection
+from django.db import connections
+from django.db.models import F
+from django.db.models import Max
+from django.db.models import Q
+from django.db.models.functions import Mod
 from django.utils import timezone
 
 import requests
 
 from toolhub.apps.auditlog.context import auditlog_context
+from toolhub.apps.search.queue import index_queue
+from toolhub.apps.toolinfo import schema
 from toolhub.apps.toolinfo.models import Tool
+from toolhub.http import make_session
 
-from .logging import CaptureCrawlLogs
+from . import metrics
+from .logging import RingBuffer
+from .logging import capture_context_logs
+from .logging import log_to_buffer
 from .models import Run
 from .models import RunUrl
 from .models import Url
+from .stream import JSONRecordStream
+from .stream import LimitExceeded
+from .stream import limit_bytes
 
 
 logger = logging.getLogger(__name__)
 
+# Run fields that are incremented while processing urls
+RUN_COUNTERS = ("new_tools", "updated_tools", "total_tools", "unchanged_urls")
+
+# Crawler used by a worker process of a multi-process crawl
+_worker = None
+
+
+def _init_worker(crawler):
+    """Initialize a worker process of a multi-process crawl."""
+    global _worker  # noqa: W0603
+    _worker = crawler
+
+
+def _fetch_batch(run_urls):
+    """Call Crawler.fetch_batch() in a worker process."""
+    return _worker.fetch_batch(run_urls)
+
+
+def _process_batch(fetched, seen, last_run_tools):
+    """Call Crawler.process_batch() in a worker process."""
+    return _worker.process_batch(fetched, seen, last_run_tools)
+
 
 class Crawler:
     """Toolinfo URL crawler."""
 
-    def __init__(self):
-        """Initialize a new instance."""
+    def __init__(self, concurrency=None, processes=None):
+        """Initialize a new instance.
+
+        :param concurrency: Maximum number of URLs to fetch in parallel.
+            Defaults to ``settings.CRAWLER_CONCURRENCY``.
+        :param processes: Number of worker processes to crawl with.
+            Defaults to ``settings.CRAWLER_PROCESSES``.
+        """
         self.user_agent = (
             "Toolhub/1.0 ("
             "https://meta.wikimedia.org/wiki/Toolhub; "
             "toolhub.crawler@toolforge.org)"
         )
+        if concurrency is None:
+            concurrency = settings.CRAWLER_CONCURRENCY
+        self.concurrency = max(1, concurrency)
+        if processes is None:
+            processes = settings.CRAWLER_PROCESSES
+        self.processes = max(1, processes)
+        # Shared by all fetch threads so connections to a host are reused
+        self.session = make_session(user_agent=self.user_agent)
 
-    def crawl(self):  # noqa: R0912
-        """Crawl all URLs and create/update tool records."""
-        logger.info("Starting crawl")
-        run = Run()
-        run.save()
-        names_seen_in_run = {}
+    def crawl(  # noqa: R0913
+        self, shard=None, urls=None, created_by=None, since=None, force=False
+    ):
+        """Crawl URLs and create/update tool records.
 
-        for url in self.get_active_urls():
-            # FIXME: rate limiting for outbound requests?
-            run_url = RunUrl(run=run, url=url)
-            with CaptureCrawlLogs(run_url):
-                self.process_url(run_url, names_seen_in_run)
+        All URLs that are due are crawled by default. A partial run can be
+        requested by providing any of the selection arguments. Runs do not
+        import or delete tools that were found by the most recent crawl of
+        a URL outside of the run.
 
-        run.end_date = timezone.now()
+        :param shard: (index, count) tuple. Only crawl URLs where
+            ``id % count == index - 1``.
+        :param urls: Only crawl URLs with these url values
+        :param created_by: Only crawl URLs created by this user
+        :param since: Only crawl URLs created on or after this datetime
+        :param force: Crawl selected URLs even if they are not due
+        """
+        scope = self.describe_scope(shard, urls, created_by, since, force)
+        logger.info("Starting crawl %s", scope or "of all urls")
+        run = Run(scope=scope)
         run.save()
+
+        try:
+            active = self.get_active_urls(shard, urls, created_by, since)
+            if not force:
+                active = active.filter(
+                    Q(next_crawl__isnull=True)
+                    | Q(next_crawl__lte=run.start_date)
+                )
+            run_urls = [RunUrl(run=run, url=url) for url in active]
+            last_run_tools = self.toolinfo_in_last_run(active.values("pk"))
+            # Treat tools from urls outside of this run as already seen
+            names_seen_in_run = self.toolinfo_claimed_elsewhere(
+                active.values("pk")
+            )
+            if self.processes > 1:
+                crawled = self.crawl_in_processes(
+                    run, run_urls, names_seen_in_run, last_run_tools
+                )
+            else:
+                crawled = self.crawl_in_threads(
+                    run_urls, names_seen_in_run, last_run_tools
+                )
+
+            for run_url, log_buffer in crawled:
+                metrics.observe_url(run_url)
+                run_url.logs = log_buffer.getvalue()
+            RunUrl.objects.bulk_update(
+                [run_url for run_url, _ in crawled],
+                ["logs", "timings"],
+                batch_size=100,
+            )
+
+            run.end_date = timezone.now()
+            run.save()
+            metrics.export()
+        finally:
+            # Changes queued for the search index would otherwise wait for
+            # the end of a request, which never comes outside of the web
+            # server.
+            index_queue.flush()
         return run
 
-    def process_url(self, run_url, seen):
-        """Crawl a URL and update the run."""
-        logger.info("Crawling %s", run_url.url.url)
-        expected_names = self.toolinfo_in_last_run(run_url.url)
-        toolinfo_list = self.fetch_content(run_url)
+    def crawl_in_threads(self, run_urls, seen, last_run_tools):
+        """Crawl urls using a pool of fetch threads.
+
+        :param run_urls: RunUrls to crawl, ordered by Url id
+        :param seen: Map of toolinfo names to the url they were found at in
+            this run
+        :param last_run_tools: Map of Url id to the toolinfo names found in
+            its most recent run
+        :returns: list of (RunUrl, RingBuffer) tuples
+        """
+        log_buffers = [
+            RingBuffer(settings.CRAWLER_MAX_LOG_SIZE) for _ in run_urls
+        ]
+        # Fetch urls in parallel, but process the results one at a time in
+        # the order that they were returned by get_active_urls(). All
+        # database writes happen on this thread which keeps upserts and the
+        # duplicate name checks deterministic.
+        # FIXME: rate limiting for outbound requests?
+        with capture_context_logs(), ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix="crawler",
+        ) as pool:
+            results = pool.map(self.fetch_url, run_urls, log_buffers)
+            for run_url, log_buffer, toolinfo_list in zip(
+                run_urls, log_buffers, results
+            ):
+                with log_to_buffer(log_buffer):
+                    self.process_url(
+                        run_url,
+                        seen,
+                        toolinfo_list,
+                        set(last_run_tools.get(run_url.url_id, ())),
+                    )
+        return list(zip(run_urls, log_buffers))
+
+    def crawl_in_processes(self, run, run_urls, seen, last_run_tools):
+        """Crawl urls in batches using a pool of worker processes.
+
+        The workers do the fetching, decoding, validation and database work
+        for their batches. This happens in two rounds to keep the results
+        the same as those of a single process crawl. Once all urls have
+        been fetched, each toolinfo name is given to the url with the lowest
+        id that lists it (T278065). The workers then process their batches
+        using those assignments. Counters from the workers are added to the
+        run.
+
+        :param run: Run being crawled
+        :param run_urls: RunUrls to crawl, ordered by Url id
+        :param seen: Map of toolinfo names to the url they were found at in
+            this run
+        :param last_run_tools: Map of Url id to the toolinfo names found in
+            its most recent run
+        :returns: list of (RunUrl, RingBuffer) tuples
+        """
+        size = settings.CRAWLER_BATCH_SIZE
+        batches = []
+        for start in range(0, len(run_urls), size):
+            end = start + size
+            batches.append(run_urls[start:end])
+        if not batches:
+            return []
+
+        with self.process_pool() as pool:
+            fetched = list(pool.map(_fetch_batch, batches))
+            for run_url, _, _, names in itertools.chain(*fetched):
+                if names is None:
+                    names = sorted(last_run_tools.get(run_url.url_id, ()))
+                for name in names:
+                    seen.setdefault(name, run_url.url.url)
+            results = list(
+                pool.map(
+                    _process_batch,
+                    fetched,
+                    itertools.repeat(seen),
+                    itertools.repeat(last_run_tools),
+                )
+            )
+
+        crawled = []
+        for batch, run_counts, counters in results:
+            crawled.extend(batch)
+            for field, count in run_counts.items():
+                setattr(run, field, getattr(run, field) + count)
+            metrics.add_counter_values(counters)
+        return crawled
+
+    def process_pool(self):
+        """Start a pool of worker processes.
+
+        Workers are forked from the current process. Database connections
+        are closed first so that each worker opens its own.
+        """
+        if connection.in_atomic_block:
+            raise RuntimeError(
+                "A multi-process crawl can not be run inside a transaction"
+            )
+        connections.close_all()
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+            initargs=(self,),
+        )
+
+    def fetch_batch(self, run_urls):
+        """Fetch a batch of urls and find the toolinfo names they list.
+
+        Called in a worker process. Does not write to the database.
+
+        :param run_urls: RunUrls to fetch
+        :returns: list of (RunUrl, RingBuffer, toolinfo records, names)
+            tuples. See claimed_names() for the meaning of names.
+        """
+        log_buffers = [
+            RingBuffer(settings.CRAWLER_MAX_LOG_SIZE) for _ in run_urls
+        ]
+        with capture_context_logs(), ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix="crawler",
+        ) as pool:
+            results = list(pool.map(self.fetch_url, run_urls, log_buffers))
+        return [
+            (
+                run_url,
+                log_buffer,
+                toolinfo_list,
+                self.claimed_names(run_url, toolinfo_list),
+            )
+            for run_url, log_buffer, toolinfo_list in zip(
+                run_urls, log_buffers, results
+            )
+        ]
+
+    def process_batch(self, fetched, seen, last_run_tools):
+        """Process a batch of fetched urls.
+
+        Called in a worker process.
+
+        :param fetched: Results of fetch_batch()
+        :param seen: Map of every toolinfo name listed in the run to the
+            url that it belongs to
+        :param last_run_tools: Map of Url id to the toolinfo names found in
+            its most recent run
+        :returns: (list of (RunUrl, RingBuffer) tuples, changes to the run's
+            counters, changes to metrics.counter_values())
+        """
+        run = fetched[0][0].run
+        run_before = {field: getattr(run, field) for field in RUN_COUNTERS}
+        counters_before = metrics.counter_values()
+        crawled = []
+        with capture_context_logs():
+            for run_url, log_buffer, toolinfo_list, _ in fetched:
+                run_url.run = run
+                with log_to_buffer(log_buffer):
+                    self.process_url(
+                        run_url,
+                        seen,
+                        toolinfo_list,
+                        set(last_run_tools.get(run_url.url_id, ())),
+                    )
+                crawled.append((run_url, log_buffer))
+        # Send search index updates queued while processing the batch
+        index_queue.flush()
+        run_counts = {
+            field: getattr(run, field) - count
+            for field, count in run_before.items()
+        }
+        counters = {
+            key: value - counters_before.get(key, 0)
+            for key, value in metrics.counter_values().items()
+        }
+        return crawled, run_counts, counters
+
+    def fetch_url(self, run_url, log_buffer):
+        """Fetch a URL and capture the logs emitted while doing so.
+
+        This method does not use the database and is safe to call from
+        a worker thread.
+
+        :param run_url: RunUrl to fetch
+        :param log_buffer: RingBuffer to collect logs in
+        :returns: toolinfo records as returned by fetch_content()
+        """
+        with log_to_buffer(log_buffer):
+            return self.fetch_content(run_url)
+
+    def process_url(self, run_url, seen, toolinfo_list, expected_names):
+        """Update the run with the toolinfo records fetched from a URL.
+
+        :param run_url: RunUrl to record results in
+        :param seen: Map of toolinfo names to the url they were found at in
+            this run
+        :param toolinfo_list: Toolinfo records returned by fetch_content(),
+            or None if reading the content was aborted.
+        :param expected_names: Set of toolinfo names found in the most
+            recent run of the url. Names that are not found again are
+            removed from the set.
+        """
         run_url.save()
+        # Records rejected below also clear the valid flag, so remember
+        # whether the response itself was read and parsed in full.
+        fetched = run_url.valid
+
+        if toolinfo_list is None or self.fetch_failed(run_url):
+            # We do not know what the content holds. Keep the tools from the
+            # last run rather than treating them all as removed. The next
+            # run may find the content unchanged and carry them forward
+            # again from this run.
+            with metrics.timed(run_url, "upsert"):
+                self.carry_forward_tools(run_url, expected_names, seen)
+            self.update_cache_validators(run_url)
+            self.update_schedule(run_url, changed=False, fetched=fetched)
+            return
 
+        if self.is_unchanged(run_url):
+            # Content is unchanged since our last crawl. Carry the tools
+            # found in the last run forward without reprocessing them.
+            run_url.run.unchanged_urls += 1
+            with metrics.timed(run_url, "upsert"):
+                self.carry_forward_tools(run_url, expected_names, seen)
+            self.update_cache_validators(run_url)
+            self.update_schedule(run_url, changed=False, fetched=fetched)
+            return
+
+        with metrics.timed(run_url, "validate"):
+            batch = self.check_toolinfo(run_url, toolinfo_list, seen)
+        metrics.count_records("seen", len(toolinfo_list))
+
+        if batch:
+            with metrics.timed(run_url, "upsert"):
+                self.upsert_toolinfo(run_url, batch, expected_names)
+
+        # Tools that were found at another url are not missing. They may
+        # have moved, or belong to a url outside of a partial run.
+        expected_names.difference_update(seen)
+        if len(expected_names) > 0:
+            logger.info(
+                "Expected but did not find toolinfo: %s", expected_names
+            )
+            with metrics.timed(run_url, "delete"):
+                self.delete_missing_tools(run_url, expected_names)
+
+        self.update_cache_validators(run_url)
+        self.update_schedule(run_url, changed=True, fetched=fetched)
+
+    def check_toolinfo(self, run_url, toolinfo_list, seen):
+        """Select the valid records at a url which are not seen elsewhere.
+
+        :returns: list of records to upsert
+        """
+        batch = []
+        accepted = set()
         for toolinfo in toolinfo_list:
             if not self.validate_toolinfo(toolinfo):
+                metrics.count_records("rejected")
                 if run_url.valid:
                     # Mark URL as invalid if any of it's contained tools is
                     # invalid in this run.
@@ -89,119 +439,372 @@ class Crawler:
             # T294055: normalize name before seen checks
             toolinfo["name"] = Tool.objects.normalize_name(toolinfo["name"])
 
-            if toolinfo["name"] in seen:
+            owner = seen.setdefault(toolinfo["name"], run_url.url.url)
+            if owner != run_url.url.url or toolinfo["name"] in accepted:
                 # T278065: Reject updates from multiple urls in same run
                 logger.error(
                     "Toolinfo %s already seen at %s",
                     toolinfo["name"],
-                    seen[toolinfo["name"]],
+                    owner,
                 )
-                expected_names.discard(toolinfo["name"])
+                metrics.count_records("duplicate")
                 continue
-            seen[toolinfo["name"]] = run_url.url.url
-
-            try:
-                obj, created, updated = Tool.objects.from_toolinfo(
-                    toolinfo,
-                    run_url.url.created_by,
-                    Tool.ORIGIN_CRAWLER,
-                    "Import from {}".format(run_url.url.url),
-                )
-                if created:
-                    run_url.run.new_tools += 1
-                if updated:
-                    run_url.run.updated_tools += 1
-                run_url.run.total_tools += 1
-                run_url.tools.add(obj)
-                expected_names.discard(obj.name)
-
-            except (
-                Error,
-                ValidationError,
+            accepted.add(toolinfo["name"])
+            batch.append(toolinfo)
+        return batch
+
+    def delete_missing_tools(self, run_url, names):
+        """Delete tools which are no longer listed at a url."""
+        # T271128: delete missing tools
+        reason = "Toolinfo removed from {}"
+        if run_url.status_code == 404:
+            reason = "Url {} not found during crawl"
+        try:
+            with auditlog_context(
+                run_url.url.created_by, reason.format(run_url.url.url)
             ):
-                logger.exception(
-                    "Failed to upsert `%s` from %s",
-                    toolinfo["name"],
+                Tool.objects.bulk_soft_delete(name__in=names)
+        except Error:
+            logger.exception("Failed to delete missing tools: %s", names)
+
+    def upsert_toolinfo(self, run_url, records, expected_names):
+        """Create or update tools from the records found at a url."""
+        names = [record["name"] for record in records]
+        results = Tool.objects.from_toolinfo_many(
+            records,
+            run_url.url.created_by,
+            Tool.ORIGIN_CRAWLER,
+            "Import from {}".format(run_url.url.url),
+        )
+        found = []
+        for name, (obj, created, updated, error) in zip(names, results):
+            if error is not None:
+                logger.error(
+                    "Failed to upsert `%s` from %s: %s",
+                    name,
                     run_url.url.url,
+                    error,
                 )
                 run_url.valid = False
-                run_url.save()
+                metrics.count_records("rejected")
+                continue
+            if created:
+                run_url.run.new_tools += 1
+                metrics.count_records("created")
+            elif updated:
+                run_url.run.updated_tools += 1
+                metrics.count_records("updated")
+            else:
+                metrics.count_records("unchanged")
+            run_url.run.total_tools += 1
+            found.append(obj)
+            expected_names.discard(obj.name)
 
-        if len(expected_names) > 0:
+        run_url.tools.add(*found)
+        if not run_url.valid:
+            run_url.save()
+
+    def is_unchanged(self, run_url):
+        """Is the content of a url unchanged since it was last processed?"""
+        if not self.content_unchanged(run_url):
+            return False
+        if run_url.status_code == 304:
+            logger.info("Content not modified since last crawl")
+        else:
             logger.info(
-                "Expected but did not find toolinfo: %s", expected_names
+                "Content digest %s unchanged since last crawl",
+                run_url.content_hash,
             )
-            if 200 <= run_url.status_code <= 299 or run_url.status_code == 404:
-                # T271128: delete missing tools
-                reason = "Toolinfo removed from {}"
-                if run_url.status_code == 404:
-                    reason = "Url {} not found during crawl"
-                try:
-                    with auditlog_context(
-                        run_url.url.created_by, reason.format(run_url.url.url)
-                    ):
-                        Tool.objects.filter(name__in=expected_names).delete()
-                except Error:
-                    logger.exception(
-                        "Failed to delete missing tools: %s", expected_names
-                    )
+        return True
+
+    def content_unchanged(self, run_url):
+        """Like is_unchanged(), but without logging."""
+        if run_url.status_code == 304:
+            return True
+        digest = run_url.content_hash
+        return bool(digest and digest == run_url.url.content_hash)
+
+    def fetch_failed(self, run_url):
+        """Did fetching a url fail without telling us what it holds?
+
+        Timeouts, connection errors, and error responses other than 404 say
+        nothing about the content at a url.
+        """
+        status = run_url.status_code
+        return not (200 <= status <= 299 or status in (304, 404))
+
+    def claimed_names(self, run_url, toolinfo_list):
+        """Find the toolinfo names that processing a url will claim.
+
+        Makes the same checks as process_url(), but without logging or
+        database access.
+
+        :returns: list of normalized names, or None if the url will keep the
+            tools found in its most recent run
+        """
+        if (
+            toolinfo_list is None
+            or self.fetch_failed(run_url)
+            or self.content_unchanged(run_url)
+        ):
+            return None
+        return [
+            Tool.objects.normalize_name(toolinfo["name"])
+            for toolinfo in toolinfo_list
+            if not self.toolinfo_errors(
+                toolinfo, self.schema_version(toolinfo)
+            )
+        ]
+
+    def carry_forward_tools(self, run_url, names, seen):
+        """Associate tools found in a prior run with a run url."""
+        carried = set()
+        for name in sorted(names):
+            owner = seen.setdefault(name, run_url.url.url)
+            if owner != run_url.url.url:
+                # T278065: Reject updates from multiple urls in same run
+                logger.error("Toolinfo %s already seen at %s", name, owner)
+                continue
+            carried.add(name)
+
+        logger.info(
+            "Keeping %d toolinfo records from last run",
+            len(carried),
+        )
+        tools = list(Tool.objects.filter(name__in=carried))
+        run_url.tools.add(*tools)
+        run_url.run.total_tools += len(tools)
+        metrics.count_records("unchanged", len(tools))
+
+    def update_cache_validators(self, run_url):
+        """Remember how to detect unchanged content when next crawling a url.
+
+        The cache validators and content digest are only kept for responses
+        which were processed successfully. Content that needs to be
+        processed again is never treated as unchanged.
+        """
+        url = run_url.url
+        status = run_url.status_code
+        values = {"etag": None, "last_modified": None, "content_hash": None}
+        if 200 <= status <= 299 and run_url.valid:
+            values = {field: getattr(run_url, field) for field in values}
+        elif not (200 <= status <= 299 or status == 404):
+            # Leave things as they are on 304s, timeouts, and server errors
+            return
+
+        if any(getattr(url, k) != v for k, v in values.items()):
+            for field, value in values.items():
+                setattr(url, field, value)
+            # Use a queryset update to avoid auditlog signals
+            Url.objects.filter(pk=url.pk).update(**values)
+
+    def update_schedule(self, run_url, changed, fetched):
+        """Decide when a url should next be crawled.
+
+        Failed fetches are retried with exponential backoff. Otherwise the
+        revisit interval is halved when the content has changed and grown
+        by half when it has not, within the configured bounds.
+
+        :param run_url: RunUrl that was processed
+        :param changed: True if the content changed since the last crawl
+        :param fetched: True if the response was a 304 or its body was
+            read and parsed in full. Reads which were aborted by a size or
+            record limit, or which failed to parse, count as failures.
+        """
+        url = run_url.url
+        status = run_url.status_code
+        start = run_url.run.start_date
+        min_interval = settings.CRAWLER_MIN_INTERVAL
+        interval = url.crawl_interval or min_interval
+
+        if fetched and (200 <= status <= 299 or status == 304):
+            url.consecutive_failures = 0
+            if changed:
+                interval = max(min_interval, interval // 2)
+                url.last_changed = start
+            else:
+                interval = min(
+                    settings.CRAWLER_MAX_INTERVAL, interval * 3 // 2
+                )
+            delay = interval
+        else:
+            url.consecutive_failures += 1
+            delay = min(
+                settings.CRAWLER_MAX_BACKOFF,
+                interval * 2 ** min(url.consecutive_failures, 32),
+            )
+        url.crawl_interval = interval
+        # Schedule from the start of the run so that a url is due again
+        # when a periodic crawl with the same interval starts.
+        url.next_crawl = start + datetime.timedelta(seconds=delay)
+        if url.consecutive_failures:
+            logger.info(
+                "Backing off after %d failures; next crawl at %s",
+                url.consecutive_failures,
+                url.next_crawl.isoformat(),
+            )
+
+        # Use a queryset update to avoid auditlog signals
+        Url.objects.filter(pk=url.pk).update(
+            next_crawl=url.next_crawl,
+            crawl_interval=url.crawl_interval,
+            consecutive_failures=url.consecutive_failures,
+            last_changed=url.last_changed,
+        )
+
+    def toolinfo_in_last_run(self, urls):
+        """Find the toolinfo records in the most recent run of each url.
 
-    def toolinfo_in_last_run(self, url):
-        """Find the toolinfo records in the most recent run for a url."""
-        expected = set()
-        last_run = url.crawler_runs.order_by("-id").first()
-        if last_run:
-            qs = last_run.tools.filter(deleted__isnull=True).distinct()
-            expected.update(qs.values_list("name", flat=True))
+        :param urls: Urls or Url primary keys to look up. A queryset is
+            used as a subquery.
+        :returns: Map of Url primary key to the set of toolinfo names found
+            in its most recent run. Urls without tools are omitted.
+        :rtype: dict
+        """
+        latest = self._latest_run_urls(RunUrl.objects.filter(url__in=urls))
+        qs = RunUrl.tools.through.objects.filter(
+            runurl__in=latest,
+            tool__deleted__isnull=True,
+        ).values_list("runurl__url_id", "tool__name")
+        expected = {}
+        for url_id, name in qs:
+            expected.setdefault(url_id, set()).add(name)
         return expected
 
+    def toolinfo_claimed_elsewhere(self, urls):
+        """Find the toolinfo records in the most recent run of other urls.
+
+        :param urls: Urls or Url primary keys to exclude. A queryset is
+            used as a subquery.
+        :returns: Map of toolinfo name to the url it was last found at
+        :rtype: dict
+        """
+        latest = self._latest_run_urls(RunUrl.objects.exclude(url__in=urls))
+        qs = RunUrl.tools.through.objects.filter(
+            runurl__in=latest,
+            tool__deleted__isnull=True,
+        ).values_list("tool__name", "runurl__url__url")
+        return dict(qs.order_by("-runurl__url__id"))
+
+    def _latest_run_urls(self, qs):
+        """Subquery selecting the most recent RunUrl id of each url in qs."""
+        return qs.values("url").annotate(latest=Max("id")).values("latest")
+
     def validate_toolinfo(self, toolinfo):
-        """Determine if a record is valid."""
-        is_valid = True
-        # FIXME: do a more complete job of validating the record
-        for field in ["name", "title", "description", "url"]:
-            if field not in toolinfo or not toolinfo[field]:
-                logger.error(
-                    "Toolinfo record %s missing %s.",
-                    toolinfo.get("name", ""),
-                    field,
-                )
-                is_valid = False
-        return is_valid
+        """Determine if a record is valid.
+
+        Records are validated against the toolinfo schema version named by
+        their ``$schema`` property.
+        """
+        version = self.schema_version(toolinfo)
+        start = time.monotonic()
+        errors = self.toolinfo_errors(toolinfo, version)
+        metrics.count_validation(version, time.monotonic() - start)
+        for error in errors:
+            logger.error(
+                "Toolinfo record %s is not valid %s: %s",
+                toolinfo.get("name", "") if isinstance(toolinfo, dict) else "",
+                version,
+                error,
+            )
+        return not errors
+
+    def schema_version(self, toolinfo):
+        """Get the schema version to validate a record against."""
+        return schema.record_version(toolinfo)
+
+    def toolinfo_errors(self, toolinfo, version):
+        """List the problems with a record without logging them."""
+        return schema.toolinfo_errors(toolinfo, version)
+
+    def content_digest(self, content):
+        """Compute a digest of parsed JSON content.
+
+        The content is serialized in a canonical form before hashing so that
+        formatting and key order changes do not change the digest.
+        """
+        return hashlib.sha256(self._canonical_json(content)).hexdigest()
+
+    def _canonical_json(self, content):
+        """Serialize parsed JSON content to canonical UTF-8 bytes."""
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            sort_keys=True,
+        ).encode("utf-8")
+
+    def describe_scope(  # noqa: R0913
+        self, shard=None, urls=None, created_by=None, since=None, force=False
+    ):
+        """Describe the URLs selected for a partial run.
+
+        :returns: description or None if all URLs are selected
+        """
+        scope = []
+        if shard:
+            scope.append("shard={}/{}".format(*shard))
+        if urls:
+            scope.extend("url={}".format(url) for url in urls)
+        if created_by:
+            scope.append("created_by={}".format(created_by))
+        if since:
+            scope.append("since={}".format(since.isoformat()))
+        if force:
+            scope.append("force")
+        return " ".join(scope) or None
 
-    def get_active_urls(self):
-        """Get all URLs ready for crawling."""
-        # FIXME: filter out "failed" urls?
-        return Url.objects.all()
+    def get_active_urls(
+        self, shard=None, urls=None, created_by=None, since=None
+    ):
+        """Get the URLs selected for crawling, whether they are due or not.
+
+        See crawl() for a description of the arguments.
+        """
+        qs = Url.objects.all()
+        if shard:
+            index, count = shard
+            qs = qs.annotate(shard=Mod(F("id"), count)).filter(shard=index - 1)
+        if urls:
+            qs = qs.filter(url__in=urls)
+        if created_by:
+            qs = qs.filter(created_by=created_by)
+        if since:
+            qs = qs.filter(created_date__gte=since)
+        return qs.order_by("id")
 
     def fetch_content(self, url):
-        """Crawl a URL and return it's content."""
+        """Crawl a URL and return it's content.
+
+        The response body is read and decoded incrementally. Reading stops
+        as soon as the body exceeds ``settings.CRAWLER_MAX_BYTES`` or holds
+        more than ``settings.CRAWLER_MAX_RECORDS`` toolinfo records.
+
+        :returns: list of toolinfo records or None if reading was aborted
+        """
         raw_url = url.url.url
+        logger.info("Crawling %s", raw_url)
         url.status_code = 999
+        headers = {}
+        if url.url.etag:
+            headers["if-none-match"] = url.url.etag
+        if url.url.last_modified:
+            headers["if-modified-since"] = url.url.last_modified
         try:
-            r = requests.get(
+            start = time.monotonic()
+            r = self.session.get(
                 raw_url,
-                headers={"user-agent": self.user_agent},
+                headers=headers,
                 # T288536: 5s connect, 13s read (time between bytes)
                 timeout=(5, 13),
+                stream=True,
             )
-
-            url.status_code = r.status_code
-            if r.history:
-                url.redirected = True
-            url.elapsed_ms = r.elapsed.microseconds
-            if r.ok:
-                try:
-                    tools = r.json()
-                    # FIXME: validate schema for entire file?
-                    url.valid = True
-                    if not isinstance(tools, list):
-                        tools = [tools]
-                    return tools
-                except json.decoder.JSONDecodeError:
-                    logger.exception("Failed to parse JSON from %s", raw_url)
-                    url.valid = False
-                    return []
+            # Time until the response headers were read, including retries
+            elapsed = time.monotonic() - start
+            url.elapsed_ms = int(elapsed * 1000)
+            metrics.add_time(url, "connect", elapsed)
+            with r:
+                return self._read_response(url, r)
 
         except requests.ConnectTimeout:
             logger.exception("Timeout connecting to %s", raw_url)
@@ -217,3 +820,81 @@ class Crawler:
 
         logger.error("Failed to fetch %s: %s", url.url, r)
         return []
+
+    def _read_response(self, url, r):
+        """Record the response to a fetch and read toolinfo from it's body."""
+        url.status_code = r.status_code
+        if r.history:
+            url.redirected = True
+        url.etag = r.headers.get("etag")
+        url.last_modified = r.headers.get("last-modified")
+        if r.status_code == 304:
+            # A 304 response is only possible when we sent validators
+            # for content that was successfully processed last time.
+            url.etag = url.etag or url.url.etag
+            url.last_modified = url.last_modified or url.url.last_modified
+            url.content_hash = url.url.content_hash
+            url.valid = True
+            return []
+        if not r.ok:
+            logger.error("Failed to fetch %s: %s", url.url, r)
+            return []
+
+        start = time.monotonic()
+        download = metrics.Stopwatch()
+        try:
+            return self._read_records(url, r, download)
+        finally:
+            metrics.add_time(url, "download", download.seconds)
+            metrics.add_time(
+                url, "parse", time.monotonic() - start - download.seconds
+            )
+
+    def _read_records(self, url, r, download):
+        """Read toolinfo records from the body of a response."""
+        raw_url = url.url.url
+        max_bytes = settings.CRAWLER_MAX_BYTES
+        max_records = settings.CRAWLER_MAX_RECORDS
+        tools = []
+        # Digest the records as they are read. The result is the same as
+        # content_digest(tools) without serializing the whole list at once.
+        digest = hashlib.sha256(b"[")
+        try:
+            if int(r.headers.get("content-length") or 0) > max_bytes:
+                raise LimitExceeded(
+                    "Response is larger than {} bytes".format(max_bytes)
+                )
+            # iter_content() decodes any gzip, deflate, or br content
+            # encoding, so the byte limit applies to the decoded body.
+            chunks = limit_bytes(
+                download.wrap(r.iter_content(chunk_size=65536)), max_bytes
+            )
+            for toolinfo in JSONRecordStream(chunks):
+                if len(tools) == max_records:
+                    raise LimitExceeded(
+                        "Response has more than {} records".format(max_records)
+                    )
+                if tools:
+                    digest.update(b",")
+                digest.update(self._canonical_json(toolinfo))
+                tools.append(toolinfo)
+        except LimitExceeded as e:
+            reason = str(e)
+            logger.error("Aborted reading %s: %s", raw_url, reason)
+            url.valid = False
+            return None
+        except requests.RequestException:
+            # The connection failed after the headers were received. The
+            # body is incomplete, so we do not know what it holds.
+            logger.exception("Error reading response body from %s", raw_url)
+            url.valid = False
+            return None
+        except ValueError:
+            logger.exception("Failed to parse JSON from %s", raw_url)
+            url.valid = False
+            return []
+
+        digest.update(b"]")
+        url.valid = True
+        url.content_hash = digest.hexdigest()
+        return tools
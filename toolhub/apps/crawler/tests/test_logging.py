@@ -16,10 +16,14 @@
 # You should have received a copy of the GNU General Public License
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
 import logging
+import threading
 
 from django.test import SimpleTestCase
 
 from ..logging import LogCaptureContext
+from ..logging import RingBuffer
+from ..logging import capture_context_logs
+from ..logging import log_to_buffer
 
 
 class LogCaptureContextTest(SimpleTestCase):
@@ -40,3 +44,84 @@ class LogCaptureContextTest(SimpleTestCase):
         self.assertEqual(2, len(log_lines))
         self.assertIn("3. should be captured", log_lines[0])
         self.assertIn("4. should be captured", log_lines[1])
+
+
+class RingBufferTest(SimpleTestCase):
+    """Test RingBuffer."""
+
+    def test_keeps_recent_lines(self):
+        """Assert the oldest lines are dropped with a marker."""
+        buf = RingBuffer(max_size=12)
+        for line in ("one", "two", "three", "four"):
+            buf.append(line)
+        self.assertEqual(
+            buf.getvalue(), "[2 earlier lines truncated]\nthree\nfour\n"
+        )
+
+    def test_under_limit(self):
+        """Assert nothing is dropped when under the limit."""
+        buf = RingBuffer(max_size=100)
+        buf.append("one")
+        self.assertEqual(buf.getvalue(), "one\n")
+
+    def test_long_line(self):
+        """Assert a single line longer than the limit is clipped."""
+        buf = RingBuffer(max_size=8)
+        buf.append("one")
+        buf.append("abcdefghij")
+        self.assertEqual(
+            buf.getvalue(), "[1 earlier lines truncated]\n...ghij\n"
+        )
+        self.assertEqual(buf.size, 8)
+
+        buf = RingBuffer(max_size=8)
+        buf.append("1234567")
+        self.assertEqual(buf.getvalue(), "1234567\n")
+
+
+class ContextLogsTest(SimpleTestCase):
+    """Test capture_context_logs and log_to_buffer."""
+
+    def setUp(self):
+        """Initialize common test conditions."""
+        self.logger = logging.getLogger("toolhub.test_context_logs")
+        self.logger.setLevel(logging.DEBUG)
+
+    def test_capture(self):
+        """Assert logs go to the buffer of the emitting context."""
+        buffers = [RingBuffer(1024) for _ in range(4)]
+        barrier = threading.Barrier(len(buffers))
+
+        def work(i, buf):
+            with log_to_buffer(buf):
+                barrier.wait()
+                self.logger.info("message %d", i)
+                self.logger.debug("debug %d", i)
+
+        with capture_context_logs():
+            self.logger.info("outside of any buffer")
+            logging.getLogger("other").warning("not toolhub")
+            threads = [
+                threading.Thread(target=work, args=(i, buf))
+                for i, buf in enumerate(buffers)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.logger.info("after capture ended")
+
+        for i, buf in enumerate(buffers):
+            self.assertEqual(buf.getvalue(), "INFO: message {}\n".format(i))
+
+    def test_nested(self):
+        """Assert the outer buffer is restored after a nested block."""
+        outer = RingBuffer(1024)
+        inner = RingBuffer(1024)
+        with capture_context_logs():
+            with log_to_buffer(outer):
+                with log_to_buffer(inner):
+                    self.logger.warning("inner")
+                self.logger.warning("outer")
+        self.assertEqual(inner.getvalue(), "WARNING: inner\n")
+        self.assertEqual(outer.getvalue(), "WARNING: outer\n")
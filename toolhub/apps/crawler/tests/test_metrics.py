@@ -0,0 +1,131 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.test import override_settings
+
+from .. import metrics
+from ..models import RunUrl
+from ..models import Url
+
+
+class MetricsTest(SimpleTestCase):
+    """Test crawler metrics helpers."""
+
+    def sample(self, name, **labels):
+        """Get the current value of a sample from the crawler registry."""
+        return metrics.registry.get_sample_value(name, labels) or 0
+
+    def test_timed(self):
+        """Time spent in a phase is accumulated in milliseconds."""
+        run_url = RunUrl(url=Url(url="https://example.org/toolinfo.json"))
+        clock = iter([1.0, 1.25, 2.0, 2.5])
+        with mock.patch.object(metrics.time, "monotonic", lambda: next(clock)):
+            for _ in range(2):
+                with metrics.timed(run_url, "upsert"):
+                    pass
+        self.assertEqual(run_url.timings, {"upsert": 750})
+
+    def test_stopwatch(self):
+        """Time spent waiting on an iterator is measured."""
+        clock = iter([1.0, 1.5, 2.0, 3.0, 5.0, 5.25])
+        watch = metrics.Stopwatch()
+        with mock.patch.object(metrics.time, "monotonic", lambda: next(clock)):
+            self.assertEqual(list(watch.wrap("ab")), ["a", "b"])
+        self.assertEqual(watch.seconds, 1.75)
+
+    def test_observe_url(self):
+        """Phase timings are rounded and observed per host."""
+        run_url = RunUrl(url=Url(url="https://example.org/toolinfo.json"))
+        run_url.timings = {"parse": 12.6, "connect": 250.2}
+        before = self.sample(
+            "toolhub_crawler_phase_seconds_count",
+            phase="connect",
+            host="example.org",
+        )
+        metrics.observe_url(run_url)
+        self.assertEqual(run_url.timings, {"connect": 250, "parse": 13})
+        self.assertEqual(list(run_url.timings), ["connect", "parse"])
+        after = self.sample(
+            "toolhub_crawler_phase_seconds_count",
+            phase="connect",
+            host="example.org",
+        )
+        self.assertEqual(after, before + 1)
+
+    def test_count_records(self):
+        """Record results are counted."""
+        before = self.sample("toolhub_crawler_records_total", result="seen")
+        metrics.count_records("seen", 3)
+        after = self.sample("toolhub_crawler_records_total", result="seen")
+        self.assertEqual(after, before + 3)
+
+    def test_counter_values(self):
+        """Counter changes can be carried to another registry."""
+        before = metrics.counter_values()
+        metrics.count_validation("1.2.0", 0.5)
+        metrics.count_records("rejected", 2)
+        changes = {
+            key: value - before.get(key, 0)
+            for key, value in metrics.counter_values().items()
+        }
+        self.assertEqual(
+            changes[
+                ("toolhub_crawler_validate_seconds", (("version", "1.2.0"),))
+            ],
+            0.5,
+        )
+        self.assertEqual(
+            changes[("toolhub_crawler_records", (("result", "rejected"),))],
+            2,
+        )
+
+        metrics.add_counter_values(changes)
+        self.assertEqual(
+            self.sample(
+                "toolhub_crawler_validated_records_total", version="1.2.0"
+            ),
+            before.get(
+                ("toolhub_crawler_validated_records", (("version", "1.2.0"),)),
+                0,
+            )
+            + 2,
+        )
+
+    def test_export_textfile(self):
+        """Metrics are written to the configured textfile."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "crawler.prom")
+            with override_settings(CRAWLER_METRICS_TEXTFILE=path):
+                metrics.export()
+            with open(path) as f:
+                text = f.read()
+        self.assertIn('toolhub_crawler_records_total{result="rejected"}', text)
+
+    @override_settings(CRAWLER_METRICS_PUSHGATEWAY="localhost:9091")
+    def test_export_pushgateway_failure(self):
+        """A failed push is logged rather than raised."""
+        with mock.patch.object(
+            metrics, "push_to_gateway", side_effect=OSError("refused")
+        ) as push:
+            with self.assertLogs(metrics.logger, "ERROR"):
+                metrics.export()
+        push.assert_called_once()
@@ -0,0 +1,144 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+
+import requests
+
+import requests_mock
+
+from toolhub.apps.toolinfo.models import Tool
+from toolhub.apps.user.models import ToolhubUser
+
+from .. import tasks
+from ..models import Url
+from ..replay import Archive
+from ..replay import ArchiveServer
+from ..replay import record_session
+from ..replay import replay_session
+
+
+class ArchiveTest(TestCase):
+    """Test recording and replaying responses."""
+
+    def setUp(self):
+        """Initialize common test conditions."""
+        self.user = ToolhubUser.objects.create(
+            username="tester",
+            email="tester@example.org",
+        )
+        self.toolinfo = {
+            "name": "replayed-tool",
+            "title": "Replayed tool",
+            "description": "A tool served from an archive",
+            "url": "https://example.org/replayed-tool",
+        }
+        self.url = "https://example.org/toolinfo.json"
+        self.body = json.dumps([self.toolinfo]).encode("utf-8")
+
+    def test_record_and_load(self):
+        """Responses are recorded and survive a save/load round trip."""
+        archive = Archive()
+        session = record_session(requests.Session(), archive)
+        with requests_mock.Mocker() as rmock:
+            rmock.get(
+                self.url,
+                content=self.body,
+                headers={"ETag": '"v1"', "Content-Length": "999"},
+            )
+            session.get(self.url)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "archive.jsonl")
+            archive.save(path)
+            loaded = Archive.load(path)
+
+        entry = loaded.get(self.url)
+        self.assertEqual(entry["status"], 200)
+        self.assertEqual(entry["body"], self.body)
+        self.assertEqual(entry["headers"], {"ETag": '"v1"'})
+
+    def test_replay_crawl(self):
+        """The crawler can be fed from an archive."""
+        Url.objects.create(url=self.url, created_by=self.user)
+        archive = Archive()
+        archive.add(self.url, 200, body=self.body)
+
+        crawler = tasks.Crawler()
+        replay_session(crawler.session, archive)
+        run = crawler.crawl()
+        self.assertEqual(run.new_tools, 1)
+        self.assertTrue(Tool.objects.filter(name="replayed-tool").exists())
+
+    def test_replay_unknown_url(self):
+        """Urls missing from the archive are not found."""
+        session = replay_session(requests.Session(), Archive())
+        r = session.get(self.url)
+        self.assertEqual(r.status_code, 404)
+
+    def test_server(self):
+        """Archived responses are served over HTTP by path."""
+        archive = Archive()
+        archive.add(self.url, 200, body=self.body)
+        with ArchiveServer(archive) as server:
+            local = server.url_for(self.url)
+            self.assertTrue(local.endswith("/toolinfo.json"))
+            r = requests.get(local)
+            self.assertEqual(r.json(), [self.toolinfo])
+
+            archive.add(self.url, 410)
+            self.assertEqual(requests.get(local).status_code, 410)
+            missing = server.url_for("https://example.org/missing.json")
+            self.assertEqual(requests.get(missing).status_code, 404)
+
+    def test_benchmark(self):
+        """The benchmark command runs and leaves no data behind."""
+        out = io.StringIO()
+        call_command(
+            "crawl_benchmark",
+            urls=2,
+            records=3,
+            runs=2,
+            transport="archive",
+            stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn("q/record", lines[0])
+        self.assertFalse(Url.objects.exists())
+        self.assertFalse(Tool.objects.exists())
+
+    def test_benchmark_single_process(self):
+        """The benchmark crawls in one process whatever the settings say."""
+        out = io.StringIO()
+        with self.settings(CRAWLER_PROCESSES=2):
+            call_command(
+                "crawl_benchmark",
+                urls=2,
+                records=1,
+                runs=1,
+                transport="archive",
+                stdout=out,
+            )
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+        self.assertFalse(Url.objects.exists())
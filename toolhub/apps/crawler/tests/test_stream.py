@@ -0,0 +1,135 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import json
+
+from django.test import SimpleTestCase
+
+from ..stream import JSONRecordStream
+from ..stream import LimitExceeded
+from ..stream import limit_bytes
+
+
+def chunked(text, size):
+    """Split text into chunks of UTF-8 encoded bytes."""
+    data = text.encode("utf-8")
+    chunks = []
+    for start in range(0, len(data), size):
+        end = start + size
+        chunks.append(data[start:end])
+    return chunks
+
+
+class JSONRecordStreamTest(SimpleTestCase):
+    """Test JSONRecordStream."""
+
+    records = [
+        {"name": "a", "title": "Ünïcödé", "n": [1, 2.5, None, True]},
+        {"name": "b", "nested": {"list": [{"x": "]"}, "[,{"]}},
+        12345,
+        "string",
+    ]
+
+    def test_array(self):
+        """Assert array members are yielded one at a time."""
+        text = json.dumps(self.records, ensure_ascii=False, indent=2)
+        for size in (1, 2, 7, 64, len(text) * 4):
+            with self.subTest(size=size):
+                stream = JSONRecordStream(chunked(text, size))
+                self.assertEqual(list(stream), self.records)
+
+    def test_chunk_boundaries(self):
+        """Assert values split across chunks anywhere are decoded."""
+        text = (
+            '[{"a":1},{"b":[1,2,3]}, 12, 3.5e10, -0.25E-3, "x", true, '
+            "null, 1234567890]"
+        )
+        expect = json.loads(text)
+        for size in range(1, len(text) + 1):
+            with self.subTest(size=size):
+                stream = JSONRecordStream(chunked(text, size))
+                self.assertEqual(list(stream), expect)
+        stream = JSONRecordStream(chunked("12\n3.5\n-1e5", 2), multiple=True)
+        self.assertEqual(list(stream), [12, 3.5, -1e5])
+
+    def test_lazy(self):
+        """Assert records are available before the input is exhausted."""
+
+        def chunks():
+            yield b'[{"name": "a"}, '
+            raise AssertionError("read too far")
+
+        stream = iter(JSONRecordStream(chunks()))
+        self.assertEqual(next(stream), {"name": "a"})
+
+    def test_single_value(self):
+        """Assert a non-array document is yielded as one record."""
+        stream = JSONRecordStream(chunked(' {"name": "a"} \n', 3))
+        self.assertEqual(list(stream), [{"name": "a"}])
+
+    def test_empty_array(self):
+        """Assert an empty array yields nothing."""
+        self.assertEqual(list(JSONRecordStream([b" [ ", b" ] "])), [])
+
+    def test_bom(self):
+        """Assert a leading UTF-8 byte order mark is ignored."""
+        stream = JSONRecordStream([b"\xef\xbb\xbf[1]"])
+        self.assertEqual(list(stream), [1])
+
+    def test_invalid(self):
+        """Assert invalid documents raise ValueError."""
+        for text in (
+            "",
+            "<html>",
+            "[1, 2",
+            "[1 2]",
+            "[1,]",
+            "[1] x",
+            '{"name": "a"',
+        ):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    list(JSONRecordStream(chunked(text, 2)))
+
+    def test_multiple(self):
+        """Assert a sequence of top level values is allowed if requested."""
+        text = "\n".join(json.dumps(record) for record in self.records)
+        for size in (1, 5, len(text)):
+            with self.subTest(size=size):
+                stream = JSONRecordStream(chunked(text, size), multiple=True)
+                self.assertEqual(list(stream), self.records)
+        stream = JSONRecordStream([b'[1, 2]\n{"name": "a"}\n'], multiple=True)
+        self.assertEqual(list(stream), [1, 2, {"name": "a"}])
+        with self.assertRaises(ValueError):
+            list(JSONRecordStream([b"1\n2"]))
+
+    def test_invalid_utf8(self):
+        """Assert undecodable bytes raise ValueError."""
+        with self.assertRaises(ValueError):
+            list(JSONRecordStream([b'["\xff"]']))
+
+
+class LimitBytesTest(SimpleTestCase):
+    """Test limit_bytes."""
+
+    def test_limit(self):
+        """Assert reading stops once the limit is exceeded."""
+        chunks = limit_bytes([b"abc", b"def", b"ghi"], 6)
+        self.assertEqual(next(chunks), b"abc")
+        self.assertEqual(next(chunks), b"def")
+        with self.assertRaises(LimitExceeded):
+            next(chunks)
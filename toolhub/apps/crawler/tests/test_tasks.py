@@ -15,12 +15,24 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import datetime
+import gzip
+import io
+import itertools
+import json
 import os
+import pickle
+from unittest import mock
 
 from django.test import TestCase
+from django.test import override_settings
+
+import requests
 
 import requests_mock
 
+from toolhub.apps.search.documents import ToolDocument
+from toolhub.apps.search.queue import index_queue
 from toolhub.apps.toolinfo.models import Tool
 from toolhub.apps.user.models import ToolhubUser
 
@@ -28,7 +40,50 @@ from .. import tasks
 from ..models import Url
 
 
+class BrokenBody(io.BytesIO):
+    """Response body whose connection breaks after the given bytes."""
+
+    def read(self, *args, **kwargs):
+        """Read bytes, failing once the buffer is exhausted."""
+        data = super().read(*args, **kwargs)
+        if not data:
+            raise requests.exceptions.ChunkedEncodingError("Connection broken")
+        return data
+
+
+class InlineProcessPool:
+    """Stand in for a pool of crawler worker processes.
+
+    Tasks run in the calling thread, so they share the test database, but
+    in reverse order. Arguments and results are pickled as they would be
+    when sent to a worker process.
+    """
+
+    def __init__(self, crawler):
+        """Initialize instance."""
+        self.crawler = crawler
+
+    def __enter__(self):
+        """Enter context."""
+        tasks._init_worker(self.crawler)
+        return self
+
+    def __exit__(self, *args):
+        """Exit context."""
+        tasks._init_worker(None)
+
+    def map(self, fn, *iterables):  # noqa: A003
+        """Run fn for each set of arguments, last ones first."""
+        results = [
+            pickle.loads(pickle.dumps(fn(*pickle.loads(pickle.dumps(args)))))
+            for args in reversed(list(zip(*iterables)))
+        ]
+        return reversed(results)
+
+
 @requests_mock.Mocker()
+# Make every url due again on the next run unless a test says otherwise
+@override_settings(CRAWLER_MIN_INTERVAL=0)
 class CrawlerTestCase(TestCase):
     """Test the crawler."""
 
@@ -175,6 +230,42 @@ class CrawlerTestCase(TestCase):
         self.assertRunResult(run, new=0, urls=1)
         self.assertUrlStatus(run.urls.all()[0], valid=False)
 
+    def test_schema_validation(self, rmock):
+        """Records are validated against the schema they name."""
+        self.setup_url_fixture(
+            rmock,
+            json=[
+                {
+                    **self.v0_single,
+                    "name": "valid",
+                    "$schema": "/toolinfo/1.2.0-draft02",
+                    "for_wikis": ["*"],
+                },
+                {
+                    **self.v0_single,
+                    "name": "bad-wikis",
+                    "$schema": "/toolinfo/1.2.0-draft02",
+                    "for_wikis": 5,
+                },
+                {**self.v0_single, "name": "bad-author", "author": ["Hay"]},
+                {**self.v0_single, "name": "empty", "title": ""},
+            ],
+        )
+        run = tasks.Crawler().crawl()
+
+        self.assertRunResult(run, new=1, urls=1)
+        run_url = run.urls.all()[0]
+        self.assertUrlStatus(run_url, valid=False)
+        self.assertToolsInUrl(run_url, ["valid"])
+        self.assertIn(
+            "bad-wikis is not valid 1.2.0: /for_wikis:", run_url.logs
+        )
+        self.assertIn(
+            "bad-author is not valid 1.0.0: /author: ['Hay'] is not of type",
+            run_url.logs,
+        )
+        self.assertIn("empty is not valid 1.0.0: /title:", run_url.logs)
+
     def test_delete_on_subsequent_run(self, rmock):
         """When a toolinfo is removed, we notice and remove the Tool."""
         self.setup_url_fixture(rmock, fixture="crawler_missing_run_1.json")
@@ -250,3 +341,549 @@ class CrawlerTestCase(TestCase):
             self.v0_single["author"],
             Tool.objects.get(name=self.v0_single["name"]).author,
         )
+
+    def test_concurrent_fetch(self, rmock):
+        """When fetching in parallel, results are processed in url order."""
+        for i in range(5):
+            record = self.v0_single.copy()
+            record["author"] = "Author {}".format(i)
+            self.setup_url_fixture(
+                rmock,
+                url="http://example.org/{}.json".format(i),
+                json=[record],
+            )
+
+        missing = self.setup_url_fixture(
+            rmock, url="http://example.org/missing.json", status_code=404
+        )
+
+        crawler = tasks.Crawler(concurrency=4)
+        run = crawler.crawl()
+
+        self.assertRunResult(run, new=1, urls=6)
+        self.assertEqual(
+            "Author 0",
+            Tool.objects.get(name=self.v0_single["name"]).author,
+        )
+        for run_url in run.urls.exclude(url=missing):
+            self.assertUrlStatus(run_url)
+        # Logs emitted by the fetching thread are captured
+        run_url = run.urls.get(url=missing)
+        self.assertUrlStatus(run_url, status_code=404, valid=False)
+        self.assertIn("Failed to fetch", run_url.logs)
+
+    def test_not_modified(self, rmock):
+        """When content is unchanged, tools are carried forward."""
+        url = self.setup_url_fixture(
+            rmock,
+            fixture="crawler_missing_run_1.json",
+            headers={
+                "ETag": '"v1"',
+                "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+            },
+        )
+        crawler = tasks.Crawler()
+        run = crawler.crawl()
+        self.assertRunResult(run, new=3, urls=1)
+        url.refresh_from_db()
+        self.assertEqual(url.etag, '"v1"')
+
+        self.setup_url_response(rmock, status_code=304)
+        run = crawler.crawl()
+        headers = rmock.last_request.headers
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+        self.assertEqual(
+            headers["If-Modified-Since"], "Wed, 21 Oct 2015 07:28:00 GMT"
+        )
+        self.assertRunResult(run, new=0, urls=1)
+        self.assertEqual(run.total_tools, 3)
+        self.assertEqual(run.unchanged_urls, 1)
+        run_url = run.urls.all()[0]
+        self.assertUrlStatus(run_url, status_code=304)
+        self.assertEqual(run_url.etag, '"v1"')
+        self.assertToolsInUrl(
+            run_url,
+            ["test-delete-1", "test-delete-2", "test-delete-3"],
+        )
+
+    def test_not_modified_after_failure(self, rmock):
+        """Tools kept through a failed fetch are carried forward on 304."""
+        self.setup_url_fixture(
+            rmock,
+            fixture="crawler_missing_run_1.json",
+            headers={"ETag": '"v1"'},
+        )
+        crawler = tasks.Crawler()
+        run = crawler.crawl()
+        self.assertRunResult(run, new=3, urls=1)
+
+        self.setup_url_response(rmock, status_code=503)
+        run = crawler.crawl(force=True)
+        self.assertEqual(run.total_tools, 3)
+        self.assertToolsInUrl(
+            run.urls.all()[0],
+            ["test-delete-1", "test-delete-2", "test-delete-3"],
+        )
+
+        self.setup_url_response(rmock, status_code=304)
+        run = crawler.crawl(force=True)
+        self.assertEqual(run.unchanged_urls, 1)
+        self.assertEqual(run.total_tools, 3)
+        self.assertToolsInUrl(
+            run.urls.all()[0],
+            ["test-delete-1", "test-delete-2", "test-delete-3"],
+        )
+
+        self.setup_url_response(rmock, fixture="crawler_missing_run_2.json")
+        run = crawler.crawl(force=True)
+        self.assertToolsInUrl(
+            run.urls.all()[0], ["test-delete-1", "test-delete-3"]
+        )
+        self.assertFalse(Tool.objects.filter(name="test-delete-2").exists())
+
+    def test_invalid_content_not_cached(self, rmock):
+        """When content is invalid, validators are not remembered."""
+        url = self.setup_url_fixture(
+            rmock,
+            json={"invalid": True},
+            headers={"ETag": '"v1"'},
+        )
+        crawler = tasks.Crawler()
+        crawler.crawl()
+        url.refresh_from_db()
+        self.assertIsNone(url.etag)
+        crawler.crawl()
+        self.assertNotIn("If-None-Match", rmock.last_request.headers)
+
+    def test_unchanged_content(self, rmock):
+        """When the content digest is unchanged, records are not upserted."""
+        self.setup_url_fixture(rmock, fixture="crawler_missing_run_1.json")
+        crawler = tasks.Crawler()
+        run = crawler.crawl()
+        self.assertRunResult(run, new=3, urls=1)
+        self.assertEqual(run.unchanged_urls, 0)
+
+        with mock.patch.object(Tool.objects, "from_toolinfo") as upsert:
+            run = crawler.crawl()
+            upsert.assert_not_called()
+        self.assertRunResult(run, new=0, urls=1)
+        self.assertEqual(run.unchanged_urls, 1)
+        self.assertEqual(run.total_tools, 3)
+        self.assertUrlStatus(run.urls.all()[0])
+        self.assertToolsInUrl(
+            run.urls.all()[0],
+            ["test-delete-1", "test-delete-2", "test-delete-3"],
+        )
+
+    def test_unchanged_content_after_failure(self, rmock):
+        """Tools kept through a failed fetch are carried forward on match."""
+        self.setup_url_fixture(rmock, fixture="crawler_missing_run_1.json")
+        crawler = tasks.Crawler()
+        run = crawler.crawl()
+        self.assertRunResult(run, new=3, urls=1)
+
+        self.setup_url_response(rmock, status_code=503)
+        run = crawler.crawl(force=True)
+        self.assertEqual(run.total_tools, 3)
+
+        self.setup_url_response(rmock, fixture="crawler_missing_run_1.json")
+        run = crawler.crawl(force=True)
+        self.assertEqual(run.unchanged_urls, 1)
+        self.assertEqual(run.total_tools, 3)
+        self.assertToolsInUrl(
+            run.urls.all()[0],
+            ["test-delete-1", "test-delete-2", "test-delete-3"],
+        )
+
+        self.setup_url_response(rmock, fixture="crawler_missing_run_2.json")
+        run = crawler.crawl(force=True)
+        self.assertToolsInUrl(
+            run.urls.all()[0], ["test-delete-1", "test-delete-3"]
+        )
+        self.assertFalse(Tool.objects.filter(name="test-delete-2").exists())
+
+    def test_streamed_digest(self, rmock):
+        """The digest of streamed content matches content_digest()."""
+        url = self.setup_url_fixture(
+            rmock, fixture="crawler_missing_run_1.json"
+        )
+        crawler = tasks.Crawler()
+        run = crawler.crawl()
+        self.assertRunResult(run, new=3, urls=1)
+
+        fpath = os.path.join(self.work_dir, "crawler_missing_run_1.json")
+        with open(fpath, "r") as f:
+            expect = crawler.content_digest(json.load(f))
+        url.refresh_from_db()
+        self.assertEqual(url.content_hash, expect)
+
+    def test_max_bytes(self, rmock):
+        """When content is too large, existing tools are kept."""
+        self.setup_url_fixture(rmock, fixture="crawler_missing_run_1.json")
+        crawler = tasks.Crawler()
+        run = crawler.crawl()
+        self.assertRunResult(run, new=3, urls=1)
+
+        self.setup_url_response(rmock, fixture="crawler_missing_run_2.json")
+        with self.settings(CRAWLER_MAX_BYTES=32):
+            run = crawler.crawl()
+        self.assertRunResult(run, new=0, urls=1)
+        run_url = run.urls.all()[0]
+        self.assertUrlStatus(run_url, valid=False)
+        self.assertIn("larger than 32 bytes", run_url.logs)
+        self.assertToolsInUrl(
+            run_url,
+            ["test-delete-1", "test-delete-2", "test-delete-3"],
+        )
+        self.assertEqual(Tool.objects.count(), 3)
+        # An aborted read is a failed fetch
+        self.assertEqual(run_url.url.consecutive_failures, 1)
+
+    def test_read_error(self, rmock):
+        """When the connection fails mid-body, existing tools are kept."""
+        self.setup_url_fixture(rmock, fixture="crawler_missing_run_1.json")
+        crawler = tasks.Crawler()
+        run = crawler.crawl()
+        self.assertRunResult(run, new=3, urls=1)
+
+        fpath = os.path.join(self.work_dir, "crawler_missing_run_2.json")
+        with open(fpath, "rb") as f:
+            content = f.read()
+        half = len(content) // 2
+        body = BrokenBody(content[:half])
+        self.setup_url_response(rmock, body=body)
+        run = crawler.crawl(force=True)
+        run_url = run.urls.all()[0]
+        self.assertUrlStatus(run_url, valid=False)
+        self.assertIn("Error reading response body", run_url.logs)
+        self.assertToolsInUrl(
+            run_url,
+            ["test-delete-1", "test-delete-2", "test-delete-3"],
+        )
+        self.assertEqual(Tool.objects.count(), 3)
+        self.assertEqual(run_url.url.consecutive_failures, 1)
+
+    def test_max_records(self, rmock):
+        """When content has too many records, nothing is imported."""
+        self.setup_url_fixture(rmock, fixture="crawler_missing_run_1.json")
+        crawler = tasks.Crawler()
+        with self.settings(CRAWLER_MAX_RECORDS=2):
+            run = crawler.crawl()
+        self.assertRunResult(run, new=0, urls=1)
+        run_url = run.urls.all()[0]
+        self.assertUrlStatus(run_url, valid=False)
+        self.assertIn("more than 2 records", run_url.logs)
+
+    def test_compressed(self, rmock):
+        """When content is gzip encoded, it is decoded."""
+        fpath = os.path.join(self.work_dir, "crawler_missing_run_1.json")
+        with open(fpath, "rb") as f:
+            content = gzip.compress(f.read())
+        self.setup_url_fixture(
+            rmock,
+            content=content,
+            headers={"Content-Encoding": "gzip"},
+        )
+        crawler = tasks.Crawler()
+        run = crawler.crawl()
+        self.assertRunResult(run, new=3, urls=1)
+        self.assertUrlStatus(run.urls.all()[0])
+
+    def test_shard(self, rmock):
+        """When crawling a shard, only the shard's urls are fetched."""
+        urls = [
+            self.setup_url_fixture(
+                rmock,
+                url="http://example.org/{}.json".format(i),
+                json={**self.v0_single, "name": "tool-{}".format(i)},
+            )
+            for i in range(4)
+        ]
+        crawler = tasks.Crawler()
+        crawled = set()
+        for index in (1, 2):
+            run = crawler.crawl(shard=(index, 2))
+            self.assertEqual(run.scope, "shard={}/2".format(index))
+            ids = set(run.urls.values_list("url_id", flat=True))
+            self.assertEqual(len(ids), 2)
+            self.assertFalse(ids & crawled)
+            crawled |= ids
+        self.assertEqual(crawled, {url.id for url in urls})
+        self.assertEqual(Tool.objects.count(), 4)
+
+    def test_partial_run_respects_other_urls(self, rmock):
+        """A partial run does not take over or delete other urls' tools."""
+        first = self.setup_url_fixture(
+            rmock,
+            url="http://example.org/1.json",
+            json=[
+                {**self.v0_single, "name": "shared"},
+                {**self.v0_single, "name": "moved"},
+            ],
+        )
+        self.setup_url_fixture(
+            rmock,
+            url="http://example.org/2.json",
+            json={**self.v0_single, "name": "other"},
+        )
+        crawler = tasks.Crawler()
+        run = crawler.crawl()
+        self.assertRunResult(run, new=3, urls=2)
+
+        self.setup_url_response(
+            rmock,
+            url="http://example.org/2.json",
+            json=[
+                {**self.v0_single, "name": "shared", "title": "Hijacked"},
+                {**self.v0_single, "name": "moved"},
+            ],
+        )
+        run = crawler.crawl(urls=["http://example.org/2.json"])
+        self.assertEqual(run.scope, "url=http://example.org/2.json")
+        self.assertRunResult(run, new=0, urls=1)
+        run_url = run.urls.all()[0]
+        self.assertToolsInUrl(run_url, [])
+        self.assertNotEqual(Tool.objects.get(name="shared").title, "Hijacked")
+        # "other" was removed from url 2 and is deleted
+        self.assertFalse(Tool.objects.filter(name="other").exists())
+
+        run = crawler.crawl(urls=[first.url])
+        self.assertToolsInUrl(run.urls.all()[0], ["shared", "moved"])
+        self.assertEqual(Tool.objects.count(), 2)
+
+    def test_toolinfo_in_last_run(self, rmock):
+        """Tools from the previous run of every url load in one query."""
+        urls = []
+        for i in range(3):
+            urls.append(
+                self.setup_url_fixture(
+                    rmock,
+                    url="http://example.org/{}.json".format(i),
+                    json=[
+                        {**self.v0_single, "name": "t{}-a".format(i)},
+                        {**self.v0_single, "name": "t{}-b".format(i)},
+                    ],
+                )
+            )
+        crawler = tasks.Crawler()
+        crawler.crawl()
+        self.setup_url_response(
+            rmock,
+            url=urls[1].url,
+            json={**self.v0_single, "name": "t1-a"},
+        )
+        crawler.crawl()
+
+        with self.assertNumQueries(1):
+            found = crawler.toolinfo_in_last_run(Url.objects.values("pk"))
+        self.assertEqual(
+            found,
+            {
+                urls[0].pk: {"t0-a", "t0-b"},
+                urls[1].pk: {"t1-a"},
+                urls[2].pk: {"t2-a", "t2-b"},
+            },
+        )
+
+    def inline_process_pool(self):
+        """Patch the crawler to use an InlineProcessPool."""
+        return mock.patch.object(
+            tasks.Crawler, "process_pool", lambda self: InlineProcessPool(self)
+        )
+
+    @override_settings(CRAWLER_BATCH_SIZE=1)
+    def test_processes(self, rmock):
+        """The lowest url id wins in a multi-process crawl."""
+        first = self.setup_url_fixture(
+            rmock,
+            url="http://example.org/1.json",
+            json=[
+                {**self.v0_single, "name": "first"},
+                {**self.v0_single, "name": "shared"},
+            ],
+        )
+        second = self.setup_url_fixture(
+            rmock,
+            url="http://example.org/2.json",
+            json=[
+                {**self.v0_single, "name": "shared", "title": "Hijacked"},
+                {**self.v0_single, "name": "second"},
+            ],
+        )
+        crawler = tasks.Crawler(processes=2)
+        with self.inline_process_pool():
+            run = crawler.crawl()
+        self.assertRunResult(run, new=3, urls=2)
+        self.assertEqual(run.total_tools, 3)
+        run_urls = {run_url.url_id: run_url for run_url in run.urls.all()}
+        self.assertToolsInUrl(run_urls[first.pk], ["first", "shared"])
+        self.assertToolsInUrl(run_urls[second.pk], ["second"])
+        self.assertIn(
+            "Toolinfo shared already seen at http://example.org/1.json",
+            run_urls[second.pk].logs,
+        )
+        self.assertIn("upsert", run_urls[second.pk].timings)
+        self.assertNotEqual(Tool.objects.get(name="shared").title, "Hijacked")
+
+        # The tool moves to the second url when the first drops it
+        self.setup_url_response(
+            rmock, url=first.url, json={**self.v0_single, "name": "first"}
+        )
+        self.setup_url_response(
+            rmock,
+            url=second.url,
+            json=[
+                {**self.v0_single, "name": "second"},
+                {**self.v0_single, "name": "shared", "title": "Moved"},
+            ],
+        )
+        with self.inline_process_pool():
+            run = crawler.crawl()
+        run_urls = {run_url.url_id: run_url for run_url in run.urls.all()}
+        self.assertToolsInUrl(run_urls[first.pk], ["first"])
+        self.assertToolsInUrl(run_urls[second.pk], ["shared", "second"])
+        self.assertEqual(Tool.objects.get(name="shared").title, "Moved")
+
+    @override_settings(ELASTICSEARCH_DSL_AUTOSYNC=True)
+    @override_settings(ELASTICSEARCH_DSL_DEFERRED=True)
+    def test_deferred_index_flushed(self, rmock):
+        """A serial crawl sends its queued search index changes."""
+        self.setup_url_fixture(rmock, json=[self.v0_single])
+
+        with mock.patch(
+            "django.db.transaction.on_commit", lambda func: func()
+        ), mock.patch.object(ToolDocument, "update") as update:
+            tasks.Crawler(processes=1).crawl()
+
+        self.assertEqual(len(index_queue), 0)
+        indexed = [
+            instance.name
+            for call in update.call_args_list
+            for instance in call[0][0]
+        ]
+        self.assertEqual(indexed, [self.v0_single["name"]])
+
+    def test_processes_outside_transaction(self, rmock):
+        """Worker processes can not see uncommitted data."""
+        with self.assertRaises(RuntimeError):
+            tasks.Crawler(processes=2).process_pool()
+
+    def test_moved_tool_not_deleted(self, rmock):
+        """When a tool moves to an earlier url, it is not deleted."""
+        self.setup_url_fixture(
+            rmock,
+            url="http://example.org/1.json",
+            json={**self.v0_single, "name": "one"},
+        )
+        self.setup_url_fixture(
+            rmock,
+            url="http://example.org/2.json",
+            json={**self.v0_single, "name": "moved"},
+        )
+        crawler = tasks.Crawler()
+        run = crawler.crawl()
+        self.assertRunResult(run, new=2, urls=2)
+
+        self.setup_url_response(
+            rmock,
+            url="http://example.org/1.json",
+            json=[
+                {**self.v0_single, "name": "one"},
+                {**self.v0_single, "name": "moved"},
+            ],
+        )
+        self.setup_url_response(
+            rmock, url="http://example.org/2.json", json=[]
+        )
+        run = crawler.crawl()
+        self.assertIsNone(run.scope)
+        self.assertTrue(Tool.objects.filter(name="moved").exists())
+
+    @override_settings(
+        CRAWLER_MIN_INTERVAL=3600,
+        CRAWLER_MAX_INTERVAL=4 * 3600,
+        CRAWLER_MAX_BACKOFF=6 * 3600,
+    )
+    def test_schedule(self, rmock):
+        """Urls are only crawled when due, with adaptive intervals."""
+        url = self.setup_url_fixture(rmock, json=self.v0_single)
+        crawler = tasks.Crawler()
+        run = crawler.crawl()
+        self.assertRunResult(run, new=1, urls=1)
+        url.refresh_from_db()
+        self.assertEqual(url.consecutive_failures, 0)
+        self.assertEqual(url.crawl_interval, 3600)
+        self.assertEqual(url.last_changed, run.start_date)
+        self.assertEqual(
+            url.next_crawl, run.start_date + datetime.timedelta(hours=1)
+        )
+
+        # Not due yet
+        run = crawler.crawl()
+        self.assertRunResult(run, new=0, urls=0)
+
+        # Unchanged content is revisited less often
+        Url.objects.update(next_crawl=None)
+        run = crawler.crawl()
+        self.assertEqual(run.unchanged_urls, 1)
+        url.refresh_from_db()
+        self.assertEqual(url.crawl_interval, 5400)
+
+        # Failures back off exponentially up to a limit
+        self.setup_url_response(rmock, status_code=500)
+        for failures, delay in ((1, 3), (2, 6), (3, 6)):
+            run = crawler.crawl(force=True)
+            self.assertEqual(run.scope, "force")
+            url.refresh_from_db()
+            self.assertEqual(url.consecutive_failures, failures)
+            self.assertEqual(
+                url.next_crawl,
+                run.start_date + datetime.timedelta(hours=delay),
+            )
+
+        # Success resets the failure count; changed content shortens the
+        # interval
+        self.setup_url_response(
+            rmock, json={**self.v0_single, "title": "Changed"}
+        )
+        run = crawler.crawl(force=True)
+        self.assertEqual(run.updated_tools, 1)
+        url.refresh_from_db()
+        self.assertEqual(url.consecutive_failures, 0)
+        self.assertEqual(url.crawl_interval, 3600)
+
+    def test_elapsed_ms(self, rmock):
+        """Elapsed time is recorded in whole milliseconds."""
+        self.setup_url_fixture(rmock, json=self.v0_single)
+        crawler = tasks.Crawler()
+        with mock.patch.object(
+            tasks.time, "monotonic", side_effect=itertools.count(10, 2.5)
+        ):
+            run = crawler.crawl()
+        self.assertEqual(run.urls.all()[0].elapsed_ms, 2500)
+        self.assertIn("Toolhub/1.0", rmock.last_request.headers["User-Agent"])
+
+    def test_timings(self, rmock):
+        """Phase timings are recorded for each url."""
+        self.setup_url_fixture(rmock, fixture="crawler_missing_run_1.json")
+        crawler = tasks.Crawler()
+        run = crawler.crawl()
+        run_url = run.urls.all()[0]
+        self.assertEqual(
+            set(run_url.timings),
+            {"connect", "download", "parse", "validate", "upsert"},
+        )
+        self.assertTrue(
+            all(isinstance(v, int) for v in run_url.timings.values())
+        )
+
+    @override_settings(CRAWLER_MAX_LOG_SIZE=40, CRAWLER_MIN_INTERVAL=0)
+    def test_logs_truncated(self, rmock):
+        """Captured logs are capped in size."""
+        self.setup_url_fixture(rmock, status_code=404)
+        crawler = tasks.Crawler()
+        run = crawler.crawl()
+        logs = run.urls.all()[0].logs
+        self.assertTrue(logs.startswith("..."), logs)
+        self.assertIn("<Response [404]>", logs)
+        self.assertEqual(len(logs), 40)
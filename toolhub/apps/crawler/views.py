@@ -73,8 +73,10 @@ class UrlViewSet(viewsets.ModelViewSet):
             "endswith",
         ],
         "url": ["contains"],
+        "next_crawl": ["gt", "gte", "lt", "lte"],
+        "consecutive_failures": ["exact", "gt", "gte", "lt", "lte"],
     }
-    ordering_fields = ["id", "url"]
+    ordering_fields = ["id", "url", "next_crawl", "consecutive_failures"]
     ordering = ["id"]
 
     def perform_create(self, serializer):
@@ -139,7 +141,18 @@ class RunUrlViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = RunUrl.objects.none()
     serializer_class = RunUrlSerializer
     permission_classes = [ObjectPermissionsOrAnonReadOnly]
-    ordering_fields = ["id", "url_id", "url__url", "status_code", "valid"]
+    filterset_fields = {
+        "elapsed_ms": ["gt", "gte", "lt", "lte"],
+        "valid": ["exact"],
+    }
+    ordering_fields = [
+        "id",
+        "url_id",
+        "url__url",
+        "status_code",
+        "valid",
+        "elapsed_ms",
+    ]
     ordering = ["valid", "status_code", "id"]
 
     def get_queryset(self):
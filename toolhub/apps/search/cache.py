@@ -0,0 +1,118 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.cache import cache
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from rest_framework.settings import api_settings
+
+
+GENERATION_KEY = "search:generation"
+RESPONSE_KEY = "search:response:{generation}:{digest}"
+FACETS_KEY = "search:facets:{generation}:{digest}"
+
+
+def is_enabled():
+    """Can search responses and facet counts be cached?
+
+    The generation has to be shared by every process which serves searches
+    or writes to the search index. A LocMemCache is private to each
+    process, so caching is disabled when it is the default cache unless
+    ``settings.SEARCH_CACHE_ALLOW_LOCAL`` is set.
+    """
+    if settings.SEARCH_CACHE_ALLOW_LOCAL:
+        return True
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def get_generation():
+    """Get the current search index generation.
+
+    The generation changes whenever documents are written to the search
+    index, which invalidates all cached search responses.
+    """
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Start from the clock rather than 0 so that a generation is not
+        # reused if the cache is cleared.
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    """Move to a new search index generation."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # The key is missing, so the next get_generation() starts a new one
+        pass
+
+
+def normalize_params(query_params):
+    """Normalize search query parameters for use in a cache key.
+
+    Parameters are sorted by name. Values of parameters other than ordering
+    are sorted as well because repeated filters are combined with AND. The
+    search string has its whitespace collapsed.
+
+    :param query_params: QueryDict of request parameters
+    :rtype: list
+    """
+    normalized = []
+    for name, values in sorted(query_params.lists()):
+        if name == api_settings.SEARCH_PARAM:
+            values = [" ".join(value.split()) for value in values]
+        if name != api_settings.ORDERING_PARAM:
+            values = sorted(values)
+        normalized.append([name, values])
+    return normalized
+
+
+def params_digest(request):
+    """Digest the parts of a request that a search response depends on."""
+    return hashlib.sha256(
+        json.dumps(
+            [
+                request.get_host(),
+                request.path,
+                normalize_params(request.query_params),
+            ]
+        ).encode("utf-8")
+    ).hexdigest()
+
+
+def response_key(generation, digest):
+    """Build the cache key of a search response."""
+    return RESPONSE_KEY.format(generation=generation, digest=digest)
+
+
+def facets_key(generation, variant):
+    """Build the cache key of the facet counts for a filter variant.
+
+    :param variant: Filter params the facets were counted with, as a list
+        of (name, value) pairs
+    """
+    digest = hashlib.sha256(json.dumps(variant).encode("utf-8")).hexdigest()
+    return FACETS_KEY.format(generation=generation, digest=digest)
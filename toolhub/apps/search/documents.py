@@ -29,6 +29,7 @@ from elasticsearch_dsl import analyzer
 from toolhub.apps.toolinfo.models import Tool
 from toolhub.fields import JSONSchemaField
 
+from . import cache as search_cache
 from . import schema
 
 
@@ -52,6 +53,13 @@ class SearchDocument(Document):
         filter=["standard", "lowercase"],
     )
 
+    def update(self, thing, **kwargs):
+        """Write documents and invalidate cached search responses."""
+        try:
+            return super().update(thing, **kwargs)
+        finally:
+            search_cache.bump_generation()
+
     @classmethod
     def build_string_field(cls, **kwargs):
         """Add Elasticsearch schema customizations to strings."""
@@ -165,3 +173,7 @@ class ToolDocument(SearchDocument):
             # "modified_by",
             "modified_date",
         ]
+
+    def get_queryset(self):
+        """Get the tools to index along with their creators."""
+        return super().get_queryset().select_related("created_by")
@@ -0,0 +1,75 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from django_elasticsearch_dsl.registries import registry
+
+from elasticsearch.exceptions import ElasticsearchException
+
+from toolhub.apps.search.reindex import ReindexError
+from toolhub.apps.search.reindex import Reindexer
+
+
+class Command(BaseCommand):
+    """Rebuild search indices behind aliases."""
+
+    help = (  # noqa: A003
+        "Rebuild search indices without taking search offline. Each index "
+        "is rebuilt under a new name and then swapped in using an alias."
+    )
+
+    def add_arguments(self, parser):
+        """Add CLI arguments."""
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of documents to load and send at a time.",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=4,
+            help="Number of bulk requests to send in parallel.",
+        )
+        parser.add_argument(
+            "--keep-old",
+            action="store_true",
+            help="Do not delete the indices that were replaced.",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        for doc in registry.get_documents():
+            reindexer = Reindexer(
+                doc,
+                chunk_size=max(1, options["chunk_size"]),
+                thread_count=max(1, options["threads"]),
+            )
+            try:
+                name, count = reindexer.run(keep_old=options["keep_old"])
+            except (ElasticsearchException, ReindexError) as e:
+                raise CommandError(
+                    "Failed to rebuild {}: {}".format(reindexer.alias, e)
+                )
+            self.stdout.write(
+                "Indexed {} documents into {} as {}".format(
+                    count, name, reindexer.alias
+                )
+            )
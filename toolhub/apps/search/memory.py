@@ -0,0 +1,526 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import bisect
+import collections
+import fnmatch
+import math
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from django_elasticsearch_dsl_drf import constants
+
+from .documents import ToolDocument
+
+
+TOKEN_RE = re.compile(r"\w+")
+CLAUSE_RE = re.compile(r'([+-]?)(?:"([^"]*)"?|(\S+))')
+# Sub-fields added by SearchDocument.build_string_field()
+KEYWORD_SUBFIELD = "keyword"
+TEXT_SUBFIELDS = ("exact",)
+
+MUST = "must"
+MUST_NOT = "must_not"
+SHOULD = "should"
+
+Clause = collections.namedtuple("Clause", ["occur", "terms", "prefix"])
+
+
+def tokenize(text):
+    """Split text into lowercase words like the standard analyzer."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def iter_strings(value):
+    """Yield all strings found in a prepared document value."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from iter_strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from iter_strings(item)
+
+
+def split_field(field):
+    """Split an Elasticsearch field name into a path and analysis flag.
+
+    :returns: (path, analyzed) tuple. Analyzed fields are matched against
+        the words of their string values rather than the exact values.
+    """
+    path, _, subfield = field.rpartition(".")
+    if subfield == KEYWORD_SUBFIELD:
+        return path, False
+    if subfield in TEXT_SUBFIELDS:
+        return path, True
+    return field, True
+
+
+def get_values(source, path):
+    """Get the values at a dotted path of a prepared document.
+
+    Lists are flattened and missing or null values are dropped.
+    """
+    values = [source]
+    for part in path.split("."):
+        found = []
+        for value in values:
+            item = value.get(part) if isinstance(value, dict) else None
+            if isinstance(item, (list, tuple)):
+                found.extend(item)
+            else:
+                found.append(item)
+        values = [value for value in found if value is not None]
+    return values
+
+
+def parse_query(text):
+    """Parse a search string into clauses.
+
+    Supports the most common parts of the Elasticsearch simple query
+    string syntax: ``+word`` must match, ``-word`` must not match,
+    ``"some words"`` must match all of its words and ``word*`` matches
+    words by prefix. Any other word should match.
+    """
+    clauses = []
+    for match in CLAUSE_RE.finditer(text):
+        sign, phrase, word = match.groups()
+        occur = {"+": MUST, "-": MUST_NOT}.get(sign, SHOULD)
+        prefix = phrase is None and word.endswith("*")
+        terms = tokenize(word if phrase is None else phrase)
+        if terms or prefix:
+            clauses.append(Clause(occur, terms, prefix))
+    return clauses
+
+
+def _intersect(left, right):
+    """Combine two score maps, keeping only keys found in both."""
+    if left is None:
+        return right
+    return {key: left[key] + right[key] for key in left.keys() & right}
+
+
+def _lookup_filter(path, analyzed, lookup, value):
+    """Build a predicate for a single filter lookup."""
+    if lookup in (
+        constants.LOOKUP_QUERY_ISNULL,
+        constants.LOOKUP_FILTER_EXISTS,
+    ):
+        value = value.lower()
+        if value not in constants.TRUE_VALUES + constants.FALSE_VALUES:
+            return None
+        exists = (value in constants.TRUE_VALUES) == (
+            lookup == constants.LOOKUP_FILTER_EXISTS
+        )
+        return lambda source: bool(get_values(source, path)) == exists
+
+    def match(source, test):
+        for item in get_values(source, path):
+            if analyzed and isinstance(item, str):
+                if any(test(word) for word in tokenize(item)):
+                    return True
+            elif test(item):
+                return True
+        return False
+
+    choices = value.split(constants.SEPARATOR_LOOKUP_COMPLEX_VALUE)
+    if lookup == constants.LOOKUP_QUERY_EXCLUDE:
+        return lambda source: not match(source, lambda t: t in choices)
+    if lookup in (constants.LOOKUP_FILTER_TERMS, constants.LOOKUP_QUERY_IN):
+        return lambda source: match(source, lambda t: t in choices)
+
+    pattern = {
+        constants.LOOKUP_FILTER_PREFIX: "{}*",
+        constants.LOOKUP_QUERY_STARTSWITH: "{}*",
+        constants.LOOKUP_QUERY_ENDSWITH: "*{}",
+        constants.LOOKUP_QUERY_CONTAINS: "*{}*",
+        constants.LOOKUP_FILTER_WILDCARD: "{}",
+    }.get(lookup)
+    if pattern is not None:
+        pattern = pattern.format(value)
+        return lambda source: match(
+            source, lambda t: fnmatch.fnmatchcase(str(t), pattern)
+        )
+    if lookup == constants.LOOKUP_FILTER_REGEXP:
+        try:
+            regex = re.compile(value)
+        except re.error:
+            return lambda source: False
+        return lambda source: match(
+            source, lambda t: regex.fullmatch(str(t)) is not None
+        )
+    if lookup in (None, constants.LOOKUP_FILTER_TERM):
+        return lambda source: match(source, lambda t: t == value)
+    # Range lookups are not used by any view, so are not implemented.
+    return None
+
+
+def build_filter(options):
+    """Build a document predicate from FilteringFilterBackend options.
+
+    :param options: Options for a single query parameter, as returned by
+        ``FilteringFilterBackend.get_filter_query_params()``
+    :returns: callable taking a prepared document and returning a boolean
+    """
+    path, analyzed = split_field(options["field"])
+    lookup = options["lookup"]
+    values = options["values"]
+    if lookup is None:
+        # Like FilteringFilterBackend, any of several values may match
+        lookup = constants.LOOKUP_FILTER_TERMS
+        values = [constants.SEPARATOR_LOOKUP_COMPLEX_VALUE.join(values)]
+    predicates = [
+        predicate
+        for predicate in (
+            _lookup_filter(path, analyzed, lookup, value) for value in values
+        )
+        if predicate is not None
+    ]
+    return lambda source: all(pred(source) for pred in predicates)
+
+
+def _sort_spec(spec):
+    """Get the field and direction of an Elasticsearch sort parameter."""
+    if isinstance(spec, dict):
+        ((field, options),) = spec.items()
+        return field, options.get("order") == "desc"
+    field = spec.lstrip("-")
+    # Elasticsearch sorts by score in descending order by default
+    return field, field == "_score" or spec.startswith("-")
+
+
+def sort_hits(hits, ordering, values=None):
+    """Sort (id, score, source) hits like Elasticsearch would.
+
+    Documents without a value for a field are sorted last.
+
+    :param values: Function to get the values at a path for a hit's id.
+        Defaults to reading them from the hit's source.
+    """
+    for spec in reversed(ordering):
+        field, reverse = _sort_spec(spec)
+        if field == "_score":
+            hits.sort(key=lambda hit: hit[1], reverse=reverse)
+            continue
+        path, _ = split_field(field)
+        present = []
+        missing = []
+        for hit in hits:
+            found = (
+                values(hit[0], path) if values else get_values(hit[2], path)
+            )
+            if found:
+                key = max(found) if reverse else min(found)
+                present.append((key, hit))
+            else:
+                missing.append(hit)
+        present.sort(key=lambda pair: pair[0], reverse=reverse)
+        hits[:] = [hit for _, hit in present] + missing
+    return hits
+
+
+def terms_facet(docs, field, options, values=get_values):
+    """Count documents by value like an Elasticsearch terms aggregation.
+
+    :param docs: Documents, or ids of documents, to count
+    :param values: Function to get the values at a path for a document.
+        Defaults to reading them from a document source.
+    """
+    path, _ = split_field(field)
+    missing = options.get("missing")
+    counts = collections.Counter()
+    for doc in docs:
+        found = values(doc, path)
+        if found:
+            for value in set(found):
+                counts[value] += 1
+        elif missing is not None:
+            counts[missing] += 1
+    buckets = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    size = options.get("size", 10)
+    result = {
+        "doc_count_error_upper_bound": 0,
+        "sum_other_doc_count": sum(count for _, count in buckets[size:]),
+        "buckets": [
+            {"key": key, "doc_count": count} for key, count in buckets[:size]
+        ],
+    }
+    if "meta" in options:
+        result["meta"] = options["meta"]
+    return result
+
+
+class MemoryIndex:
+    """In-process full text index of a search document.
+
+    Documents are prepared exactly as they would be for Elasticsearch and
+    kept in memory along with an inverted index of the words in all of
+    their string fields. Searches are scored with BM25 and can be filtered,
+    sorted and faceted using the same field names as an Elasticsearch
+    search of the document.
+
+    The index is built from the database on first use and updated from the
+    same model signals that update Elasticsearch. Changes made by other
+    processes are picked up by rebuilding the index once it is older than
+    ``settings.SEARCH_MEMORY_MAX_AGE`` seconds.
+    """
+
+    # BM25 parameters, using the Elasticsearch defaults
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, document):
+        """Initialize instance."""
+        self.document = document
+        self._lock = threading.RLock()
+        self.clear()
+
+    def __len__(self):
+        """Number of indexed documents."""
+        return len(self._sources)
+
+    def clear(self):
+        """Discard all documents."""
+        with self._lock:
+            self.built = None
+            self._sources = {}
+            # Values of sorted and faceted fields, cached by path
+            self._fields = {}
+            self._lengths = {}
+            self._terms = {}
+            self._postings = {}
+            self._total_length = 0
+            self._vocabulary = None
+
+    def handles(self, model):
+        """Does this index contain instances of model?"""
+        return model is self.document.django.model
+
+    def is_stale(self):
+        """Does the index need to be (re)built?"""
+        if self.built is None:
+            return True
+        age = time.monotonic() - self.built
+        return age > settings.SEARCH_MEMORY_MAX_AGE
+
+    def build(self):
+        """Load all documents from the database."""
+        doc = self.document()
+        sources = [
+            (doc.generate_id(instance), doc.prepare(instance))
+            for instance in doc.get_indexing_queryset()
+        ]
+        with self._lock:
+            self.clear()
+            for uid, source in sources:
+                self._add(uid, source)
+            self.built = time.monotonic()
+
+    def ensure_built(self):
+        """Build the index if it is missing or stale."""
+        if self.is_stale():
+            self.build()
+
+    def update(self, instances):
+        """Index instances when the current transaction commits."""
+        transaction.on_commit(lambda: self._update(instances))
+
+    def remove(self, instances):
+        """Remove instances when the current transaction commits."""
+        transaction.on_commit(lambda: self._remove_all(instances))
+
+    def _update(self, instances):
+        if self.built is None:
+            # Nothing to update until the index is built from the database
+            return
+        doc = self.document()
+        sources = [
+            (doc.generate_id(instance), doc.prepare(instance))
+            for instance in instances
+        ]
+        with self._lock:
+            for uid, source in sources:
+                self._remove(uid)
+                self._add(uid, source)
+
+    def _remove_all(self, instances):
+        with self._lock:
+            for instance in instances:
+                self._remove(self.document.generate_id(instance))
+
+    def _add(self, uid, source):
+        terms = collections.Counter(
+            term for text in iter_strings(source) for term in tokenize(text)
+        )
+        self._sources[uid] = source
+        self._fields[uid] = {}
+        self._terms[uid] = terms
+        self._lengths[uid] = sum(terms.values())
+        self._total_length += self._lengths[uid]
+        for term, freq in terms.items():
+            if term not in self._postings:
+                self._postings[term] = {}
+                self._vocabulary = None
+            self._postings[term][uid] = freq
+
+    def _remove(self, uid):
+        terms = self._terms.pop(uid, None)
+        if terms is None:
+            return
+        del self._sources[uid]
+        del self._fields[uid]
+        self._total_length -= self._lengths.pop(uid)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[uid]
+            if not postings:
+                del self._postings[term]
+                self._vocabulary = None
+
+    def _values(self, uid, path):
+        """Get the values at a path of a document."""
+        fields = self._fields[uid]
+        if path not in fields:
+            fields[path] = get_values(self._sources[uid], path)
+        return fields[path]
+
+    def _expand(self, prefix):
+        """Find all indexed words starting with prefix."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        idx = bisect.bisect_left(self._vocabulary, prefix)
+        while idx < len(self._vocabulary):
+            term = self._vocabulary[idx]
+            if not term.startswith(prefix):
+                break
+            yield term
+            idx += 1
+
+    def _score_term(self, term):
+        """Score the documents containing a word with BM25."""
+        postings = self._postings.get(term)
+        if not postings:
+            return {}
+        count = len(self._sources)
+        idf = math.log(
+            1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)
+        )
+        avg_length = self._total_length / count
+        return {
+            uid: idf
+            * freq
+            * (self.k1 + 1)
+            / (
+                freq
+                + self.k1
+                * (1 - self.b + self.b * self._lengths[uid] / avg_length)
+            )
+            for uid, freq in postings.items()
+        }
+
+    def _score_clause(self, clause):
+        """Score the documents matching all of a clause's words."""
+        terms = clause.terms[:-1] if clause.prefix else clause.terms
+        scores = None
+        for term in terms:
+            scores = _intersect(scores, self._score_term(term))
+        if clause.prefix:
+            # Prefix matches get a constant score, as in Elasticsearch
+            if clause.terms:
+                matched = set()
+                for term in self._expand(clause.terms[-1]):
+                    matched.update(self._postings[term])
+            else:
+                matched = self._sources
+            scores = _intersect(scores, dict.fromkeys(matched, 1.0))
+        return scores
+
+    def _score_query(self, text):
+        """Score the documents matching a search string."""
+        clauses = parse_query(text)
+        required = None
+        optional = collections.Counter()
+        excluded = set()
+        for clause in clauses:
+            scores = self._score_clause(clause)
+            if clause.occur == MUST_NOT:
+                excluded.update(scores)
+            elif clause.occur == MUST:
+                required = _intersect(required, scores)
+            else:
+                optional.update(scores)
+        if required is not None:
+            scores = {
+                uid: score + optional[uid] for uid, score in required.items()
+            }
+        elif any(clause.occur == SHOULD for clause in clauses):
+            scores = optional
+        elif clauses:
+            scores = dict.fromkeys(self._sources, 0.0)
+        else:
+            scores = {}
+        return {
+            uid: score for uid, score in scores.items() if uid not in excluded
+        }
+
+    def search(self, text=None, filters=(), ordering=(), facets=None):
+        """Search the index.
+
+        :param text: Search string, or None to match all documents
+        :param filters: Predicates which matching documents must satisfy
+        :param ordering: Elasticsearch sort parameters
+        :param facets: Terms facets to count, keyed by name, in the form of
+            ``FacetedSearchFilterBackend.prepare_faceted_search_fields()``
+        :returns: (hits, facets) tuple. Hits are (id, score, source)
+            tuples. Facets match the aggregations of an Elasticsearch
+            faceted search.
+        """
+        with self._lock:
+            if text is None:
+                scores = dict.fromkeys(self._sources, 0.0)
+            else:
+                scores = self._score_query(text)
+            hits = [
+                (uid, score, self._sources[uid])
+                for uid, score in scores.items()
+                if all(pred(self._sources[uid]) for pred in filters)
+            ]
+            counts = {}
+            for name, facet in (facets or {}).items():
+                if facet.get("global"):
+                    uids = list(self._sources)
+                else:
+                    uids = [hit[0] for hit in hits]
+                counts["_filter_{}".format(name)] = {
+                    "doc_count": len(uids),
+                    name: terms_facet(
+                        uids,
+                        facet["field"],
+                        facet.get("options", {}),
+                        values=self._values,
+                    ),
+                }
+            sort_hits(hits, ordering, values=self._values)
+        return hits, counts
+
+
+memory_index = MemoryIndex(ToolDocument)
@@ -0,0 +1,161 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from django_elasticsearch_dsl.registries import registry
+
+from elasticsearch.exceptions import ElasticsearchException
+
+
+logger = logging.getLogger(__name__)
+
+
+class IndexQueue:
+    """Coalesce search index updates and send them in bulk.
+
+    Instances are queued once the transaction that changed them commits.
+    Repeated changes to an instance are merged so that only its latest
+    state is indexed. `flush()` loads the queued instances and sends them
+    to Elasticsearch with the bulk API in batches of
+    ``settings.ELASTICSEARCH_DSL_QUEUE_BATCH_SIZE``. Batches which fail are
+    queued again until they have failed
+    ``settings.ELASTICSEARCH_DSL_QUEUE_RETRIES`` times.
+    """
+
+    INDEX = "index"
+    DELETE = "delete"
+
+    def __init__(self):
+        """Initialize instance."""
+        self._lock = threading.Lock()
+        # Map of (model, pk) to the action to take
+        self._pending = {}
+        # Map of (model, pk) to the number of failed attempts to send it
+        self._failures = {}
+
+    def __len__(self):
+        """Number of queued instances."""
+        return len(self._pending)
+
+    def add(self, model, pks, action):
+        """Queue instances when the current transaction commits.
+
+        :param model: Model class with registered documents
+        :param pks: Primary keys of the changed instances
+        :param action: INDEX or DELETE
+        """
+        pks = list(pks)
+        transaction.on_commit(lambda: self._add(model, pks, action))
+
+    def _add(self, model, pks, action):
+        """Queue instances now."""
+        with self._lock:
+            for pk in pks:
+                self._pending[(model, pk)] = action
+            full = len(self) >= settings.ELASTICSEARCH_DSL_QUEUE_BATCH_SIZE
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Send all queued changes to Elasticsearch."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        by_model = {}
+        for (model, pk), action in pending.items():
+            by_model.setdefault(model, {self.INDEX: [], self.DELETE: []})
+            by_model[model][action].append(pk)
+
+        size = settings.ELASTICSEARCH_DSL_QUEUE_BATCH_SIZE
+        for model, actions in by_model.items():
+            for action, pks in actions.items():
+                for start in range(0, len(pks), size):
+                    end = start + size
+                    self._send(model, pks[start:end], action)
+
+    def _send(self, model, pks, action):
+        """Send one batch of changes for each document of a model."""
+        try:
+            for doc in registry.get_documents([model]):
+                if doc.django.ignore_signals:
+                    continue
+                if action == self.INDEX:
+                    self._send_index(doc, model, pks)
+                else:
+                    self._send_delete(doc, model, pks)
+        except ElasticsearchException:
+            self._retry(model, pks, action)
+        else:
+            with self._lock:
+                for pk in pks:
+                    self._failures.pop((model, pk), None)
+
+    def _send_index(self, doc, model, pks):
+        """Index the current state of instances."""
+        instances = list(doc().get_queryset().filter(pk__in=pks))
+        doc().update(instances)
+        # Instances that no longer exist, or are no longer part of the
+        # document's queryset, are removed from the index instead.
+        found = {instance.pk for instance in instances}
+        missing = [pk for pk in pks if pk not in found]
+        if missing:
+            self._send_delete(doc, model, missing)
+
+    def _send_delete(self, doc, model, pks):
+        """Remove instances from the index."""
+        doc().update(
+            [model(pk=pk) for pk in pks],
+            action=self.DELETE,
+            raise_on_error=False,
+        )
+
+    def _retry(self, model, pks, action):
+        """Queue a failed batch again unless it has failed too often."""
+        retries = settings.ELASTICSEARCH_DSL_QUEUE_RETRIES
+        dropped = []
+        with self._lock:
+            for pk in pks:
+                key = (model, pk)
+                failures = self._failures.get(key, 0) + 1
+                if failures > retries:
+                    self._failures.pop(key, None)
+                    dropped.append(pk)
+                    continue
+                self._failures[key] = failures
+                # A newer change queued since the flush started wins
+                self._pending.setdefault(key, action)
+        logger.warning(
+            "Search index %s of %d %s failed",
+            action,
+            len(pks),
+            model._meta.label,
+            exc_info=True,
+        )
+        if dropped:
+            logger.error(
+                "Giving up on search index %s of %s %s",
+                action,
+                model._meta.label,
+                dropped,
+            )
+
+
+index_queue = IndexQueue()
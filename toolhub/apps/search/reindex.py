@@ -0,0 +1,186 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import datetime
+import logging
+
+from django.utils import timezone
+
+from elasticsearch.helpers import parallel_bulk
+
+from . import cache as search_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+class ReindexError(Exception):
+    """Documents could not be loaded into a new index."""
+
+
+class Reindexer:
+    """Rebuild the index of a document type without taking it offline.
+
+    The document's index name is used as an alias. A new index with a
+    timestamped name is built next to the live index, the alias is moved
+    to it in one atomic request, and the indices that were behind the alias
+    are deleted.
+
+    Rows modified while the new index is being built are copied into it
+    twice: once before the alias is moved and once after, so that changes
+    which were written to the old index in the meantime are not lost.
+    Changes are found using the model's `modified_date` field, which soft
+    deletion also updates. Rows which are hard deleted during a rebuild
+    will remain in the new index until they are next updated.
+    """
+
+    # Allowance for clock differences between the hosts writing to the
+    # database when deciding which rows changed during a rebuild.
+    REPLAY_MARGIN = datetime.timedelta(seconds=60)
+
+    def __init__(self, doc, chunk_size=500, thread_count=4):
+        """Initialize instance.
+
+        :param doc: Document class to rebuild the index of
+        :param chunk_size: Number of rows to load from the database and
+            documents to send to Elasticsearch at a time
+        :param thread_count: Number of parallel bulk requests to make
+        """
+        self.doc = doc
+        self.chunk_size = chunk_size
+        self.thread_count = thread_count
+        self.alias = doc._index._name
+        self.es = doc._get_connection()
+
+    def new_index_name(self):
+        """Build a unique name for a new index."""
+        return "{}-{}".format(
+            self.alias, timezone.now().strftime("%Y%m%d%H%M%S%f")
+        )
+
+    def run(self, keep_old=False):
+        """Build a new index and make it live.
+
+        :param keep_old: Do not delete the indices that were replaced
+        :returns: (name of the new index, number of documents loaded)
+        :rtype: tuple
+        """
+        name = self.new_index_name()
+        index = self.doc._index.clone(name=name)
+        # Refreshing while loading only slows the load down
+        index.settings(refresh_interval="-1")
+        index.create()
+        logger.info("Created index %s", name)
+
+        try:
+            started = timezone.now() - self.REPLAY_MARGIN
+            qs = self.doc().get_queryset().order_by("pk")
+            count = self.load(name, qs.iterator(chunk_size=self.chunk_size))
+            self.es.indices.put_settings(
+                index=name, body={"index": {"refresh_interval": None}}
+            )
+            caught_up = timezone.now() - self.REPLAY_MARGIN
+            self.replay(name, started)
+            self.es.indices.refresh(index=name)
+        except Exception:  # noqa: B902
+            # Database, Elasticsearch, and ReindexError failures all leave
+            # a partial index behind. Drop it and re-raise the original.
+            self.es.indices.delete(index=name)
+            raise
+
+        old = self.swap(name)
+        # Writes made between catching up and the swap went to the old index
+        self.replay(name, caught_up)
+        search_cache.bump_generation()
+        if not keep_old:
+            for old_name in old:
+                self.es.indices.delete(index=old_name)
+                logger.info("Deleted index %s", old_name)
+        return name, count
+
+    def load(self, name, instances, action="index"):
+        """Send documents for model instances to an index.
+
+        :returns: Number of documents sent
+        :rtype: int
+        :raises ReindexError: if any document was rejected
+        """
+        doc = self.doc()
+        actions = (
+            {**doc._prepare_action(instance, action), "_index": name}
+            for instance in instances
+        )
+        count = 0
+        failed = []
+        for ok, item in parallel_bulk(
+            self.es,
+            actions,
+            thread_count=self.thread_count,
+            chunk_size=self.chunk_size,
+            raise_on_error=False,
+            raise_on_exception=True,
+        ):
+            count += 1
+            if not ok and item.get(action, {}).get("status") != 404:
+                failed.append(item)
+        if failed:
+            raise ReindexError(
+                "{} of {} documents failed, first error: {}".format(
+                    len(failed), count, failed[0]
+                )
+            )
+        return count
+
+    def replay(self, name, since):
+        """Copy rows modified since a point in time into an index."""
+        model = self.doc.django.model
+        changed = set(
+            model._base_manager.filter(modified_date__gte=since).values_list(
+                "pk", flat=True
+            )
+        )
+        if not changed:
+            return
+        instances = list(self.doc().get_queryset().filter(pk__in=changed))
+        self.load(name, instances)
+        found = {instance.pk for instance in instances}
+        # Changed rows which are not indexable any more were deleted
+        self.load(
+            name, [model(pk=pk) for pk in changed - found], action="delete"
+        )
+        logger.info("Replayed %d changes into %s", len(changed), name)
+
+    def swap(self, name):
+        """Point the alias at a new index in one atomic request.
+
+        :returns: Names of the indices the alias pointed to before
+        :rtype: list
+        """
+        actions = [{"add": {"index": name, "alias": self.alias}}]
+        old = []
+        if self.es.indices.exists_alias(name=self.alias):
+            old = sorted(self.es.indices.get_alias(name=self.alias))
+            actions.extend(
+                {"remove": {"index": old_name, "alias": self.alias}}
+                for old_name in old
+            )
+        elif self.es.indices.exists(index=self.alias):
+            # Replace an index created before aliases were used
+            actions.append({"remove_index": {"index": self.alias}})
+        self.es.indices.update_aliases(body={"actions": actions})
+        logger.info("Moved alias %s to %s", self.alias, name)
+        return old
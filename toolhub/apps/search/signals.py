@@ -15,14 +15,44 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import atexit
+
+from django.conf import settings
+from django.core.signals import request_finished
+
+from django_elasticsearch_dsl.apps import DEDConfig
+from django_elasticsearch_dsl.registries import registry
 from django_elasticsearch_dsl.signals import RealTimeSignalProcessor
 
 from safedelete.models import SafeDeleteModel
 from safedelete.signals import post_softdelete
 
+from toolhub.signals import post_bulk_create
+from toolhub.signals import post_bulk_softdelete
+
+from .memory import memory_index
+from .queue import index_queue
+
 
 class SignalProcessor(RealTimeSignalProcessor):
-    """Update index based on signals."""
+    """Update index based on signals.
+
+    When ``settings.ELASTICSEARCH_DSL_DEFERRED`` is set, changes are added
+    to the index queue instead of being sent to Elasticsearch immediately.
+    The queue is flushed at the end of each request, and when the process
+    exits for changes made by management commands.
+
+    The in-process search index is updated as well, whether or not changes
+    are being sent to Elasticsearch.
+    """
+
+    def is_deferred(self, sender):
+        """Should changes to sender's instances be queued?"""
+        return (
+            settings.ELASTICSEARCH_DSL_DEFERRED
+            and DEDConfig.autosync_enabled()
+            and sender in registry.get_models()
+        )
 
     def handle_save(self, sender, instance, **kwargs):
         """Handle save."""
@@ -30,14 +60,71 @@ class SignalProcessor(RealTimeSignalProcessor):
             if instance.deleted is not None:
                 # Ignore if instance is soft deleted
                 return
+        if memory_index.handles(sender):
+            memory_index.update([instance])
+        if self.is_deferred(sender):
+            index_queue.add(sender, [instance.pk], index_queue.INDEX)
+            registry.update_related(instance)
+            return
         super().handle_save(sender, instance, **kwargs)
 
+    def handle_delete(self, sender, instance, **kwargs):
+        """Handle delete."""
+        if memory_index.handles(sender):
+            memory_index.remove([instance])
+        if self.is_deferred(sender):
+            index_queue.add(sender, [instance.pk], index_queue.DELETE)
+            return
+        super().handle_delete(sender, instance, **kwargs)
+
+    def handle_bulk_create(self, sender, instances, **kwargs):
+        """Handle bulk creation with a single bulk index request."""
+        if memory_index.handles(sender):
+            memory_index.update(instances)
+        if not DEDConfig.autosync_enabled():
+            return
+        if self.is_deferred(sender):
+            index_queue.add(
+                sender, [i.pk for i in instances], index_queue.INDEX
+            )
+            return
+        for doc in registry.get_documents([sender]):
+            if not doc.django.ignore_signals:
+                doc().update(instances)
+
+    def handle_bulk_softdelete(self, sender, instances, **kwargs):
+        """Handle bulk soft deletion with a single bulk delete request."""
+        if memory_index.handles(sender):
+            memory_index.remove(instances)
+        if not DEDConfig.autosync_enabled():
+            return
+        if self.is_deferred(sender):
+            index_queue.add(
+                sender, [i.pk for i in instances], index_queue.DELETE
+            )
+            return
+        for doc in registry.get_documents([sender]):
+            if not doc.django.ignore_signals:
+                doc().update(instances, action="delete", raise_on_error=False)
+
+    def handle_request_finished(self, sender, **kwargs):
+        """Send changes queued during a request."""
+        index_queue.flush()
+
     def setup(self):
         """Setup signals."""
         super().setup()
         post_softdelete.connect(self.handle_delete)
+        post_bulk_create.connect(self.handle_bulk_create)
+        post_bulk_softdelete.connect(self.handle_bulk_softdelete)
+        request_finished.connect(self.handle_request_finished)
+        atexit.register(index_queue.flush)
 
     def teardown(self):
         """Teardown signals."""
+        atexit.unregister(index_queue.flush)
+        request_finished.disconnect(self.handle_request_finished)
+        post_bulk_softdelete.disconnect(self.handle_bulk_softdelete)
+        post_bulk_create.disconnect(self.handle_bulk_create)
         post_softdelete.disconnect(self.handle_delete)
         super().teardown()
@@ -0,0 +1,146 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import SimpleTestCase
+from django.test import override_settings
+
+from django_elasticsearch_dsl_drf.viewsets import BaseDocumentViewSet
+
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from .. import cache as search_cache
+
+
+class SearchCacheTest(SimpleTestCase):
+    """Test search response caching helpers."""
+
+    def setUp(self):
+        """Setup for each test."""
+        cache.clear()
+
+    def test_generation(self):
+        """The generation starts from the clock and moves on writes."""
+        generation = search_cache.get_generation()
+        self.assertGreater(generation, 0)
+        self.assertEqual(search_cache.get_generation(), generation)
+        search_cache.bump_generation()
+        self.assertEqual(search_cache.get_generation(), generation + 1)
+
+        cache.clear()
+        search_cache.bump_generation()
+        self.assertGreater(search_cache.get_generation(), generation + 1)
+
+    def test_is_enabled(self):
+        """Caching is disabled when the cache is private to the process."""
+        with self.settings(SEARCH_CACHE_ALLOW_LOCAL=False):
+            self.assertFalse(search_cache.is_enabled())
+            with self.settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.dummy."
+                        "DummyCache",
+                    }
+                }
+            ):
+                self.assertTrue(search_cache.is_enabled())
+        with self.settings(SEARCH_CACHE_ALLOW_LOCAL=True):
+            self.assertTrue(search_cache.is_enabled())
+
+    def test_normalize_params(self):
+        """Equivalent parameters normalize to the same value."""
+        self.assertEqual(
+            search_cache.normalize_params(
+                QueryDict(
+                    "q=foo++bar&keywords__term=b&keywords__term=a"
+                    "&ordering=name&ordering=-score"
+                )
+            ),
+            search_cache.normalize_params(
+                QueryDict(
+                    "ordering=name&ordering=-score&keywords__term=a"
+                    "&q=+foo+bar&keywords__term=b"
+                )
+            ),
+        )
+        self.assertNotEqual(
+            search_cache.normalize_params(QueryDict("ordering=a&ordering=b")),
+            search_cache.normalize_params(QueryDict("ordering=b&ordering=a")),
+        )
+
+
+@override_settings(SEARCH_CACHE_TIMEOUT=60, SEARCH_CACHE_ALLOW_LOCAL=True)
+class ToolDocumentViewSetCacheTest(SimpleTestCase):
+    """Test caching of ToolDocumentViewSet responses."""
+
+    url = "/api/search/tools/"
+
+    def setUp(self):
+        """Setup for each test."""
+        cache.clear()
+        self.client = APIClient()
+        patcher = mock.patch.object(
+            BaseDocumentViewSet,
+            "list",
+            side_effect=lambda *args, **kwargs: Response({"count": 1}),
+        )
+        self.search = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cached(self):
+        """Repeated searches are answered from the cache."""
+        first = self.client.get(self.url, {"q": "foo", "page": 2})
+        second = self.client.get(self.url + "?page=2&q=foo+")
+        self.assertEqual(self.search.call_count, 1)
+        self.assertEqual(second.data, {"count": 1})
+        self.assertEqual(first["ETag"], second["ETag"])
+
+        self.client.get(self.url, {"q": "foo", "page": 3})
+        self.assertEqual(self.search.call_count, 2)
+
+        search_cache.bump_generation()
+        third = self.client.get(self.url, {"q": "foo", "page": 2})
+        self.assertEqual(self.search.call_count, 3)
+        self.assertNotEqual(third["ETag"], first["ETag"])
+
+    def test_not_modified(self):
+        """Clients can revalidate with If-None-Match."""
+        etag = self.client.get(self.url, {"q": "foo"})["ETag"]
+
+        response = self.client.get(
+            self.url, {"q": "foo"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        search_cache.bump_generation()
+        response = self.client.get(
+            self.url, {"q": "foo"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_local_cache(self):
+        """Searches are neither cached nor tagged with a local cache."""
+        with self.settings(SEARCH_CACHE_ALLOW_LOCAL=False):
+            first = self.client.get(self.url, {"q": "foo"})
+            self.client.get(self.url, {"q": "foo"})
+        self.assertEqual(self.search.call_count, 2)
+        self.assertFalse(first.has_header("ETag"))
@@ -0,0 +1,114 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.test import override_settings
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .. import cache as search_cache
+from ..documents import ToolDocument
+from ..views import Pagination
+from ..views import PrecomputedFacetsFilterBackend
+from ..views import ToolDocumentViewSet
+
+
+@override_settings(
+    SEARCH_FACETS_CACHE_TIMEOUT=60, SEARCH_CACHE_ALLOW_LOCAL=True
+)
+class PrecomputedFacetsTest(SimpleTestCase):
+    """Test reuse of facet counts between searches."""
+
+    def setUp(self):
+        """Setup for each test."""
+        cache.clear()
+        self.backend = PrecomputedFacetsFilterBackend()
+        self.view = ToolDocumentViewSet()
+
+    def _request(self, query=""):
+        return Request(APIRequestFactory().get("/api/search/tools/?" + query))
+
+    def test_get_facet_variant(self):
+        """Only searches without a string and one filter value qualify."""
+        for query, expect in (
+            ("", []),
+            ("page=2&ordering=-name", []),
+            ("wiki=enwiki", [["wiki", "enwiki"]]),
+            (
+                "tool_type__term=web+app&page=3",
+                [["tool_type__term", "web app"]],
+            ),
+            (
+                "facet=license&facet=author",
+                [["facet", "author"], ["facet", "license"]],
+            ),
+            ("q=", None),
+            ("q=foo", None),
+            ("wiki=enwiki&wiki=dewiki", None),
+            ("wiki=enwiki&license=MIT", None),
+            ("name=foo", None),
+        ):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    self.backend.get_facet_variant(
+                        self._request(query), self.view
+                    ),
+                    expect,
+                )
+
+    def test_filter_queryset(self):
+        """Aggregations are skipped when cached facet counts exist."""
+        request = self._request("license=MIT")
+        search = self.backend.filter_queryset(
+            request, ToolDocument.search(), self.view
+        )
+        self.assertIn("aggs", search.to_dict())
+        self.assertIsNone(self.view.precomputed_facets)
+        key = self.view.facets_cache_key
+
+        facets = {"license": {"buckets": []}}
+        cache.set(key, facets)
+        view = ToolDocumentViewSet()
+        search = self.backend.filter_queryset(
+            request, ToolDocument.search(), view
+        )
+        self.assertNotIn("aggs", search.to_dict())
+        self.assertEqual(view.precomputed_facets, facets)
+
+        search_cache.bump_generation()
+        search = self.backend.filter_queryset(
+            request, ToolDocument.search(), ToolDocumentViewSet()
+        )
+        self.assertIn("aggs", search.to_dict())
+
+    def test_get_facets(self):
+        """Facet counts are stored once and then reused."""
+        facets = {"wiki": {"buckets": []}}
+        page = SimpleNamespace(facets=SimpleNamespace(_d_=facets))
+        paginator = Pagination()
+        paginator.view = SimpleNamespace(
+            precomputed_facets=None, facets_cache_key="facets"
+        )
+        self.assertEqual(paginator.get_facets(page), facets)
+        self.assertEqual(cache.get("facets"), facets)
+
+        paginator.view = SimpleNamespace(precomputed_facets=facets)
+        self.assertEqual(paginator.get_facets(SimpleNamespace()), facets)
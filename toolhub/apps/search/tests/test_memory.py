@@ -0,0 +1,304 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.test import override_settings
+
+from django_elasticsearch_dsl_drf.viewsets import BaseDocumentViewSet
+
+from elasticsearch.exceptions import ConnectionError
+
+from rest_framework.test import APIClient
+
+from toolhub.apps.toolinfo.models import Tool
+from toolhub.apps.user.models import ToolhubUser
+
+from .. import memory
+from ..documents import ToolDocument
+
+
+def run_on_commit(func):
+    """Run an on_commit callback immediately."""
+    func()
+
+
+class ParseQueryTest(TestCase):
+    """Test parse_query."""
+
+    def test_parse(self):
+        """Search strings are split into clauses."""
+        self.assertEqual(
+            memory.parse_query('Foo +bar -baz "two words" pre* - !!'),
+            [
+                memory.Clause(memory.SHOULD, ["foo"], False),
+                memory.Clause(memory.MUST, ["bar"], False),
+                memory.Clause(memory.MUST_NOT, ["baz"], False),
+                memory.Clause(memory.SHOULD, ["two", "words"], False),
+                memory.Clause(memory.SHOULD, ["pre"], True),
+            ],
+        )
+
+
+@mock.patch("django.db.transaction.on_commit", run_on_commit)
+class MemoryIndexTest(TestCase):
+    """Test MemoryIndex."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Setup for all tests in this TestCase."""
+        cls.user = ToolhubUser.objects.create_user(  # nosec: B106
+            username="Memory Tester", password="unused"
+        )
+        cls.make_tool(
+            "citation-hunt",
+            "Find unsourced statements in Wikipedia",
+            keywords=["citations", "wikipedia"],
+            for_wikis=["enwiki", "dewiki"],
+            license="MIT",
+            tool_type="web app",
+        )
+        cls.make_tool(
+            "citation-bot",
+            "Bot that expands citations and citation templates",
+            keywords=["citations", "bot"],
+            for_wikis=["enwiki"],
+            license="GPL-3.0",
+            tool_type="bot",
+        )
+        cls.make_tool(
+            "map-maker",
+            "Draw maps of Wikidata items",
+            keywords=["maps"],
+            tool_type="web app",
+        )
+
+    @classmethod
+    def make_tool(cls, name, description, **kwargs):
+        """Create a tool."""
+        return Tool.objects.create(
+            name=name,
+            title=name.replace("-", " ").title(),
+            description=description,
+            url="https://example.org/{}".format(name),
+            created_by=cls.user,
+            **kwargs,
+        )
+
+    def setUp(self):
+        """Setup for each test."""
+        self.index = memory.MemoryIndex(ToolDocument)
+        self.index.build()
+
+    def names(self, text=None, **kwargs):
+        """Get the names of the tools found by a search."""
+        hits, _ = self.index.search(text, **kwargs)
+        return [source["name"] for _, _, source in hits]
+
+    def test_build(self):
+        """All tools are loaded."""
+        self.assertEqual(len(self.index), 3)
+        self.assertFalse(self.index.is_stale())
+        with override_settings(SEARCH_MEMORY_MAX_AGE=-1):
+            self.assertTrue(self.index.is_stale())
+
+    def test_search(self):
+        """Searches match words and rank them with BM25."""
+        self.assertEqual(
+            self.names("citation", ordering=["_score"]),
+            ["citation-bot", "citation-hunt"],
+        )
+        self.assertEqual(
+            self.names("wikidata maps", ordering=["_score"]), ["map-maker"]
+        )
+        self.assertEqual(self.names("nothing"), [])
+        self.assertEqual(
+            sorted(self.names("citation* -bot")), ["citation-hunt"]
+        )
+        self.assertEqual(self.names("+maps wikipedia"), ["map-maker"])
+        self.assertEqual(self.names('"statements in"'), ["citation-hunt"])
+        self.assertEqual(len(self.names("-bot")), 2)
+
+    def test_filters(self):
+        """Filters use FilteringFilterBackend options."""
+
+        def names(field, lookup, *values):
+            options = {"field": field, "lookup": lookup, "values": values}
+            return sorted(self.names(filters=[memory.build_filter(options)]))
+
+        self.assertEqual(
+            names("for_wikis.keyword", "term", "enwiki", "dewiki"),
+            ["citation-hunt"],
+        )
+        self.assertEqual(
+            names("for_wikis.keyword", None, "enwiki", "dewiki"),
+            ["citation-bot", "citation-hunt"],
+        )
+        self.assertEqual(
+            names("license.keyword", "isnull", "true"), ["map-maker"]
+        )
+        self.assertEqual(
+            names("license.keyword", "exclude", "MIT__GPL-3.0"),
+            ["map-maker"],
+        )
+        self.assertEqual(names("name", "prefix", "hun"), ["citation-hunt"])
+        self.assertEqual(names("name", "term", "maker"), ["map-maker"])
+        self.assertEqual(
+            names("name", "wildcard", "*ta*"),
+            ["citation-bot", "citation-hunt"],
+        )
+
+    def test_ordering(self):
+        """Hits are sorted by Elasticsearch sort parameters."""
+        self.assertEqual(
+            self.names(ordering=["-name.keyword"]),
+            ["map-maker", "citation-hunt", "citation-bot"],
+        )
+        self.assertEqual(
+            self.names(ordering=[{"license.keyword": {"order": "desc"}}]),
+            ["citation-hunt", "citation-bot", "map-maker"],
+        )
+
+    def test_facets(self):
+        """Facets have the shape of Elasticsearch aggregations."""
+        _, facets = self.index.search(
+            "citation",
+            facets={
+                "wiki": {
+                    "field": "for_wikis.keyword",
+                    "options": {"meta": {"param": "wiki__term"}, "size": 1},
+                },
+                "license": {
+                    "field": "license.keyword",
+                    "options": {"missing": "--"},
+                    "global": True,
+                },
+            },
+        )
+        self.assertEqual(
+            facets["_filter_wiki"],
+            {
+                "doc_count": 2,
+                "wiki": {
+                    "doc_count_error_upper_bound": 0,
+                    "sum_other_doc_count": 1,
+                    "buckets": [{"key": "enwiki", "doc_count": 2}],
+                    "meta": {"param": "wiki__term"},
+                },
+            },
+        )
+        self.assertEqual(
+            facets["_filter_license"]["license"]["buckets"],
+            [
+                {"key": "--", "doc_count": 1},
+                {"key": "GPL-3.0", "doc_count": 1},
+                {"key": "MIT", "doc_count": 1},
+            ],
+        )
+
+    def test_signals(self):
+        """Saved and deleted tools are updated from model signals."""
+        with mock.patch.object(memory, "memory_index", self.index):
+            with mock.patch(
+                "toolhub.apps.search.signals.memory_index", self.index
+            ):
+                tool = self.make_tool("new-tool", "A brand new tool")
+                self.assertEqual(self.names("brand"), ["new-tool"])
+
+                tool.description = "Renamed"
+                tool.save()
+                self.assertEqual(self.names("brand"), [])
+                self.assertEqual(self.names("renamed"), ["new-tool"])
+
+                tool.delete()
+                self.assertEqual(self.names("renamed"), [])
+                self.assertEqual(len(self.index), 3)
+
+
+class ToolDocumentViewSetMemoryTest(TestCase):
+    """Test in-process search through ToolDocumentViewSet."""
+
+    url = "/api/search/tools/"
+
+    @classmethod
+    def setUpTestData(cls):
+        """Setup for all tests in this TestCase."""
+        cls.user = ToolhubUser.objects.create_user(  # nosec: B106
+            username="Memory Tester", password="unused"
+        )
+        for name in ("alpha", "beta", "gamma"):
+            Tool.objects.create(
+                name=name,
+                title=name,
+                description="Test tool {}".format(name),
+                url="https://example.org/{}".format(name),
+                license="MIT" if name != "gamma" else None,
+                created_by=cls.user,
+            )
+
+    def setUp(self):
+        """Setup for each test."""
+        cache.clear()
+        self.client = APIClient()
+        patcher = mock.patch.object(
+            memory, "memory_index", memory.MemoryIndex(ToolDocument)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(SEARCH_BACKEND="memory")
+    def test_list(self):
+        """Responses have the same shape as Elasticsearch responses."""
+        response = self.client.get(
+            self.url, {"license": "MIT", "ordering": "-name", "page_size": 1}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        self.assertIn("page=2", response.data["next"])
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["name"], "beta")
+        self.assertEqual(
+            response.data["results"][0]["created_by"]["username"],
+            self.user.username,
+        )
+        facet = response.data["facets"]["_filter_license"]["license"]
+        self.assertEqual(facet["buckets"], [{"key": "MIT", "doc_count": 2}])
+        self.assertEqual(facet["meta"]["param"], "license__term")
+        self.assertNotIn("ETag", response)
+
+        response = self.client.get(self.url, {"q": "gamma"})
+        self.assertEqual(
+            [tool["name"] for tool in response.data["results"]], ["gamma"]
+        )
+
+    def test_fallback(self):
+        """Searches fall back to the in-process index when ES is down."""
+        with mock.patch.object(
+            BaseDocumentViewSet,
+            "list",
+            side_effect=ConnectionError("N/A", "down", None),
+        ):
+            with self.assertLogs("toolhub.apps.search.views", "ERROR"):
+                response = self.client.get(self.url, {"q": "tool"})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["count"], 3)
+
+            with override_settings(SEARCH_FALLBACK=False):
+                with self.assertRaises(ConnectionError):
+                    self.client.get(self.url, {"q": "tool"})
@@ -0,0 +1,172 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+from unittest import mock
+
+from django.test import TestCase
+from django.test import override_settings
+
+from elasticsearch.exceptions import ConnectionError
+
+from toolhub.apps.toolinfo.models import Tool
+from toolhub.apps.user.models import ToolhubUser
+
+from ..documents import ToolDocument
+from ..queue import IndexQueue
+from ..queue import index_queue
+
+
+def run_on_commit(func):
+    """Run an on_commit callback immediately."""
+    func()
+
+
+@mock.patch("django.db.transaction.on_commit", run_on_commit)
+class IndexQueueTest(TestCase):
+    """Test IndexQueue."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Setup for all tests in this TestCase."""
+        cls.user = ToolhubUser.objects.create_user(  # nosec: B106
+            username="Queue Tester", password="unused"
+        )
+        cls.tools = [
+            Tool.objects.create(
+                name="tool-{}".format(i),
+                title="Tool {}".format(i),
+                description="Test tool",
+                url="https://example.org/{}".format(i),
+                created_by=cls.user,
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        """Setup for each test."""
+        patcher = mock.patch.object(ToolDocument, "update")
+        self.update = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sent(self):
+        """List the (action, pks) of each update call."""
+        return [
+            (
+                call[1].get("action", IndexQueue.INDEX),
+                sorted(instance.pk for instance in call[0][0]),
+            )
+            for call in self.update.call_args_list
+        ]
+
+    def test_coalesce(self):
+        """Repeated changes are sent once, using the latest action."""
+        queue = IndexQueue()
+        pks = [tool.pk for tool in self.tools]
+        queue.add(Tool, pks, queue.INDEX)
+        queue.add(Tool, pks[:1], queue.INDEX)
+        queue.add(Tool, pks[2:], queue.DELETE)
+        self.assertEqual(len(queue), 3)
+
+        queue.flush()
+
+        self.assertEqual(len(queue), 0)
+        self.assertEqual(
+            self.sent(),
+            [(queue.INDEX, pks[:2]), (queue.DELETE, pks[2:])],
+        )
+
+    def test_missing_instances_deleted(self):
+        """Queued instances that are gone are removed from the index."""
+        queue = IndexQueue()
+        self.tools[1].delete()
+        queue.add(Tool, [tool.pk for tool in self.tools], queue.INDEX)
+
+        queue.flush()
+
+        self.assertEqual(
+            self.sent(),
+            [
+                (queue.INDEX, [self.tools[0].pk, self.tools[2].pk]),
+                (queue.DELETE, [self.tools[1].pk]),
+            ],
+        )
+
+    @override_settings(ELASTICSEARCH_DSL_QUEUE_BATCH_SIZE=2)
+    def test_batches(self):
+        """Changes are sent in batches once enough have been queued."""
+        queue = IndexQueue()
+        pks = [tool.pk for tool in self.tools]
+        queue.add(Tool, pks[:1], queue.INDEX)
+        self.update.assert_not_called()
+
+        queue.add(Tool, pks[1:], queue.INDEX)
+
+        self.assertEqual(
+            self.sent(),
+            [(queue.INDEX, pks[:2]), (queue.INDEX, pks[2:])],
+        )
+
+    @override_settings(ELASTICSEARCH_DSL_QUEUE_RETRIES=1)
+    def test_retry(self):
+        """Failed batches are retried on the next flush, then dropped."""
+        queue = IndexQueue()
+        queue.add(Tool, [self.tools[0].pk], queue.INDEX)
+        self.update.side_effect = ConnectionError("down")
+
+        with self.assertLogs("toolhub.apps.search.queue", "WARNING"):
+            queue.flush()
+        self.assertEqual(len(queue), 1)
+
+        with self.assertLogs("toolhub.apps.search.queue", "ERROR") as logs:
+            queue.flush()
+        self.assertEqual(len(queue), 0)
+        self.assertIn("Giving up", logs.output[-1])
+
+        self.update.side_effect = None
+        queue.add(Tool, [self.tools[0].pk], queue.INDEX)
+        queue.flush()
+        self.assertEqual(len(queue), 0)
+
+
+@override_settings(ELASTICSEARCH_DSL_AUTOSYNC=True)
+@override_settings(ELASTICSEARCH_DSL_DEFERRED=True)
+class DeferredSignalProcessorTest(TestCase):
+    """Test SignalProcessor with deferred indexing."""
+
+    def test_changes_queued(self):
+        """Saves and deletes are queued instead of sent."""
+        user = ToolhubUser.objects.create_user(  # nosec: B106
+            username="Queue Tester", password="unused"
+        )
+        with mock.patch.object(ToolDocument, "update") as update:
+            with mock.patch.object(index_queue, "add") as add:
+                tool = Tool.objects.create(
+                    name="tool",
+                    title="Tool",
+                    description="Test tool",
+                    url="https://example.org/",
+                    created_by=user,
+                )
+                tool.delete()
+            update.assert_not_called()
+        self.assertEqual(
+            [call[0] for call in add.call_args_list],
+            [
+                (Tool, [tool.pk], index_queue.INDEX),
+                (Tool, [tool.pk], index_queue.DELETE),
+            ],
+        )
@@ -0,0 +1,160 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+from unittest import mock
+
+from django.test import TestCase
+
+from elasticsearch_dsl import Index
+
+from toolhub.apps.toolinfo.models import Tool
+from toolhub.apps.user.models import ToolhubUser
+
+from .. import reindex
+from ..documents import ToolDocument
+
+
+class ReindexerTest(TestCase):
+    """Test Reindexer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Setup for all tests in this TestCase."""
+        cls.user = ToolhubUser.objects.create_user(  # nosec: B106
+            username="Reindex Tester", password="unused"
+        )
+        cls.tools = [cls.make_tool("tool-{}".format(i)) for i in range(3)]
+
+    @classmethod
+    def make_tool(cls, name):
+        """Create a tool."""
+        return Tool.objects.create(
+            name=name,
+            title=name,
+            description="Test tool",
+            url="https://example.org/{}".format(name),
+            created_by=cls.user,
+        )
+
+    def setUp(self):
+        """Setup for each test."""
+        self.es = mock.MagicMock()
+        self.bulk = []
+        self.write_during_load = False
+        patches = [
+            mock.patch.object(
+                ToolDocument, "_get_connection", return_value=self.es
+            ),
+            mock.patch.object(Index, "create"),
+            mock.patch.object(reindex, "parallel_bulk", self.parallel_bulk),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def parallel_bulk(self, es, actions, **kwargs):
+        """Record the actions of a bulk request."""
+        self.assertIs(es, self.es)
+        actions = list(actions)
+        self.bulk.append(
+            [(a["_op_type"], a["_index"], a["_id"]) for a in actions]
+        )
+        if self.write_during_load and len(self.bulk) == 1:
+            # Simulate writes to the live index during the initial load
+            self.tools[0].delete()
+            self.make_tool("tool-new")
+        return [(True, {}) for _ in actions]
+
+    def test_run(self):
+        """Build a new index, replay changes and move the alias."""
+        self.es.indices.exists_alias.return_value = True
+        self.es.indices.get_alias.return_value = {"toolhub_tools-old": {}}
+        reindexer = reindex.Reindexer(ToolDocument, chunk_size=2)
+        self.write_during_load = True
+
+        name, count = reindexer.run()
+
+        self.assertTrue(name.startswith("toolhub_tools-"))
+        self.assertEqual(count, 3)
+        new = Tool.objects.get(name="tool-new")
+        loaded, replay_index, replay_delete = self.bulk[:3]
+        self.assertEqual(
+            loaded, [("index", name, tool.pk) for tool in self.tools]
+        )
+        self.assertIn(("index", name, new.pk), replay_index)
+        self.assertEqual(replay_delete, [("delete", name, self.tools[0].pk)])
+        self.es.indices.update_aliases.assert_called_once_with(
+            body={
+                "actions": [
+                    {"add": {"index": name, "alias": "toolhub_tools"}},
+                    {
+                        "remove": {
+                            "index": "toolhub_tools-old",
+                            "alias": "toolhub_tools",
+                        }
+                    },
+                ]
+            }
+        )
+        self.es.indices.delete.assert_called_once_with(
+            index="toolhub_tools-old"
+        )
+
+    def test_load_queries(self):
+        """Creators are loaded along with the tools."""
+        reindexer = reindex.Reindexer(ToolDocument, chunk_size=2)
+        with self.assertNumQueries(1):
+            count = reindexer.load(
+                "toolhub_tools-new",
+                reindexer.doc().get_queryset().iterator(chunk_size=2),
+            )
+        self.assertEqual(count, 3)
+
+    def test_replace_concrete_index(self):
+        """An index named like the alias is removed by the swap."""
+        self.es.indices.exists_alias.return_value = False
+        self.es.indices.exists.return_value = True
+        reindexer = reindex.Reindexer(ToolDocument)
+
+        self.assertEqual(reindexer.swap("toolhub_tools-new"), [])
+        self.es.indices.update_aliases.assert_called_once_with(
+            body={
+                "actions": [
+                    {
+                        "add": {
+                            "index": "toolhub_tools-new",
+                            "alias": "toolhub_tools",
+                        }
+                    },
+                    {"remove_index": {"index": "toolhub_tools"}},
+                ]
+            }
+        )
+
+    def test_failed_load(self):
+        """The new index is deleted if documents are rejected."""
+        reindexer = reindex.Reindexer(ToolDocument)
+        with mock.patch.object(
+            reindex,
+            "parallel_bulk",
+            return_value=[(False, {"index": {"status": 400}})],
+        ):
+            with self.assertRaises(reindex.ReindexError):
+                reindexer.run()
+        name = self.es.indices.delete.call_args[1]["index"]
+        self.assertTrue(name.startswith("toolhub_tools-"))
+        self.es.indices.update_aliases.assert_not_called()
@@ -15,6 +15,15 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import collections
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.constants import LOOKUP_SEP
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.utils.translation import gettext_lazy as _
 
 from django_elasticsearch_dsl_drf import constants
@@ -25,11 +34,25 @@ from django_elasticsearch_dsl_drf.viewsets import BaseDocumentViewSet
 from drf_spectacular.utils import extend_schema
 from drf_spectacular.utils import extend_schema_view
 
+from elasticsearch.exceptions import (
+    ConnectionError as ElasticsearchConnectionError,
+)
+
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from toolhub.pagination import CustomPagination
+
+from . import cache as search_cache
+from . import memory
 from .documents import ToolDocument
 from .schema import FACET_RESPONSE
 from .serializers import ToolDocumentSerializer
 
 
+logger = logging.getLogger(__name__)
+
+
 class QueryStringFilterBackend(  # noqa: W0223
     filter_backends.BaseSearchFilterBackend
 ):
@@ -41,8 +64,86 @@ class QueryStringFilterBackend(  # noqa: W0223
     ]
 
 
+class PrecomputedFacetsFilterBackend(  # noqa: W0223
+    filter_backends.FacetedSearchFilterBackend
+):
+    """Faceted search backend which reuses facet counts between searches.
+
+    Facet counts do not depend on paging or ordering. Searches without a
+    search string and with at most one facet filter value share their facet
+    counts with every other search with the same filter. The counts from
+    the first such search after each index change are cached, and later
+    searches only ask Elasticsearch for their page of hits.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        """Add aggregations unless cached facet counts can be used."""
+        variant = None
+        if search_cache.is_enabled():
+            variant = self.get_facet_variant(request, view)
+        if variant is not None:
+            key = search_cache.facets_key(
+                search_cache.get_generation(), variant
+            )
+            view.precomputed_facets = cache.get(key)
+            if view.precomputed_facets is not None:
+                return queryset
+            view.facets_cache_key = key
+        return super().filter_queryset(request, queryset, view)
+
+    def get_facet_variant(self, request, view):
+        """Get the params of a search that can share facet counts.
+
+        :returns: list of [param, value] pairs for the filter and the
+            requested facets, or None if the search has a search string or
+            more than one filter value
+        """
+        params = request.query_params
+        if QueryStringFilterBackend.search_param in params:
+            return None
+        variant = []
+        for name, values in params.lists():
+            field = name.split(LOOKUP_SEP)[0]
+            if field not in view.filter_fields:
+                continue
+            if field not in view.faceted_search_fields:
+                return None
+            variant.extend([name, value] for value in values)
+        if len(variant) > 1:
+            return None
+        variant.extend(
+            [self.faceted_search_param, facet]
+            for facet in sorted(
+                set(self.get_faceted_search_query_params(request))
+            )
+        )
+        return variant
+
+
 class Pagination(pagination.QueryFriendlyPageNumberPagination):
-    """Custom pagination for OpenAPI response generation."""
+    """Custom pagination for OpenAPI response generation.
+
+    Also uses and populates the facet counts cached by
+    PrecomputedFacetsFilterBackend.
+    """
+
+    view = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate a queryset."""
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_facets(self, page=None):
+        """Get facets, preferring precomputed counts."""
+        facets = getattr(self.view, "precomputed_facets", None)
+        if facets is not None:
+            return facets
+        facets = super().get_facets(page)
+        key = getattr(self.view, "facets_cache_key", None)
+        if facets is not None and key is not None:
+            cache.set(key, facets, settings.SEARCH_FACETS_CACHE_TIMEOUT)
+        return facets
 
     def get_paginated_response_schema(self, schema):
         """Add facets to schema."""
@@ -60,6 +161,26 @@ class Pagination(pagination.QueryFriendlyPageNumberPagination):
         }
 
 
+class MemoryPagination(CustomPagination):
+    """Paginate in-process search results like Pagination."""
+
+    facets = None
+
+    def get_paginated_response(self, data):
+        """Add facets to the response."""
+        return Response(
+            collections.OrderedDict(
+                [
+                    ("count", self.page.paginator.count),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("facets", self.facets),
+                    ("results", data),
+                ]
+            )
+        )
+
+
 def build_term_facet_options(term, missing="--", multi=False):
     """Build options for a term facet.
 
@@ -98,7 +219,7 @@ class ToolDocumentViewSet(BaseDocumentViewSet):
     filter_backends = [
         QueryStringFilterBackend,
         filter_backends.DefaultOrderingFilterBackend,
-        filter_backends.FacetedSearchFilterBackend,
+        PrecomputedFacetsFilterBackend,
         filter_backends.FilteringFilterBackend,
         filter_backends.OrderingFilterBackend,
     ]
@@ -210,3 +331,101 @@ class ToolDocumentViewSet(BaseDocumentViewSet):
             "enabled": True,
         },
     }
+
+    def list(self, request, *args, **kwargs):  # noqa: A003
+        """Search, reusing cached results for the same index generation.
+
+        Responses are cached for ``settings.SEARCH_CACHE_TIMEOUT`` seconds
+        and carry an ETag which changes whenever the index is written to.
+        Responses from the in-process index are neither cached nor tagged,
+        so that clients do not keep them once Elasticsearch is back. Nothing
+        is cached or tagged when the cache is not shared between processes.
+        """
+        if settings.SEARCH_BACKEND == "memory":
+            return self.memory_list(request)
+        if not search_cache.is_enabled():
+            return self.search_list(request, *args, **kwargs)[0]
+        generation = search_cache.get_generation()
+        digest = search_cache.params_digest(request)
+        etag = quote_etag("{}-{}".format(generation, digest[:16]))
+        resp = get_conditional_response(request, etag=etag)
+        if resp is None:
+            key = search_cache.response_key(generation, digest)
+            data = cache.get(key)
+            if data is not None:
+                resp = Response(data)
+            else:
+                resp, from_elasticsearch = self.search_list(
+                    request, *args, **kwargs
+                )
+                if not from_elasticsearch:
+                    return resp
+                if resp.status_code == 200:
+                    # Store plain JSON types rather than search DSL objects
+                    data = json.loads(json.dumps(resp.data, cls=JSONEncoder))
+                    cache.set(key, data, settings.SEARCH_CACHE_TIMEOUT)
+        resp["ETag"] = etag
+        return resp
+
+    def search_list(self, request, *args, **kwargs):
+        """Search Elasticsearch, falling back to the in-process index.
+
+        :returns: (response, True if Elasticsearch answered the search)
+        :rtype: tuple
+        """
+        try:
+            return super().list(request, *args, **kwargs), True
+        except ElasticsearchConnectionError:
+            if not settings.SEARCH_FALLBACK:
+                raise
+            logger.exception(
+                "Elasticsearch unavailable; using in-process search"
+            )
+            return self.memory_list(request), False
+
+    def memory_list(self, request):
+        """Search the in-process index instead of Elasticsearch.
+
+        The request is parsed by the same filter backends that build the
+        Elasticsearch query, so the two return the same kind of response.
+        """
+        index = memory.memory_index
+        index.ensure_built()
+
+        text = QueryStringFilterBackend().get_search_query_params(request)
+        filtering = filter_backends.FilteringFilterBackend()
+        filters = filtering.get_filter_query_params(request, self)
+        ordering = filter_backends.OrderingFilterBackend()
+        sort = ordering.get_ordering_query_params(request, self)
+        if not sort:
+            ordering = filter_backends.DefaultOrderingFilterBackend()
+            sort = ordering.get_ordering_query_params(request, self)
+        faceting = PrecomputedFacetsFilterBackend()
+        requested = faceting.get_faceted_search_query_params(request)
+        facets = {
+            name: facet
+            for name, facet in faceting.prepare_faceted_search_fields(
+                self
+            ).items()
+            if facet["enabled"] or name in requested
+        }
+
+        hits, counts = index.search(
+            # Like SimpleQueryStringQueryBackend, use the first search only
+            text=text[0] if text else None,
+            filters=[memory.build_filter(opts) for opts in filters.values()],
+            ordering=sort,
+            facets=facets,
+        )
+
+        paginator = MemoryPagination()
+        paginator.facets = counts
+        page = paginator.paginate_queryset(hits, request, view=self)
+        docs = [
+            self.document.from_es(
+                {"_id": uid, "_score": score, "_source": source}
+            )
+            for uid, score, source in page
+        ]
+        serializer = self.get_serializer(docs, many=True)
+        return paginator.get_paginated_response(serializer.data)
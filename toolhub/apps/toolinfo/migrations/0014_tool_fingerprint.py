@@ -0,0 +1,83 @@
+# Generated by Django 2.2.24 on 2026-10-18 19:32
+
+import hashlib
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import migrations, models
+
+from toolhub.fields import JSONSchemaField
+
+
+# Frozen copy of toolinfo.models.content_fingerprint() as of this migration.
+# Tools whose fingerprint no longer matches the live implementation are
+# simply saved again the next time their toolinfo is imported.
+NON_CONTENT_FIELDS = {
+    "id",
+    "deleted",
+    "fingerprint",
+    "created_by",
+    "created_date",
+    "modified_by",
+    "modified_date",
+}
+BATCH_SIZE = 500
+
+
+def fingerprint(fields, tool):
+    """Compute the content fingerprint of a tool."""
+    content = {}
+    for field in fields:
+        value = getattr(tool, field.name)
+        if value == "":
+            value = None
+        elif value is not None and not isinstance(field, JSONSchemaField):
+            try:
+                value = field.to_python(value)
+            except ValidationError:
+                pass
+        content[field.name] = value
+    return hashlib.sha256(
+        json.dumps(
+            content,
+            default=str,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            sort_keys=True,
+        ).encode("utf-8")
+    ).hexdigest()
+
+
+def backfill_fingerprints(apps, schema_editor):
+    """Compute the content fingerprint of existing tools."""
+    Tool = apps.get_model("toolinfo", "Tool")
+    fields = [
+        field
+        for field in Tool._meta.concrete_fields
+        if field.name not in NON_CONTENT_FIELDS
+    ]
+    tools = []
+    for tool in Tool.objects.iterator(chunk_size=BATCH_SIZE):
+        tool.fingerprint = fingerprint(fields, tool)
+        tools.append(tool)
+        if len(tools) == BATCH_SIZE:
+            Tool.objects.bulk_update(tools, ["fingerprint"])
+            tools = []
+    if tools:
+        Tool.objects.bulk_update(tools, ["fingerprint"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('toolinfo', '0013_update_help_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tool',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Fingerprint of the toolinfo content of this tool.', max_length=64),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
@@ -16,14 +16,19 @@
 # You should have received a copy of the GNU General Public License
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
 import functools
+import hashlib
+import json
 import logging
 
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core import validators
 from django.core.exceptions import ValidationError
+from django.db import Error
 from django.db import models
+from django.db import transaction
 from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
@@ -42,6 +47,9 @@ from toolhub.apps.versioned.models import RevisionMetadata
 from toolhub.fields import BlankAsNullCharField
 from toolhub.fields import BlankAsNullTextField
 from toolhub.fields import JSONSchemaField
+from toolhub.fields import LoadedJSONMixin
+from toolhub.signals import post_bulk_create
+from toolhub.signals import post_bulk_softdelete
 
 from . import schema
 from .utils import language_data
@@ -54,11 +62,72 @@ from .validators import validate_url_mutilingual_list
 logger = logging.getLogger(__name__)
 
 
+# Bookkeeping fields which are not part of a tool's toolinfo content.
+NON_CONTENT_FIELDS = {
+    "id",
+    "deleted",
+    "fingerprint",
+    "created_by",
+    "created_date",
+    "modified_by",
+    "modified_date",
+}
+
+
 def name_to_slug(name):
     """Convert a tool name into a slug value."""
     return slugify(name, allow_unicode=True)
 
 
+@functools.lru_cache(maxsize=None)
+def content_fields(model):
+    """List the fields of a model which hold toolinfo content."""
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if field.name not in NON_CONTENT_FIELDS
+    ]
+
+
+def content_fingerprint(model, values):
+    """Compute a fingerprint of toolinfo content.
+
+    Fields missing from `values` are treated as holding their default
+    value and empty strings are treated as null, so a complete toolinfo
+    record has the same fingerprint as the tool that would be stored
+    from it.
+
+    :param model: Tool model class
+    :param values: Field values keyed by field name
+    :type values: dict
+    :returns: sha256 hex digest
+    :rtype: str
+    """
+    content = {}
+    for field in content_fields(model):
+        if field.name in values:
+            value = values[field.name]
+        else:
+            value = field.get_default()
+        if value == "":
+            value = None
+        elif value is not None and not isinstance(field, JSONSchemaField):
+            try:
+                value = field.to_python(value)
+            except ValidationError:
+                pass
+        content[field.name] = value
+    return hashlib.sha256(
+        json.dumps(
+            content,
+            default=str,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            sort_keys=True,
+        ).encode("utf-8")
+    ).hexdigest()
+
+
 class ToolManager(SafeDeleteManager):
     """Custom manager for Tool models."""
 
@@ -180,15 +249,7 @@ class ToolManager(SafeDeleteManager):
         """
         if not isinstance(code, str):
             return unknown
-        code = code.lower()
-        if language_data.is_known(code):
-            return code
-        if "-" in code:
-            parts = code.split("-")
-            for parent in ["-".join(parts[:-x]) for x in range(1, len(parts))]:
-                if language_data.is_known(parent):
-                    return parent
-        return unknown
+        return language_data.normalize_code(code) or unknown
 
     def _normalize_url_multilingual(self, values, default):
         """Normalize incoming url_multilingual formatting."""
@@ -267,17 +328,10 @@ class ToolManager(SafeDeleteManager):
         :returns: (tool (Tool), was_created (boolean), has_changes (boolean))
         :rtype: tuple
         """
-        record["created_by"] = creator
-        record["modified_by"] = creator
-        record["origin"] = origin
-
-        record = self.normalize_toolinfo(record)
+        record = self._prepare_toolinfo(record, creator, origin)
 
         with reversion.create_revision():
-            reversion.add_meta(RevisionMetadata)
-            reversion.set_user(creator)
-            if comment is not None:
-                reversion.set_comment(comment)
+            self._describe_revision(creator, comment)
 
             with auditlog_context(creator, comment):
                 tool, created, revived = self.get_create_or_revive(
@@ -285,54 +339,284 @@ class ToolManager(SafeDeleteManager):
                 )
             if created:
                 return tool, created, False
+            if not revived and tool.fingerprint == content_fingerprint(
+                self.model, record
+            ):
+                return tool, False, False
 
-            # Compare input to prior model and decide if anything of note has
-            # changed. Revived models are always considered changed.
-            has_changes = revived
-
-            for key, value in record.items():
-                if key in self.VARIANT_FIELDS:
-                    continue
-
-                prior = getattr(tool, key)
-
-                if value != prior:
-                    if not revived and key in self.INVARIANT_FIELDS:
-                        # Invariant fields are allowed to change when reviving
-                        # a deleted record.
-                        raise ValidationError(
-                            _(
-                                "Changing %(key)s after initial "
-                                "object creation is not allowed"
-                            ),
-                            code="invariant",
-                            params={"key": key},
-                        )
-
-                    if value == "" and prior is None:
-                        # T293103: guard against blank as null storage
-                        # conversion causing infinite empty diffs
-                        continue
-
-                    setattr(tool, key, value)
-                    has_changes = True
-                    logger.debug(
-                        "%s: Updating %s to %s (was %s)",
-                        record["name"],
-                        key,
-                        value,
-                        prior,
-                    )
+            has_changes = self._apply_toolinfo(tool, record, revived)
             if has_changes:
                 with auditlog_context(creator, comment):
                     tool.save()
 
         return tool, False, has_changes
 
+    def from_toolinfo_many(self, records, creator, origin, comment=None):
+        """Create or update many Tools using data from toolinfo records.
+
+        Batch version of `from_toolinfo`. The content fingerprints of
+        existing tools, including soft deleted tools, are loaded with a
+        single query and only tools whose fingerprint differs from their
+        record are loaded in full. Tools which are unchanged are returned
+        with only their id, name, fingerprint, and deleted fields loaded.
+        New tools are inserted with a single query and only changed tools
+        are saved. Each created or changed tool still gets its own revision
+        and LogEntry.
+
+        :param self: This manager
+        :type self: ToolManager
+        :param records: Toolinfo records. May be mutated as a side effect.
+        :type records: list(dict)
+        :param creator: User creating/updating the records
+        :type creator: settings.AUTH_USER_MODEL
+        :param origin: Origin of this submission
+        :type origin: str
+        :param comment: User provided comment for this change
+        :type comment: str
+        :returns: (tool (Tool), was_created (boolean), has_changes (boolean),
+            error (Exception)) for each record in the order given. Tool is
+            None and error is set for records that could not be stored.
+        :rtype: list(tuple)
+        """
+        records = [
+            self._prepare_toolinfo(record, creator, origin)
+            for record in records
+        ]
+        results = [None] * len(records)
+        fingerprints = {}
+        for record in records:
+            fingerprints.setdefault(
+                record["name"], content_fingerprint(self.model, record)
+            )
+        existing = {
+            tool.name: tool
+            for tool in self.all_with_deleted()
+            .filter(name__in=fingerprints)
+            .only("id", "name", "fingerprint", "deleted")
+        }
+        changed = [
+            tool.pk
+            for tool in existing.values()
+            if tool.deleted is not None
+            or tool.fingerprint != fingerprints[tool.name]
+        ]
+        if changed:
+            existing.update(
+                (tool.name, tool)
+                for tool in self.all_with_deleted().filter(pk__in=changed)
+            )
+        to_create = {}
+        to_save = []
+        names = set()
+
+        for idx, record in enumerate(records):
+            name = record["name"]
+            if name in names:
+                results[idx] = self._failed_result(
+                    ValidationError(
+                        _("Duplicate toolinfo record for %(name)s"),
+                        code="duplicate",
+                        params={"name": name},
+                    )
+                )
+                continue
+            names.add(name)
+
+            tool = existing.get(name)
+            if tool is None:
+                to_create[name] = idx
+                continue
+            if tool.deleted is None and tool.fingerprint == fingerprints[name]:
+                results[idx] = (tool, False, False, None)
+                continue
+
+            revived = tool.deleted is not None
+            # Mark as undeleted but do not save
+            tool.deleted = None
+            try:
+                has_changes = self._apply_toolinfo(tool, record, revived)
+            except (ValidationError, TypeError, ValueError) as e:
+                results[idx] = self._failed_result(e)
+                continue
+            if has_changes:
+                to_save.append((idx, tool))
+            else:
+                results[idx] = (tool, False, False, None)
+
+        with auditlog_context(creator, comment):
+            if to_create:
+                try:
+                    created = self._bulk_create_toolinfo(
+                        [records[idx] for idx in to_create.values()],
+                        creator,
+                        comment,
+                    )
+                except Error:
+                    # The failed insert was rolled back to its savepoint.
+                    # Retry one record at a time so that a single bad
+                    # record does not fail the whole batch.
+                    logger.warning(
+                        "Bulk insert of new tools failed; "
+                        "inserting them one at a time",
+                        exc_info=True,
+                    )
+                    created = {}
+                    for idx in to_create.values():
+                        try:
+                            created.update(
+                                self._bulk_create_toolinfo(
+                                    [records[idx]], creator, comment
+                                )
+                            )
+                        except Error as e:
+                            results[idx] = self._failed_result(e)
+                for tool in created.values():
+                    results[to_create[tool.name]] = (tool, True, False, None)
+
+            for idx, tool in to_save:
+                try:
+                    with reversion.create_revision():
+                        self._describe_revision(creator, comment)
+                        tool.save()
+                except Error as e:
+                    results[idx] = self._failed_result(e)
+                else:
+                    results[idx] = (tool, False, True, None)
+
+        return results
+
+    def _bulk_create_toolinfo(self, records, creator, comment):
+        """Insert new Tools and create a revision for each of them.
+
+        :returns: Created tools keyed by name
+        :rtype: dict
+        """
+        valid_fields = self._valid_field_names()
+        tools = [
+            self.model(**{k: v for k, v in rec.items() if k in valid_fields})
+            for rec in records
+        ]
+        # bulk_create() does not call save(), so set fingerprints here.
+        for tool in tools:
+            tool.fingerprint = tool.content_fingerprint()
+        with transaction.atomic():
+            self.bulk_create(tools)
+            # Not all database backends report the primary keys of
+            # bulk inserted rows, so load the new rows back.
+            created = {
+                tool.name: tool
+                for tool in self.filter(
+                    name__in=[record["name"] for record in records]
+                )
+            }
+            post_bulk_create.send(
+                sender=self.model, instances=list(created.values())
+            )
+            for tool in created.values():
+                with reversion.create_revision():
+                    self._describe_revision(creator, comment)
+                    reversion.add_to_revision(tool)
+        return created
+
+    def bulk_soft_delete(self, **filters):
+        """Soft delete all tools matching the given filters in one query.
+
+        This is equivalent to calling `delete()` on each matching tool, but
+        sends a single post_bulk_softdelete signal instead of a pre_save,
+        post_save, and post_softdelete signal for each tool.
+
+        :returns: Deleted tools
+        :rtype: list
+        """
+        with transaction.atomic():
+            tools = list(self.filter(**filters).select_for_update())
+            if not tools:
+                return tools
+            now = timezone.now()
+            self.filter(pk__in=[tool.pk for tool in tools]).update(
+                deleted=now,
+                modified_date=now,
+            )
+            for tool in tools:
+                tool.deleted = now
+                tool.modified_date = now
+            post_bulk_softdelete.send(sender=self.model, instances=tools)
+        return tools
+
+    def _failed_result(self, error):
+        """Build a from_toolinfo_many result for a failed record."""
+        return (None, False, False, error)
+
+    def _prepare_toolinfo(self, record, creator, origin):
+        """Add tracking data to a toolinfo record and normalize it."""
+        record["created_by"] = creator
+        record["modified_by"] = creator
+        record["origin"] = origin
+        return self.normalize_toolinfo(record)
+
+    def _describe_revision(self, creator, comment):
+        """Add metadata to the active revision."""
+        reversion.add_meta(RevisionMetadata)
+        reversion.set_user(creator)
+        if comment is not None:
+            reversion.set_comment(comment)
+
+    def _apply_toolinfo(self, tool, record, revived):
+        """Update a Tool with data from a normalized toolinfo record.
+
+        Compare input to prior model and decide if anything of note has
+        changed. Revived models are always considered changed.
+
+        :returns: True if the tool needs to be saved
+        :rtype: bool
+        :raises ValidationError: if an invariant field would change
+        """
+        has_changes = revived
+
+        for key, value in record.items():
+            if key in self.VARIANT_FIELDS:
+                continue
+            if key not in self._valid_field_names():
+                # EXTRA_ALLOWED_FIELDS are not stored on the tool
+                continue
+
+            prior = getattr(tool, key)
+
+            if value != prior:
+                if not revived and key in self.INVARIANT_FIELDS:
+                    # Invariant fields are allowed to change when reviving
+                    # a deleted record.
+                    raise ValidationError(
+                        _(
+                            "Changing %(key)s after initial "
+                            "object creation is not allowed"
+                        ),
+                        code="invariant",
+                        params={"key": key},
+                    )
+
+                if value == "" and prior is None:
+                    # T293103: guard against blank as null storage
+                    # conversion causing infinite empty diffs
+                    continue
+
+                setattr(tool, key, value)
+                has_changes = True
+                logger.debug(
+                    "%s: Updating %s to %s (was %s)",
+                    record["name"],
+                    key,
+                    value,
+                    prior,
+                )
+        return has_changes
+
 
 @reversion.register()
 @registry.register()
-class Tool(ExportModelOperationsMixin("tool"), SafeDeleteModel):
+class Tool(
+    ExportModelOperationsMixin("tool"), LoadedJSONMixin, SafeDeleteModel
+):
     """Description of a tool."""
 
     TOOL_TYPE_CHOICES = (
@@ -642,6 +926,13 @@ class Tool(ExportModelOperationsMixin("tool"), SafeDeleteModel):
     modified_date = models.DateTimeField(
         auto_now=True, editable=False, db_index=True
     )
+    fingerprint = models.CharField(
+        blank=True,
+        default="",
+        editable=False,
+        max_length=64,
+        help_text=_("Fingerprint of the toolinfo content of this tool."),
+    )
 
     objects = ToolManager()
 
@@ -649,6 +940,30 @@ class Tool(ExportModelOperationsMixin("tool"), SafeDeleteModel):
         """Str repr"""
         return self.name
 
+    def save(self, *args, **kwargs):
+        """Update the content fingerprint and save the tool."""
+        self.fingerprint = self.content_fingerprint()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "fingerprint"}
+        super().save(*args, **kwargs)
+
+    def content_fingerprint(self):
+        """Compute the fingerprint of this tool's toolinfo content."""
+        return content_fingerprint(
+            type(self),
+            {
+                field.name: getattr(self, field.name)
+                for field in content_fields(type(self))
+            },
+        )
+
+    @property
+    def etag(self):
+        """Entity tag for the API representation of this tool."""
+        return "{}-{}".format(
+            self.fingerprint, int(self.modified_date.timestamp() * 1e6)
+        )
+
     @property
     def auditlog_label(self):
         """Get label for use in auditlog output."""
@@ -18,15 +18,28 @@
 import collections
 import functools
 import json
+import re
 import urllib.parse
 
 from django.contrib.staticfiles import finders
 
 from drf_spectacular.extensions import OpenApiSerializerFieldExtension
 
+import jsonschema
+import jsonschema.validators
+
 
 SCHEMA_FILE_PATTERN = "jsonschema/toolinfo/{}.json"
 CURRENT_SCHEMA = "1.2.0"
+SCHEMA_VERSIONS = ("1.0.0", "1.1.1", "1.2.0")
+# Records from before the $schema property was introduced follow 1.0.0
+LEGACY_SCHEMA = "1.0.0"
+VERSION_RE = re.compile(r"\d+\.\d+\.\d+")
+# Longest validation error message to report. Messages can include the
+# offending value, which may be large.
+MAX_ERROR_LENGTH = 200
+# Fields which the schemas allow to be empty strings, but Toolhub does not.
+NON_EMPTY_FIELDS = ("name", "title", "description", "url")
 
 
 KEYWORDS = {
@@ -45,6 +58,72 @@ def load_schema(version):
         return json.load(schema)
 
 
+def version_for(uri):
+    """Get the schema version to validate a toolinfo record against.
+
+    :param uri: ``$schema`` value of the record. Drafts are validated as
+        their release and unknown versions as the current schema.
+    :rtype: str
+    """
+    if not uri:
+        return LEGACY_SCHEMA
+    match = VERSION_RE.search(str(uri))
+    if match and match.group(0) in SCHEMA_VERSIONS:
+        return match.group(0)
+    return CURRENT_SCHEMA
+
+
+@functools.lru_cache(maxsize=10)
+def get_validator(version):
+    """Get a compiled validator for toolinfo records of a schema version."""
+    source = load_schema(version)
+    clazz = jsonschema.validators.validator_for(source)
+    clazz.check_schema(source)
+    return clazz(
+        source["definitions"]["tool"],
+        resolver=jsonschema.RefResolver.from_schema(source),
+    )
+
+
+def validation_errors(record, version):
+    """Validate a toolinfo record against a schema version.
+
+    :returns: Error messages prefixed with the JSON pointer of the invalid
+        value. Empty if the record is valid.
+    :rtype: list
+    """
+    errors = []
+    for error in get_validator(version).iter_errors(record):
+        message = error.message
+        if len(message) > MAX_ERROR_LENGTH:
+            message = message[: MAX_ERROR_LENGTH - 3] + "..."
+        path = "/".join(str(part) for part in error.absolute_path)
+        errors.append("/{}: {}".format(path, message))
+    return errors
+
+
+def record_version(record):
+    """Get the schema version to validate a toolinfo record against."""
+    uri = record.get("$schema") if isinstance(record, dict) else None
+    return version_for(uri)
+
+
+def toolinfo_errors(record, version):
+    """List the reasons a toolinfo record can not be stored.
+
+    :returns: Error messages. Empty if the record is acceptable.
+    :rtype: list
+    """
+    errors = validation_errors(record, version)
+    if not errors:
+        errors = [
+            "/{}: must not be empty".format(field)
+            for field in NON_EMPTY_FIELDS
+            if not record[field]
+        ]
+    return errors
+
+
 def resolve_ref(document, ref):
     """Resolve a reference within the given document."""
     _, fragment = urllib.parse.urldefrag(ref)
@@ -60,10 +139,13 @@ def resolve_ref(document, ref):
 
 
 def expand_refs(obj, source):
-    """Expand $ref pointers in the given sub-schema."""
+    """Expand $ref pointers in the given sub-schema.
+
+    Returns a new object. The input is not modified.
+    """
     if isinstance(obj, collections.Mapping) and "$ref" in obj:
         ref = resolve_ref(source, obj["$ref"])
-        del obj["$ref"]
+        obj = type(obj)((k, v) for k, v in obj.items() if k != "$ref")
         obj.update(ref)
 
     if isinstance(obj, collections.Mapping):
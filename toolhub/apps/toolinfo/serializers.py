@@ -230,6 +230,42 @@ class UpdateToolSerializer(CreateToolSerializer):
         fields = CreateToolSerializer.Meta.fields[1:]
 
 
+@doc(_("""Result of importing a toolinfo record"""))  # noqa: W0223
+class ToolImportResultSerializer(serializers.Serializer):
+    """Result of importing a toolinfo record."""
+
+    STATUS_CREATED = "created"
+    STATUS_UPDATED = "updated"
+    STATUS_UNCHANGED = "unchanged"
+    STATUS_ERROR = "error"
+    STATUS_CHOICES = (
+        (STATUS_CREATED, _("created")),
+        (STATUS_UPDATED, _("updated")),
+        (STATUS_UNCHANGED, _("unchanged")),
+        (STATUS_ERROR, _("error")),
+    )
+
+    index = serializers.IntegerField(
+        read_only=True,
+        help_text=_("Position of the record in the request, from 0"),
+    )
+    name = serializers.CharField(
+        read_only=True,
+        allow_null=True,
+        help_text=_("Name of the tool, if known"),
+    )
+    status = serializers.ChoiceField(
+        choices=STATUS_CHOICES,
+        read_only=True,
+        help_text=_("Outcome of importing the record"),
+    )
+    errors = serializers.ListField(
+        child=serializers.CharField(),
+        read_only=True,
+        help_text=_("Reasons the record could not be imported"),
+    )
+
+
 @doc(_("""Tool revision."""))
 class ToolRevisionSerializer(RevisionSerializer):
     """Tool revision."""
@@ -17,11 +17,18 @@
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
 import json
 import os
+from unittest import mock
 
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError
 from django.test import TestCase
 
+from reversion.models import Version
+
+from toolhub.apps.auditlog.context import auditlog_context
+from toolhub.apps.auditlog.models import LogEntry
 from toolhub.apps.user.models import ToolhubUser
+from toolhub.fields import JSONSchemaValidator
 
 from .. import models
 
@@ -249,3 +256,261 @@ class ToolManagerTest(TestCase):
         self.assertFalse(created)
         self.assertFalse(updated)
         self.assertToolBasics(obj, self.toolinfo)
+
+    def test_bulk_soft_delete(self):
+        """Bulk soft delete matches deleting tools one at a time."""
+        for name in ("single", "bulk-1", "bulk-2", "kept"):
+            models.Tool.objects.from_toolinfo(
+                {**self.toolinfo, "name": name},
+                self.user,
+                models.Tool.ORIGIN_CRAWLER,
+            )
+        versions = Version.objects.count()
+
+        with auditlog_context(self.user, "gone"):
+            models.Tool.objects.get(name="single").delete()
+            # savepoint, select, update, logentry insert, release
+            with self.assertNumQueries(5):
+                deleted = models.Tool.objects.bulk_soft_delete(
+                    name__in=["bulk-1", "bulk-2", "missing"]
+                )
+        self.assertEqual(
+            sorted(tool.name for tool in deleted), ["bulk-1", "bulk-2"]
+        )
+        self.assertEqual(
+            list(models.Tool.objects.values_list("name", flat=True)),
+            ["kept"],
+        )
+        self.assertEqual(Version.objects.count(), versions)
+
+        single = models.Tool.all_objects.get(name="single")
+        expect = LogEntry.objects.get_for_object(single).latest("id")
+        for name in ("bulk-1", "bulk-2"):
+            tool = models.Tool.all_objects.get(name=name)
+            self.assertIsNotNone(tool.deleted)
+            self.assertEqual(tool.modified_date, tool.deleted)
+            entry = LogEntry.objects.get_for_object(tool).latest("id")
+            self.assertEqual(entry.action, expect.action)
+            self.assertEqual(entry.user, expect.user)
+            self.assertEqual(entry.change_message, expect.change_message)
+            self.assertEqual(entry.params, expect.params)
+
+        self.assertEqual(
+            models.Tool.objects.bulk_soft_delete(name__in=["bulk-1"]), []
+        )
+
+    def test_clean_skips_loaded_json(self):
+        """JSON values unchanged since loading are not validated again."""
+        tool, _, _ = models.Tool.objects.from_toolinfo(
+            {**self.toolinfo}, self.user, models.Tool.ORIGIN_CRAWLER
+        )
+        tool = models.Tool.objects.get(pk=tool.pk)
+        with mock.patch.object(
+            JSONSchemaValidator, "__call__", autospec=True
+        ) as validate:
+            tool.clean_fields()
+            validate.assert_not_called()
+
+            tool.keywords = tool.keywords + ["changed"]
+            tool.clean_fields()
+            self.assertEqual(
+                [call[0][1] for call in validate.call_args_list],
+                [tool.keywords],
+            )
+
+        tool = models.Tool.objects.get(pk=tool.pk)
+        with mock.patch.object(
+            JSONSchemaValidator, "__call__", autospec=True
+        ) as validate:
+            tool.keywords.append("changed in place")
+            tool.clean_fields()
+            self.assertEqual(
+                [call[0][1] for call in validate.call_args_list],
+                [tool.keywords],
+            )
+
+    def test_from_toolinfo_many(self):
+        """Batch create, update, revive, and skip unchanged tools."""
+        unchanged = {**self.toolinfo, "name": "unchanged"}
+        changed = {**self.toolinfo, "name": "changed"}
+        deleted = {**self.toolinfo, "name": "deleted"}
+        for record in (unchanged, changed, deleted):
+            models.Tool.objects.from_toolinfo(
+                record.copy(), self.user, models.Tool.ORIGIN_CRAWLER
+            )
+        models.Tool.objects.get(name="deleted").delete()
+
+        records = [
+            {**self.toolinfo, "name": "new-1"},
+            unchanged.copy(),
+            {**changed, "title": "Changed title"},
+            deleted.copy(),
+            {**self.toolinfo, "name": "new-2"},
+            {**self.toolinfo, "name": "new-1"},
+        ]
+        results = models.Tool.objects.from_toolinfo_many(
+            records, self.user, models.Tool.ORIGIN_CRAWLER, "batch"
+        )
+
+        self.assertEqual(len(results), 6)
+        expect = [
+            ("new-1", True, False),
+            ("unchanged", False, False),
+            ("changed", False, True),
+            ("deleted", False, True),
+            ("new-2", True, False),
+        ]
+        for (name, created, updated), result in zip(expect, results):
+            obj, was_created, has_changes, error = result
+            self.assertIsNone(error)
+            self.assertEqual(obj.name, name)
+            self.assertEqual(was_created, created)
+            self.assertEqual(has_changes, updated)
+        self.assertToolBasics(
+            results[0][0], {**self.toolinfo, "name": "new-1"}
+        )
+        self.assertEqual(
+            models.Tool.objects.get(name="changed").title, "Changed title"
+        )
+        self.assertTrue(models.Tool.objects.filter(name="deleted").exists())
+
+        obj, created, updated, error = results[5]
+        self.assertIsNone(obj)
+        self.assertEqual(error.code, "duplicate")
+
+        for name, revisions in (
+            ("new-1", 1),
+            ("unchanged", 1),
+            ("changed", 2),
+            ("new-2", 1),
+        ):
+            tool = models.Tool.objects.get(name=name)
+            versions = Version.objects.get_for_object(tool)
+            self.assertEqual(versions.count(), revisions)
+            entry = LogEntry.objects.get_for_object(tool).latest("id")
+            self.assertEqual(entry.user, self.user)
+            self.assertEqual(entry.params["revision"], versions[0].id)
+        entry = LogEntry.objects.get_for_object(
+            models.Tool.objects.get(name="new-1")
+        ).get()
+        self.assertEqual(entry.action, LogEntry.CREATE)
+        self.assertEqual(entry.change_message, "batch")
+
+    def test_from_toolinfo_many_insert_failure(self):
+        """A failed bulk insert is retried one record at a time."""
+        bulk_create = models.Tool.objects.bulk_create
+
+        def fail_on_bad(tools, *args, **kwargs):
+            if any(tool.name == "bad" for tool in tools):
+                raise IntegrityError("bad tool")
+            return bulk_create(tools, *args, **kwargs)
+
+        records = [
+            {**self.toolinfo, "name": "good-1"},
+            {**self.toolinfo, "name": "bad"},
+            {**self.toolinfo, "name": "good-2"},
+        ]
+        with mock.patch.object(
+            models.Tool.objects, "bulk_create", side_effect=fail_on_bad
+        ):
+            results = models.Tool.objects.from_toolinfo_many(
+                records, self.user, models.Tool.ORIGIN_CRAWLER
+            )
+
+        self.assertEqual(results[0][0].name, "good-1")
+        self.assertTrue(results[0][1])
+        self.assertIsNone(results[1][0])
+        self.assertIsInstance(results[1][3], IntegrityError)
+        self.assertEqual(results[2][0].name, "good-2")
+        self.assertTrue(results[2][1])
+        self.assertEqual(
+            sorted(
+                models.Tool.objects.filter(
+                    name__in=["good-1", "bad", "good-2"]
+                ).values_list("name", flat=True)
+            ),
+            ["good-1", "good-2"],
+        )
+        for name in ("good-1", "good-2"):
+            tool = models.Tool.objects.get(name=name)
+            self.assertEqual(Version.objects.get_for_object(tool).count(), 1)
+
+    def test_fingerprint(self):
+        """A complete record has the fingerprint of the tool it stores."""
+        tool, _, _ = models.Tool.objects.from_toolinfo(
+            {**self.toolinfo}, self.user, models.Tool.ORIGIN_CRAWLER
+        )
+        record = models.Tool.objects.normalize_toolinfo(
+            {**self.toolinfo, "origin": models.Tool.ORIGIN_CRAWLER}
+        )
+        fingerprint = models.content_fingerprint(models.Tool, record)
+        self.assertEqual(len(fingerprint), 64)
+        self.assertEqual(tool.fingerprint, fingerprint)
+        self.assertEqual(
+            models.Tool.objects.get(pk=tool.pk).content_fingerprint(),
+            fingerprint,
+        )
+
+        # T293103: empty strings are stored as null
+        self.assertEqual(
+            models.content_fingerprint(
+                models.Tool, {**record, "openhub_id": ""}
+            ),
+            models.content_fingerprint(
+                models.Tool, {**record, "openhub_id": None}
+            ),
+        )
+        # Missing fields hold their default value
+        self.assertEqual(
+            models.content_fingerprint(
+                models.Tool, {**record, "deprecated": False}
+            ),
+            models.content_fingerprint(
+                models.Tool,
+                {k: v for k, v in record.items() if k != "deprecated"},
+            ),
+        )
+
+        tool.title = "Changed title"
+        tool.save(update_fields=["title"])
+        self.assertNotEqual(tool.fingerprint, fingerprint)
+        self.assertEqual(
+            models.Tool.objects.get(pk=tool.pk).fingerprint,
+            tool.content_fingerprint(),
+        )
+
+    def test_from_toolinfo_unchanged_fingerprint(self):
+        """Records matching the stored fingerprint are not compared."""
+        models.Tool.objects.from_toolinfo(
+            {**self.toolinfo}, self.user, models.Tool.ORIGIN_CRAWLER
+        )
+        with mock.patch.object(
+            models.ToolManager, "_apply_toolinfo"
+        ) as apply_toolinfo:
+            obj, created, updated = models.Tool.objects.from_toolinfo(
+                {**self.toolinfo}, self.user, models.Tool.ORIGIN_CRAWLER
+            )
+            results = models.Tool.objects.from_toolinfo_many(
+                [{**self.toolinfo}], self.user, models.Tool.ORIGIN_CRAWLER
+            )
+            apply_toolinfo.assert_not_called()
+        self.assertFalse(created)
+        self.assertFalse(updated)
+        self.assertEqual(results[0][0].pk, obj.pk)
+        self.assertEqual(results[0][1:], (False, False, None))
+        # Unchanged tools are returned without loading their content
+        self.assertIn("keywords", results[0][0].get_deferred_fields())
+
+    def test_from_toolinfo_many_origin_change(self):
+        """Expect a per-record validation error when changing origin."""
+        models.Tool.objects.from_toolinfo(
+            self.toolinfo.copy(), self.user, models.Tool.ORIGIN_CRAWLER
+        )
+        results = models.Tool.objects.from_toolinfo_many(
+            [self.toolinfo.copy(), {**self.toolinfo, "name": "other"}],
+            self.user,
+            models.Tool.ORIGIN_API,
+        )
+        self.assertIsNone(results[0][0])
+        self.assertEqual(results[0][3].code, "invariant")
+        self.assertTrue(results[1][1])
@@ -62,3 +62,66 @@ class SchemaTest(SimpleTestCase):
             ),
             expect,
         )
+        # The source schema is not modified
+        self.assertIn("$ref", defs["tool"]["properties"]["url"])
+
+    def test_version_for(self):
+        """Find the schema version for a $schema value."""
+        self.assertEqual(schema.version_for(None), schema.LEGACY_SCHEMA)
+        self.assertEqual(schema.version_for("/toolinfo/1.1.1"), "1.1.1")
+        self.assertEqual(
+            schema.version_for("/toolinfo/1.2.0-draft02"), "1.2.0"
+        )
+        self.assertEqual(
+            schema.version_for("/toolinfo/9.9.9"), schema.CURRENT_SCHEMA
+        )
+
+    def test_get_validator(self):
+        """Validators are compiled once per version."""
+        validator = schema.get_validator("1.1.1")
+        self.assertIs(schema.get_validator("1.1.1"), validator)
+        self.assertIsNot(schema.get_validator("1.2.0"), validator)
+
+    def test_validation_errors(self):
+        """All errors are reported with their location."""
+        self.assertEqual(
+            schema.validation_errors(
+                {
+                    "name": "tool",
+                    "title": "Tool",
+                    "description": "A tool",
+                    "url": "https://example.org",
+                },
+                "1.2.0",
+            ),
+            [],
+        )
+        errors = schema.validation_errors(
+            {"name": 1, "title": "x" * 300, "url": "https://example.org"},
+            "1.2.0",
+        )
+        self.assertEqual(len(errors), 3)
+        self.assertIn("/: 'description' is a required property", errors)
+        self.assertIn("/name: 1 is not of type 'string'", errors)
+        self.assertTrue(
+            all(len(error) <= schema.MAX_ERROR_LENGTH + 8 for error in errors)
+        )
+
+    def test_toolinfo_errors(self):
+        """Records must also have non-empty required fields."""
+        record = {
+            "$schema": "https://toolhub.wikimedia.org/schema/1.1.1",
+            "name": "tool",
+            "title": "",
+            "description": "A tool",
+            "url": "https://example.org",
+        }
+        self.assertEqual(schema.record_version(record), "1.1.1")
+        self.assertEqual(schema.record_version([]), schema.LEGACY_SCHEMA)
+        self.assertEqual(
+            schema.toolinfo_errors(record, "1.1.1"),
+            ["/title: must not be empty"],
+        )
+        self.assertEqual(
+            schema.toolinfo_errors({**record, "title": "Tool"}, "1.1.1"), []
+        )
@@ -246,6 +246,28 @@ class LanguageDataTest(SimpleTestCase):
         self.assertIn("tk", af)
         self.assertNotIn("de", af)
 
+    def test_normalize_code(self):
+        """Test normalize_code."""
+        self.assertEqual(language_data.normalize_code("EN"), "en")
+        self.assertEqual(language_data.normalize_code("en-gb-x-foo"), "en-gb")
+        self.assertEqual(language_data.normalize_code("de-AT-1996"), "de-at")
+        self.assertIsNone(
+            language_data.normalize_code(self.UNKNOWN_LANGUAGE_CODE)
+        )
+
+    def test_normalize_code_after_add_language(self):
+        """Languages added at runtime are found by normalize_code."""
+        ld = LanguageData()
+        self.assertIsNone(ld.normalize_code("bd808-x-test"))
+        ld.add_language("bd808", {"autonym": "Test Language"})
+        self.assertEqual(ld.normalize_code("bd808-x-test"), "bd808")
+        ld.add_language("bd808-redirect", {"target": "bd808"})
+        self.assertEqual(ld.get_autonym("bd808-redirect"), "Test Language")
+        self.assertEqual(
+            ld.sort_by_autonym(["bd808-redirect", "en"]),
+            ["en", "bd808-redirect"],
+        )
+
     def test_add_language(self):
         """Test add_language."""
         new_code = "bd808"
@@ -15,6 +15,10 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import json
+
+from django.test import override_settings
+
 import reversion
 from reversion.models import Version
 
@@ -66,6 +70,171 @@ class ToolViewSetTest(TestCase):
         self.assertIn("name", response.data)
         self.assertEqual(response.data["name"], self.tool.name)
 
+    def test_retrieve_etag(self):
+        """Test retrieve with If-None-Match."""
+        self.client.force_authenticate(user=None)
+
+        url = "/api/tools/{name}/".format(name=self.tool.name)
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertIn(self.tool.fingerprint, etag)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        self.client.force_authenticate(user=self.user)
+        self.fixture["description"] = "test_retrieve_etag"
+        response = self.client.put(url, self.fixture, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def _bulk_import(self, body, content_type="application/x-ndjson"):
+        """POST to the bulk import endpoint and parse the NDJSON results."""
+        response = self.client.post(
+            "/api/tools/import/?comment=bulk",
+            body,
+            content_type=content_type,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+
+    def test_bulk_import_requires_auth(self):
+        """Assert that bulk import requires authentication."""
+        self.client.force_authenticate(user=None)
+        toolinfo = self._load_json("toolinfo_fixture.json")
+
+        response = self.client.post(
+            "/api/tools/import/",
+            json.dumps([toolinfo]),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(TOOLINFO_IMPORT_BATCH_SIZE=2)
+    def test_bulk_import(self):
+        """Test bulk import of NDJSON records."""
+        self.client.force_authenticate(user=self.user)
+        toolinfo = self._load_json("toolinfo_fixture.json")
+        records = [
+            {**toolinfo, "name": "bulk-1"},
+            {**toolinfo},
+            {**toolinfo, "name": "bulk-1"},
+            {**toolinfo, "name": "bulk-2", "title": ""},
+            {**toolinfo, "title": "test_bulk_import"},
+        ]
+        body = "\n".join(json.dumps(record) for record in records)
+
+        results = self._bulk_import(body + "\n{")
+
+        self.assertEqual(
+            [(r["index"], r["name"], r["status"]) for r in results],
+            [
+                (0, "bulk-1", "created"),
+                (1, self.tool.name, "unchanged"),
+                (2, "bulk-1", "unchanged"),
+                (3, "bulk-2", "error"),
+                (4, self.tool.name, "updated"),
+                (5, None, "error"),
+            ],
+        )
+        self.assertEqual(results[3]["errors"], ["/title: must not be empty"])
+        self.assertIn("Invalid JSON", results[5]["errors"][0])
+        tool = models.Tool.objects.get(name=self.tool.name)
+        self.assertEqual(tool.title, "test_bulk_import")
+        self.assertEqual(
+            Version.objects.get_for_object(tool)[0].revision.comment, "bulk"
+        )
+        self.assertFalse(models.Tool.objects.filter(name="bulk-2").exists())
+
+    def test_bulk_import_array(self):
+        """Test bulk import of a JSON array."""
+        self.client.force_authenticate(user=self.user)
+        toolinfo = self._load_json("toolinfo_fixture.json")
+        records = [
+            {**toolinfo, "name": "bulk-1"},
+            {**toolinfo, "name": "bulk-1"},
+        ]
+
+        results = self._bulk_import(json.dumps(records), "application/json")
+
+        self.assertEqual([r["status"] for r in results], ["created", "error"])
+        self.assertEqual(results[0]["errors"], [])
+        self.assertEqual(
+            results[1]["errors"], ["Duplicate toolinfo record for bulk-1"]
+        )
+
+    def test_bulk_import_other_users_tools(self):
+        """Assert bulk import can not change or revive others' tools."""
+        other = self._user("other")
+        self.client.force_authenticate(user=other)
+        toolinfo = self._load_json("toolinfo_fixture.json")
+        deleted, _, _ = models.Tool.objects.from_toolinfo(
+            {**toolinfo, "name": "bulk-deleted"},
+            self.user,
+            models.Tool.ORIGIN_API,
+        )
+        deleted.delete()
+        records = [
+            {**toolinfo, "title": "test_bulk_import_other_users_tools"},
+            {**toolinfo, "name": "bulk-deleted"},
+            {**toolinfo, "name": "bulk-new", "comment": "ignored"},
+        ]
+
+        results = self._bulk_import(json.dumps(records))
+
+        self.assertEqual(
+            [(r["name"], r["status"]) for r in results],
+            [
+                (self.tool.name, "error"),
+                ("bulk-deleted", "error"),
+                ("bulk-new", "created"),
+            ],
+        )
+        self.assertEqual(
+            results[0]["errors"],
+            ["You do not have permission to change {}".format(self.tool.name)],
+        )
+        self.assertEqual(
+            models.Tool.objects.get(name=self.tool.name).title,
+            self.tool.title,
+        )
+        self.assertFalse(
+            models.Tool.objects.filter(name="bulk-deleted").exists()
+        )
+
+        self.client.force_authenticate(user=self.user)
+        results = self._bulk_import(
+            json.dumps([{**toolinfo, "title": "with comment", "comment": "x"}])
+        )
+        self.assertEqual(results[0]["status"], "updated")
+
+    @override_settings(TOOLINFO_IMPORT_MAX_RECORDS=1)
+    def test_bulk_import_max_records(self):
+        """Assert records past the limit are not imported."""
+        self.client.force_authenticate(user=self.user)
+        toolinfo = self._load_json("toolinfo_fixture.json")
+        records = [
+            {**toolinfo, "name": "bulk-1"},
+            {**toolinfo, "name": "bulk-2"},
+        ]
+
+        results = self._bulk_import(json.dumps(records))
+
+        self.assertEqual(
+            [(r["index"], r["status"]) for r in results],
+            [(0, "created"), (1, "error")],
+        )
+        self.assertFalse(models.Tool.objects.filter(name="bulk-2").exists())
+
     def test_update_requires_auth(self):
         """Assert that update requires authentication."""
         self.client.force_authenticate(user=None)
@@ -17,20 +17,27 @@
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
 # Copyright (c) 2021 Wikimedia Foundation and contributors.
 # All Rights Reserved.
+import functools
 import json
 import locale
 import os
 from collections import defaultdict
 
+from django.utils.functional import SimpleLazyObject
+
 
 class LanguageData:  # noqa: R0904 Too many public methods
     """Helper for working with language-data.json.
 
     This class is largely a port of
     https://github.com/wikimedia/language-data/blob/master/src/index.js to
-    python.
+    python. Unlike the upstream library, lookup tables are built when the
+    data is loaded so that most lookups do not need to scan the data.
     """
 
+    # Number of distinct inputs to remember normalized codes for
+    NORMALIZE_CACHE_SIZE = 4096
+
     UNKNOWN_SCRIPT = False
     UNKNOWN_REGION = "UNKNOWN"
     UNKNOWN_AUTONYM = False
@@ -51,6 +58,57 @@ class LanguageData:  # noqa: R0904 Too many public methods
         )
         with open(data_path) as fh:
             self.data = json.load(fh)
+        self.normalize_code = functools.lru_cache(
+            maxsize=self.NORMALIZE_CACHE_SIZE
+        )(self._normalize_code)
+        self._build_indexes()
+
+    def _build_indexes(self):
+        """Build lookup tables from the language data."""
+        languages = self.data["languages"]
+        # Language code to the code of the language it redirects to
+        self._resolved = {
+            code: self._follow_redirects(code) for code in languages
+        }
+        # Non-redirect languages in data order
+        self._only = [
+            code for code, value in languages.items() if len(value) != 1
+        ]
+        self._script_groups = {}
+        for name, group in self.data["scriptgroups"].items():
+            for script in group:
+                self._script_groups.setdefault(script, name)
+        # Region to (position in self._only, language code) pairs
+        self._region_languages = defaultdict(list)
+        for idx, code in enumerate(self._only):
+            for region in dict.fromkeys(languages[code][1]):
+                self._region_languages[region].append((idx, code))
+        self._autonyms = {code: languages[code][2] for code in self._only}
+        # (collation locale, language code to sort key), built on demand
+        self._sort_keys = (None, {})
+        self.normalize_code.cache_clear()
+
+    def _follow_redirects(self, language):
+        """Find the language that a language code finally redirects to."""
+        seen = set()
+        languages = self.data["languages"]
+        while (
+            language in languages
+            and len(languages[language]) == 1
+            and language not in seen
+        ):
+            seen.add(language)
+            language = languages[language][0]
+        return language
+
+    def _entry(self, language):
+        """Get the data for a language after following redirects."""
+        entry = self.data["languages"].get(
+            self._resolved.get(language, language)
+        )
+        if entry is None or len(entry) == 1:
+            return None
+        return entry
 
     def is_known(self, language):
         """Is the language known?"""
@@ -71,50 +129,41 @@ class LanguageData:  # noqa: R0904 Too many public methods
 
     def get_script(self, language):
         """Returns the script of the language."""
-        target = self.is_redirect(language)
-        if target:
-            return self.get_script(target)
-        if not self.is_known(language):
+        entry = self._entry(language)
+        if entry is None:
             return self.UNKNOWN_SCRIPT
-        return self.data["languages"][language][0]
+        return entry[0]
 
     def get_regions(self, language):
         """Returns the regions in which a language is spoken."""
-        target = self.is_redirect(language)
-        if target:
-            return self.get_regions(target)
-        if self.is_known(language):
-            return self.data["languages"][language][1]
-        return [self.UNKNOWN_REGION]
+        entry = self._entry(language)
+        if entry is None:
+            return [self.UNKNOWN_REGION]
+        return entry[1]
 
     def get_autonym(self, language):
         """Returns the autonym of the language."""
-        target = self.is_redirect(language)
-        if target:
-            return self.get_autonym(target)
-        if self.is_known(language):
-            return self.data["languages"][language][2]
-        return self.UNKNOWN_AUTONYM
+        entry = self._entry(language)
+        if entry is None:
+            return self.UNKNOWN_AUTONYM
+        return entry[2]
 
     def only_languages(self):
         """Generator over non-redirect languages."""
-        for language in self.data["languages"]:
-            if not self.is_redirect(language):
-                yield language
+        yield from self._only
 
     def get_autonyms(self):
         """Returns all language codes and corresponding autonyms."""
-        return {
-            language: self.get_autonym(language)
-            for language in self.only_languages()
-        }
+        return dict(self._autonyms)
 
     def get_languages_in_scripts(self, scripts):
         """Returns all languages written in the given scripts."""
+        scripts = set(scripts)
+        languages = self.data["languages"]
         return [
             language
-            for language in self.only_languages()
-            if self.get_script(language) in scripts
+            for language in self._only
+            if languages[language][0] in scripts
         ]
 
     def get_languages_in_script(self, script):
@@ -123,10 +172,7 @@ class LanguageData:  # noqa: R0904 Too many public methods
 
     def get_group_of_script(self, script):
         """Returns the script group of a script."""
-        for name, group in self.data["scriptgroups"].items():
-            if script in group:
-                return name
-        return self.OTHER_SCRIPT_GROUP
+        return self._script_groups.get(script, self.OTHER_SCRIPT_GROUP)
 
     def get_script_group_of_language(self, language):
         """Returns the script group of a language."""
@@ -143,13 +189,17 @@ class LanguageData:  # noqa: R0904 Too many public methods
 
     def get_languages_by_script_group_in_regions(self, regions):
         """Returns a dict of languages grouped by script group."""
+        # Languages are listed in data order, once for each of the given
+        # regions that they are spoken in.
+        found = sorted(
+            (idx, pos, language)
+            for pos, region in enumerate(regions)
+            for idx, language in self._region_languages.get(region, ())
+        )
         by_group = defaultdict(list)
-        for language in self.only_languages():
-            lang_regions = self.get_regions(language)
+        for _, _, language in found:
             group = self.get_script_group_of_language(language)
-            for region in regions:
-                if region in lang_regions:
-                    by_group[group].append(language)
+            by_group[group].append(language)
         return by_group
 
     def get_languages_by_script_group_in_region(self, region):
@@ -166,11 +216,28 @@ class LanguageData:  # noqa: R0904 Too many public methods
 
     def sort_by_autonym(self, languages):
         """Sort a list of languages by their autonyms."""
+        keys = self._autonym_sort_keys()
         return sorted(
-            (lang for lang in languages if self.get_autonym(lang)),
-            key=lambda x: locale.strxfrm((self.get_autonym(x) or x).lower()),
+            (lang for lang in languages if lang in keys),
+            key=keys.__getitem__,
         )
 
+    def _autonym_sort_keys(self):
+        """Get the sort keys of all languages with an autonym.
+
+        Keys depend on the collation locale, so they are rebuilt if it
+        changes.
+        """
+        collation = locale.setlocale(locale.LC_COLLATE)
+        if self._sort_keys[0] != collation:
+            keys = {}
+            for language in self.data["languages"]:
+                autonym = self.get_autonym(language)
+                if autonym:
+                    keys[language] = locale.strxfrm(autonym.lower())
+            self._sort_keys = (collation, keys)
+        return self._sort_keys[1]
+
     def is_rtl(self, language):
         """Check if a language is right-to-left."""
         return self.get_script(language) in self.data["rtlscripts"]
@@ -183,6 +250,24 @@ class LanguageData:  # noqa: R0904 Too many public methods
             return self.DIR_LTR
         return False
 
+    def _normalize_code(self, code):
+        """Find the known language for a language code.
+
+        The code is lowercased and then successive subtags are removed until
+        a known language is found.
+
+        :returns: language code or None if no known language is found
+        """
+        code = code.lower()
+        if self.is_known(code):
+            return code
+        parts = code.split("-")
+        for end in range(len(parts) - 1, 0, -1):
+            parent = "-".join(parts[:end])
+            if self.is_known(parent):
+                return parent
+        return None
+
     def get_languages_in_territory(self, territory):
         """Returns the languages spoken in a territory."""
         return self.data["territories"].get(territory, [])
@@ -201,6 +286,8 @@ class LanguageData:  # noqa: R0904 Too many public methods
                 options.get("regions", []),
                 options.get("autonym", code),
             ]
+        self._build_indexes()
 
 
-language_data = LanguageData()
+# Loaded on first use rather than when the module is imported
+language_data = SimpleLazyObject(LanguageData)
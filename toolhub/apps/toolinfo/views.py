@@ -15,10 +15,17 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import collections
+import json
 import logging
 
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.utils.translation import gettext_lazy as _
 
 from drf_spectacular.types import OpenApiTypes
@@ -38,6 +45,9 @@ from reversion.models import Version
 import spdx_license_list
 
 from toolhub.apps.auditlog.models import LogEntry
+from toolhub.apps.crawler.stream import JSONRecordStream
+from toolhub.apps.crawler.stream import LimitExceeded
+from toolhub.apps.crawler.stream import limit_bytes
 from toolhub.apps.versioned.exceptions import ConflictingState
 from toolhub.apps.versioned.exceptions import CurrentRevision
 from toolhub.apps.versioned.exceptions import SuppressedRevision
@@ -46,9 +56,11 @@ from toolhub.permissions import ObjectPermissions
 from toolhub.permissions import ObjectPermissionsOrAnonReadOnly
 from toolhub.serializers import CommentSerializer
 
+from . import schema
 from .models import Tool
 from .serializers import CreateToolSerializer
 from .serializers import SpdxLicenseSerializer
+from .serializers import ToolImportResultSerializer
 from .serializers import ToolRevisionDetailSerializer
 from .serializers import ToolRevisionDiffSerializer
 from .serializers import ToolRevisionSerializer
@@ -82,6 +94,27 @@ logger = logging.getLogger(__name__)
     list=extend_schema(
         description=_("""List all tools."""),
     ),
+    bulk_import=extend_schema(
+        description=_(
+            "Create or update many tools. The request body is a JSON "
+            "array or newline delimited JSON (NDJSON) stream of toolinfo "
+            "records. Records are stored in batches and the response is "
+            "an NDJSON stream with one result for each record."
+        ),
+        parameters=[
+            OpenApiParameter(
+                "comment",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description=_("Edit summary for the changes."),
+            ),
+        ],
+        request={
+            "application/json": OpenApiTypes.OBJECT,
+            "application/x-ndjson": OpenApiTypes.OBJECT,
+        },
+        responses=ToolImportResultSerializer,
+    ),
 )
 class ToolViewSet(viewsets.ModelViewSet):
     """Tools."""
@@ -103,6 +136,164 @@ class ToolViewSet(viewsets.ModelViewSet):
             return UpdateToolSerializer
         return ToolSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        """Get a tool, honoring If-None-Match."""
+        instance = self.get_object()
+        etag = quote_etag(instance.etag)
+        resp = get_conditional_response(request, etag=etag)
+        if resp is None:
+            resp = response.Response(self.get_serializer(instance).data)
+        resp["ETag"] = etag
+        return resp
+
+    @action(detail=False, methods=["POST"], url_path="import")
+    def bulk_import(self, request):
+        """Create or update many tools from a stream of toolinfo records."""
+        return StreamingHttpResponse(
+            self._import_results(
+                request.stream,
+                request.user,
+                request.query_params.get("comment") or None,
+            ),
+            content_type="application/x-ndjson",
+        )
+
+    def _import_results(self, stream, user, comment):
+        """Import toolinfo records read from a stream in batches.
+
+        :returns: NDJSON result lines in the order of the input records
+        :rtype: generator
+        """
+        chunks = iter(lambda: stream.read(65536), b"") if stream else []
+        max_records = settings.TOOLINFO_IMPORT_MAX_RECORDS
+        records = iter(
+            JSONRecordStream(
+                limit_bytes(chunks, settings.TOOLINFO_IMPORT_MAX_BYTES),
+                multiple=True,
+            )
+        )
+        batch = []
+        index = 0
+        error = None
+        while error is None:
+            try:
+                record = next(records)
+            except StopIteration:
+                break
+            except LimitExceeded:
+                error = _("Request is larger than %(max)s bytes") % {
+                    "max": settings.TOOLINFO_IMPORT_MAX_BYTES
+                }
+            except ValueError as e:
+                error = _("Invalid JSON: %(error)s") % {"error": e}
+            else:
+                if index == max_records:
+                    error = _("Request has more than %(max)s records") % {
+                        "max": max_records
+                    }
+                    continue
+                batch.append((index, record))
+                index += 1
+                if len(batch) == settings.TOOLINFO_IMPORT_BATCH_SIZE:
+                    yield from self._import_batch(batch, user, comment)
+                    batch = []
+        yield from self._import_batch(batch, user, comment)
+        if error is not None:
+            yield self._import_result(
+                index, None, ToolImportResultSerializer.STATUS_ERROR, [error]
+            )
+
+    def _import_batch(self, batch, user, comment):
+        """Validate and store a batch of (index, record) pairs."""
+        errors = {
+            index: schema.toolinfo_errors(
+                record, schema.record_version(record)
+            )
+            for index, record in batch
+        }
+        valid = [
+            (index, record) for index, record in batch if not errors[index]
+        ]
+        for _index, record in valid:
+            # The comment for the whole import is used instead
+            record.pop("comment", None)
+        self._check_import_permissions(valid, user, errors)
+        valid = [
+            (index, record) for index, record in valid if not errors[index]
+        ]
+        try:
+            with transaction.atomic():
+                results = dict(
+                    zip(
+                        [index for index, record in valid],
+                        Tool.objects.from_toolinfo_many(
+                            [record for index, record in valid],
+                            user,
+                            Tool.ORIGIN_API,
+                            comment,
+                        ),
+                    )
+                )
+        except Exception as e:  # noqa: B902
+            # Report the failure for each record rather than ending the
+            # streamed response early.
+            logger.exception("Failed to import batch")
+            results = {index: (None, False, False, e) for index, _ in valid}
+
+        for index, record in batch:
+            name = record.get("name") if isinstance(record, dict) else None
+            if errors[index]:
+                status = ToolImportResultSerializer.STATUS_ERROR
+                yield self._import_result(index, name, status, errors[index])
+                continue
+            obj, created, updated, error = results[index]
+            if error is not None:
+                status = ToolImportResultSerializer.STATUS_ERROR
+                if isinstance(error, ValidationError):
+                    messages = error.messages
+                else:
+                    logger.error("Failed to import `%s`: %s", name, error)
+                    messages = [_("Failed to store the record.")]
+            elif created:
+                status = ToolImportResultSerializer.STATUS_CREATED
+                messages = []
+            elif updated:
+                status = ToolImportResultSerializer.STATUS_UPDATED
+                messages = []
+            else:
+                status = ToolImportResultSerializer.STATUS_UNCHANGED
+                messages = []
+            yield self._import_result(index, name, status, messages)
+
+    def _check_import_permissions(self, batch, user, errors):
+        """Add errors for records which would change another user's tool.
+
+        Importing a record for an existing or deleted tool updates or
+        revives that tool, which needs the same rights as editing it.
+        """
+        indexes = collections.defaultdict(list)
+        for index, record in batch:
+            indexes[Tool.objects.normalize_name(record["name"])].append(index)
+        existing = (
+            Tool.objects.all_with_deleted()
+            .filter(name__in=indexes)
+            .select_related("created_by")
+        )
+        for tool in existing:
+            if not user.has_perm("toolinfo.change_tool", tool):
+                for index in indexes[tool.name]:
+                    errors[index].append(
+                        _("You do not have permission to change %(name)s")
+                        % {"name": tool.name}
+                    )
+
+    def _import_result(self, index, name, status, errors):
+        """Format the result of importing a record as a line of NDJSON."""
+        data = ToolImportResultSerializer(
+            {"index": index, "name": name, "status": status, "errors": errors}
+        ).data
+        return json.dumps(data) + "\n"
+
 
 path_param_tool_name = OpenApiParameter(
     "tool_name",
@@ -15,7 +15,9 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import functools
 import json
+import threading
 
 from django.contrib.staticfiles import finders
 from django.core import exceptions
@@ -32,6 +34,38 @@ import jsonschema.exceptions
 import jsonschema.validators
 
 
+# Compiled validators shared by all JSONSchemaValidator instances in the
+# process, keyed by the schema file path or canonical schema JSON. Lazy
+# translation strings in a schema are keyed by their str() value.
+_compiled_validators = {}
+_compiled_validators_lock = threading.Lock()
+
+
+def compiled_validator(schema):
+    """Get a shared compiled validator for a JSON schema.
+
+    :param schema: JSON schema, or staticfiles path of a JSON schema file
+    :type schema: Union[str, Mapping]
+    """
+    if isinstance(schema, str):
+        key = schema
+    else:
+        key = json.dumps(schema, sort_keys=True, default=str)
+    validator = _compiled_validators.get(key)
+    if validator is None:
+        if isinstance(schema, str):
+            with open(finders.find(schema), "r") as f:
+                schema = json.loads(f.read())
+        else:
+            # Compile a plain copy so lazy strings pass check_schema()
+            schema = json.loads(key)
+        clazz = jsonschema.validators.validator_for(schema)
+        clazz.check_schema(schema)
+        with _compiled_validators_lock:
+            validator = _compiled_validators.setdefault(key, clazz(schema))
+    return validator
+
+
 @deconstructible
 class JSONSchemaValidator:
     """Validate against a JSON schema."""
@@ -55,12 +89,7 @@ class JSONSchemaValidator:
     @cached_property
     def _schema_validator(self):
         """Get a compiled validator for our schema."""
-        if isinstance(self.schema, str):
-            with open(finders.find(self.schema), "r") as f:
-                self.schema = json.loads(f.read())
-        clazz = jsonschema.validators.validator_for(self.schema)
-        clazz.check_schema(self.schema)
-        return clazz(self.schema)
+        return compiled_validator(self.schema)
 
     def __call__(self, value):
         """Validate that the input matches the JSON schema."""
@@ -82,7 +111,12 @@ class JSONSchemaValidator:
 
 
 class JSONSchemaField(JSONField):
-    """JSONField with support for jsonschema validation."""
+    """JSONField with support for jsonschema validation.
+
+    Validation is skipped for values that are unchanged since the model
+    instance was loaded from the database by a model using
+    LoadedJSONMixin.
+    """
 
     _schema = None
 
@@ -102,6 +136,92 @@ class JSONSchemaField(JSONField):
                 self._schema = json.loads(f.read())
         return self._schema
 
+    def clean(self, value, model_instance):
+        """Convert and validate the value."""
+        value = self.to_python(value)
+        self.validate(value, model_instance)
+        if not self.is_loaded_value(model_instance, value):
+            self.run_validators(value)
+        return value
+
+    def from_db_value(self, value, expression, connection):
+        """Convert a database value, remembering the raw JSON string."""
+        loaded = super().from_db_value(value, expression, connection)
+        if isinstance(loaded, list):
+            loaded = _LoadedList(loaded)
+        elif isinstance(loaded, dict):
+            loaded = _LoadedDict(loaded)
+        else:
+            return loaded
+        loaded.db_value = value
+        return loaded
+
+    def is_loaded_value(self, model_instance, value):
+        """Is value the same as the one loaded from the database?"""
+        loaded = getattr(model_instance, "_loaded_json", {})
+        return self.attname in loaded and _loaded_snapshot(
+            loaded[self.attname]
+        ) == _json_snapshot(value)
+
+
+class _LoadedList(list):
+    """List loaded from a JSON database column."""
+
+    db_value = None
+
+
+class _LoadedDict(dict):
+    """Dict loaded from a JSON database column."""
+
+    db_value = None
+
+
+def _json_snapshot(value):
+    """Make a comparable copy of a JSON value."""
+    return json.dumps(value, sort_keys=True)
+
+
+def _loaded_snapshot(value):
+    """Make a comparable copy of a JSON value as it was loaded.
+
+    Lists and dicts may have been changed in place since loading, so they
+    are compared using the raw database string they were decoded from.
+    """
+    db_value = getattr(value, "db_value", None)
+    if db_value is not None:
+        value = json.loads(db_value)
+    return _json_snapshot(value)
+
+
+@functools.lru_cache(maxsize=None)
+def _json_schema_fields(model):
+    """List the JSONSchemaFields of a model."""
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if isinstance(field, JSONSchemaField)
+    ]
+
+
+class LoadedJSONMixin:
+    """Remember the JSONSchemaField values loaded from the database.
+
+    The JSONSchemaFields of the model will skip validating values which
+    are unchanged since loading. Loading only keeps a reference to each
+    value; comparison is deferred until the value is validated.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Create an instance from database values."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_json = {
+            field.attname: instance.__dict__[field.attname]
+            for field in _json_schema_fields(cls)
+            if field.attname in instance.__dict__
+        }
+        return instance
+
 
 class BlankAsNullFieldMixin:
     """Mixin for optional text Field subclasses.
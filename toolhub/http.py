@@ -0,0 +1,94 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+import random
+
+from django.conf import settings
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from urllib3.util.retry import Retry
+
+
+class JitteredRetry(Retry):
+    """Retry configuration which randomizes the backoff between attempts.
+
+    Using "full jitter" keeps many clients that failed at the same moment
+    from retrying in lockstep against a struggling server.
+    """
+
+    def get_backoff_time(self):
+        """Pick a random delay up to the exponential backoff time."""
+        return random.uniform(0, super().get_backoff_time())  # nosec: B311
+
+
+def make_session(
+    user_agent=None,
+    retries=None,
+    backoff_factor=None,
+    pool_hosts=None,
+    pool_maxsize=None,
+):
+    """Build a requests.Session for outbound HTTP requests.
+
+    The session keeps a pool of keep-alive connections for each host.
+    Requests block while a host has ``pool_maxsize`` connections in use.
+    Connection errors and 5xx responses are retried. Read errors are not,
+    because the request may already have been acted on.
+
+    Arguments that are not provided default to the matching
+    ``OUTBOUND_HTTP_*`` setting.
+
+    :param user_agent: User-Agent header to send with each request
+    :param retries: Maximum number of retries for each request
+    :param backoff_factor: Base delay in seconds between retries
+    :param pool_hosts: Number of hosts to keep connection pools for
+    :param pool_maxsize: Maximum number of connections to a single host
+    """
+    if retries is None:
+        retries = settings.OUTBOUND_HTTP_RETRIES
+    if backoff_factor is None:
+        backoff_factor = settings.OUTBOUND_HTTP_BACKOFF
+    if pool_hosts is None:
+        pool_hosts = settings.OUTBOUND_HTTP_POOL_HOSTS
+    if pool_maxsize is None:
+        pool_maxsize = settings.OUTBOUND_HTTP_POOL_MAXSIZE
+
+    retry = JitteredRetry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD", "OPTIONS"),
+        # Return the last response rather than raising when out of retries
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_hosts,
+        pool_maxsize=pool_maxsize,
+        pool_block=True,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if user_agent:
+        session.headers["User-Agent"] = user_agent
+    return session
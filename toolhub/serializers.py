@@ -17,6 +17,7 @@
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
 import json
 
+from django.db.models import Model
 from django.utils.translation import gettext_lazy as _
 
 from drf_spectacular.drainage import set_override
@@ -69,6 +70,15 @@ class JSONSchemaField(serializers.ModelField):
         """Transform the outgoing native value to primitive data."""
         return obj
 
+    def run_validators(self, value):
+        """Validate values that differ from the instance being updated."""
+        instance = getattr(self.parent, "instance", None)
+        if isinstance(instance, Model) and self.model_field.is_loaded_value(
+            instance, value
+        ):
+            return
+        super().run_validators(value)
+
 
 class BlankAsNullCharField(serializers.CharField):
     """CharField that can store empty strings as null."""
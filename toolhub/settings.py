@@ -256,6 +256,8 @@ if DATABASES["default"]["ENGINE"] == "django.db.backends.mysql":
         "SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED",
     }
 
+# Search response caching needs a cache shared by every web and crawler
+# process, such as memcached or redis. See SEARCH_CACHE_ALLOW_LOCAL.
 CACHES = {
     "default": {
         "BACKEND": env.str(
@@ -283,6 +285,89 @@ ELASTICSEARCH_DSL_SIGNAL_PROCESSOR = (
 )
 ELASTICSEARCH_DSL_AUTOSYNC = env.bool("ES_DSL_AUTOSYNC", default=True)
 ELASTICSEARCH_DSL_PARALLEL = env.bool("ES_DSL_PARALLEL", default=True)
+# Queue index updates until the end of the request, or the end of each batch
+# of a crawl, and send them with the bulk API instead of updating the index
+# on every save. Batches that fail are retried on later flushes.
+ELASTICSEARCH_DSL_DEFERRED = env.bool("ES_DSL_DEFERRED", default=False)
+ELASTICSEARCH_DSL_QUEUE_BATCH_SIZE = env.int(
+    "ES_DSL_QUEUE_BATCH_SIZE", default=500
+)
+ELASTICSEARCH_DSL_QUEUE_RETRIES = env.int("ES_DSL_QUEUE_RETRIES", default=3)
+# Seconds to cache search responses for. Cached responses are also dropped
+# whenever documents are written to the search index. 0 disables caching.
+SEARCH_CACHE_TIMEOUT = env.int("SEARCH_CACHE_TIMEOUT", default=300)
+# Search responses and facet counts are only cached when the default cache
+# is shared between processes, because the generation which invalidates
+# them lives in that cache. A LocMemCache is private to each process, so
+# caching is disabled with it unless SEARCH_CACHE_ALLOW_LOCAL is set. Only
+# set it when the web server and all index writers run in one process.
+SEARCH_CACHE_ALLOW_LOCAL = env.bool("SEARCH_CACHE_ALLOW_LOCAL", default=False)
+# Seconds to cache the facet counts shared by searches that have no search
+# string and at most one facet filter. These are also dropped whenever
+# documents are written to the search index.
+SEARCH_FACETS_CACHE_TIMEOUT = env.int(
+    "SEARCH_FACETS_CACHE_TIMEOUT", default=60 * 60
+)
+# Search engine for the search API: "elasticsearch", or "memory" to search
+# an index of all tools held by each process. When SEARCH_FALLBACK is set,
+# the in-process index is also used while Elasticsearch can not be reached.
+SEARCH_BACKEND = env.str("SEARCH_BACKEND", default="elasticsearch")
+SEARCH_FALLBACK = env.bool("SEARCH_FALLBACK", default=True)
+# Seconds before the in-process index is reloaded from the database to pick
+# up changes saved by other processes.
+SEARCH_MEMORY_MAX_AGE = env.int("SEARCH_MEMORY_MAX_AGE", default=300)
+
+# === Outbound HTTP ===
+# Defaults for sessions built by toolhub.http.make_session(). Connect errors
+# and 5xx responses are retried with a randomized exponential backoff.
+OUTBOUND_HTTP_RETRIES = env.int("OUTBOUND_HTTP_RETRIES", default=2)
+OUTBOUND_HTTP_BACKOFF = env.float("OUTBOUND_HTTP_BACKOFF", default=0.5)
+# Number of hosts to keep pools of keep-alive connections for, and the
+# maximum number of concurrent connections to any single host.
+OUTBOUND_HTTP_POOL_HOSTS = env.int("OUTBOUND_HTTP_POOL_HOSTS", default=32)
+OUTBOUND_HTTP_POOL_MAXSIZE = env.int("OUTBOUND_HTTP_POOL_MAXSIZE", default=4)
+
+# === Crawler ===
+# Maximum number of toolinfo URLs to fetch in parallel during a crawl
+CRAWLER_CONCURRENCY = env.int("CRAWLER_CONCURRENCY", default=8)
+# Number of worker processes used to crawl. With more than one process, URLs
+# are handed out to the workers in batches of CRAWLER_BATCH_SIZE. Workers
+# write to the database concurrently, which SQLite does not support.
+CRAWLER_PROCESSES = env.int("CRAWLER_PROCESSES", default=1)
+CRAWLER_BATCH_SIZE = env.int("CRAWLER_BATCH_SIZE", default=20)
+# Hard limits on the size of a single toolinfo document. Responses exceeding
+# either limit are not processed. The byte limit applies to the decompressed
+# response body.
+CRAWLER_MAX_BYTES = env.int("CRAWLER_MAX_BYTES", default=32 * 1024 * 1024)
+CRAWLER_MAX_RECORDS = env.int("CRAWLER_MAX_RECORDS", default=10000)
+# Revisit schedule bounds (seconds). The interval for a url shrinks towards
+# the minimum when its content changes and grows towards the maximum when it
+# does not. Failed fetches back off exponentially up to the max backoff.
+CRAWLER_MIN_INTERVAL = env.int("CRAWLER_MIN_INTERVAL", default=60 * 60)
+CRAWLER_MAX_INTERVAL = env.int("CRAWLER_MAX_INTERVAL", default=24 * 60 * 60)
+CRAWLER_MAX_BACKOFF = env.int("CRAWLER_MAX_BACKOFF", default=7 * 24 * 60 * 60)
+# Maximum number of characters of log output kept for each crawled url. The
+# oldest lines are dropped first.
+CRAWLER_MAX_LOG_SIZE = env.int("CRAWLER_MAX_LOG_SIZE", default=64 * 1024)
+# Where to export crawler metrics at the end of each run: a file for the
+# node_exporter textfile collector and/or a Prometheus Pushgateway address.
+CRAWLER_METRICS_TEXTFILE = env.str("CRAWLER_METRICS_TEXTFILE", default="")
+CRAWLER_METRICS_PUSHGATEWAY = env.str(
+    "CRAWLER_METRICS_PUSHGATEWAY", default=""
+)
+
+# === Toolinfo bulk import ===
+# Number of records stored in each database transaction by the bulk import
+# API.
+TOOLINFO_IMPORT_BATCH_SIZE = env.int("TOOLINFO_IMPORT_BATCH_SIZE", default=50)
+# Hard limits on the size of a bulk import request. Records after the point
+# where either limit is exceeded are not processed.
+TOOLINFO_IMPORT_MAX_BYTES = env.int(
+    "TOOLINFO_IMPORT_MAX_BYTES", default=32 * 1024 * 1024
+)
+TOOLINFO_IMPORT_MAX_RECORDS = env.int(
+    "TOOLINFO_IMPORT_MAX_RECORDS", default=10000
+)
 
 # === Authentication ===
 AUTH_USER_MODEL = "user.ToolhubUser"
@@ -0,0 +1,28 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+from django.dispatch import Signal
+
+
+# Sent after model instances have been inserted using a bulk query. Bulk
+# inserts do not send the usual pre_save/post_save signals, so receivers which
+# need to know about new instances should listen for this signal as well.
+post_bulk_create = Signal(providing_args=["instances"])
+
+# Sent after SafeDeleteModel instances have been soft deleted using a bulk
+# query. This takes the place of a post_softdelete signal for each instance.
+post_bulk_softdelete = Signal(providing_args=["instances"])
@@ -15,8 +15,13 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+from unittest import mock
+
 from django.core.exceptions import ValidationError
 from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy as _
+
+import jsonschema.validators
 
 from .. import fields
 
@@ -101,3 +106,57 @@ class JSONSchemaValidatorTest(SimpleTestCase):
                 validator,
                 value,
             )
+
+    def test_shared_validator(self):
+        """Validators for the same schema share a compiled validator."""
+        schema = {"type": "array", "items": {"type": "string"}}
+        first = fields.JSONSchemaValidator(schema)
+        second = fields.JSONSchemaValidator(
+            dict(reversed(list(schema.items())))
+        )
+        first(["a"])
+        second(["b"])
+        self.assertIs(
+            first._schema_validator,  # noqa: W0212
+            second._schema_validator,  # noqa: W0212
+        )
+        self.assertIs(
+            fields.compiled_validator(schema),
+            first._schema_validator,  # noqa: W0212
+        )
+
+    def test_shared_validator_cache_hit(self):
+        """Validating with a new validator does not recompile the schema."""
+        schema = {
+            "type": "array",
+            "items": {"type": "string", "maxLength": 16},
+        }
+        value = ["en"]
+        fields.JSONSchemaValidator(schema)(value)
+        with mock.patch.object(
+            jsonschema.validators,
+            "validator_for",
+            wraps=jsonschema.validators.validator_for,
+        ) as validator_for:
+            validator = fields.JSONSchemaValidator(schema)
+            validator(value)
+            validator_for.assert_not_called()
+        self.assertIs(
+            validator._schema_validator,  # noqa: W0212
+            fields.compiled_validator(schema),
+        )
+
+    def test_lazy_translation_schema(self):
+        """Schemas containing lazy translation strings can be compiled."""
+        schema = {
+            "type": "string",
+            "description": _("A lazily translated description"),
+        }
+        validator = fields.JSONSchemaValidator(schema)
+        validator("any old string")
+        self.assertRaisesMessage(
+            ValidationError,
+            str(fields.JSONSchemaValidator.message),
+            validator,
+            1337,
+        )
@@ -0,0 +1,73 @@
+# Copyright (c) 2021 Wikimedia Foundation and contributors.
+# All Rights Reserved.
+#
+# This file is part of Toolhub.
+#
+# Toolhub is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Toolhub is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Toolhub.  If not, see <http://www.gnu.org/licenses/>.
+from django.test import SimpleTestCase
+from django.test import override_settings
+
+from .. import http
+
+
+class JitteredRetryTest(SimpleTestCase):
+    """Test JitteredRetry."""
+
+    def test_backoff_is_bounded(self):
+        """Backoff is randomized between zero and the exponential delay."""
+        retry = http.JitteredRetry(total=5, backoff_factor=1)
+        for _ in range(3):
+            retry = retry.increment(method="GET", url="/")
+        # urllib3 uses backoff_factor * 2 ** (retries - 1)
+        delays = {retry.get_backoff_time() for _ in range(50)}
+        self.assertTrue(all(0 <= d <= 4 for d in delays))
+        self.assertGreater(len(delays), 1)
+
+    def test_no_backoff_before_retry(self):
+        """The first attempt is not delayed."""
+        retry = http.JitteredRetry(total=5, backoff_factor=1)
+        self.assertEqual(retry.get_backoff_time(), 0)
+
+
+class MakeSessionTest(SimpleTestCase):
+    """Test make_session."""
+
+    @override_settings(
+        OUTBOUND_HTTP_RETRIES=3,
+        OUTBOUND_HTTP_BACKOFF=0.25,
+        OUTBOUND_HTTP_POOL_HOSTS=7,
+        OUTBOUND_HTTP_POOL_MAXSIZE=2,
+    )
+    def test_defaults_from_settings(self):
+        """Pool and retry configuration is read from settings."""
+        session = http.make_session(user_agent="test/1.0")
+        self.assertEqual(session.headers["User-Agent"], "test/1.0")
+        for scheme in ("http://", "https://"):
+            adapter = session.get_adapter(scheme + "example.org")
+            self.assertEqual(adapter._pool_connections, 7)
+            self.assertEqual(adapter._pool_maxsize, 2)
+            self.assertTrue(adapter._pool_block)
+            retry = adapter.max_retries
+            self.assertIsInstance(retry, http.JitteredRetry)
+            self.assertEqual(retry.total, 3)
+            self.assertEqual(retry.read, 0)
+            self.assertEqual(retry.backoff_factor, 0.25)
+            self.assertIn(503, retry.status_forcelist)
+
+    def test_arguments(self):
+        """Arguments override settings."""
+        session = http.make_session(retries=0, pool_maxsize=9)
+        adapter = session.get_adapter("https://example.org")
+        self.assertEqual(adapter.max_retries.total, 0)
+        self.assertEqual(adapter._pool_maxsize, 9)